@@ -4,51 +4,223 @@ AI-Powered Terminal Backend
 Full-stack bash shell with Gemini API integration
 """
 
+import time
+
+# Measured from the first line so /api/health can report real startup cost
+IMPORT_STARTED = time.perf_counter()
+
 import os
+import shlex
 import sys
 import json
-import subprocess
 import asyncio
-import time
+import threading
+import hmac
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 from dotenv import load_dotenv
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
-from flask_socketio import SocketIO, emit
-import google.generativeai as genai
+from flask_socketio import SocketIO, emit, join_room, leave_room
+
+from resilience import GuardedModel, CircuitBreaker, CircuitOpenError, ModelTimeoutError
+from prompt_builder import ExampleLibrary, PromptBuilder, TokenAccounting
+from dir_context import DirectoryContext
+from prefetch import Prefetcher
+from typo_correction import TypoCorrector
+from file_index import FileIndex
+from file_walker import ParallelWalker, DEFAULT_IGNORE
+from completion import CompletionEngine, TOP_K
+from file_preview import FilePreview, FilePreviewError
+from log_follow import LogFollower, FollowError
+from history_store import HistoryStore
+from socket_events import EventBroadcaster, OutputRelay, command_delta, session_room, HISTORY_ROOM
+import wire_format
+from message_bus import BusClient, LocalBusManager
+from shared_state import SharedState
+from async_exec import AsyncExecutor
+from gemini_client import LazyModel
+from metrics import Registry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from tracing import Tracer, TraceSink, span, record_span
+from profiler import RequestProfiler, ProfileError
+from memory_watch import MemoryWatch, rss_bytes
 
 # Load environment variables from .env file
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+# orjson for JSON, MessagePack on request, gzip/zstd above a size threshold
+compressor = wire_format.install(app, min_size=int(os.getenv('COMPRESS_MIN_BYTES', '1024')))
+socketio_options = {"json": wire_format.SocketIOJSON}
+if os.getenv('SOCKETIO_SERIALIZER', 'json').lower() == 'msgpack':
+    if wire_format.msgpack is not None:
+        socketio_options["serializer"] = 'msgpack'
+    else:
+        print("⚠️  SOCKETIO_SERIALIZER=msgpack but msgpack is not installed, using JSON")
+
+# Set by serve.py when several worker processes share one port: emits fan out over the bus
+WORKER_ID = os.getenv('NLSHELL_WORKER_ID')
+bus = BusClient(os.environ['NLSHELL_BUS']) if os.getenv('NLSHELL_BUS') else None
+if bus:
+    socketio_options["client_manager"] = LocalBusManager(bus)
+    # Long-polling needs every request of a session on one worker; the shared socket gives no such routing
+    socketio_options["transports"] = ['websocket']
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading', **socketio_options)
+
+# Prometheus metrics, served at /api/metrics; each worker labels its own samples
+metrics = Registry(const_labels={"worker": WORKER_ID} if WORKER_ID else None)
+stage_latency = metrics.histogram('nlshell_stage_duration_seconds', 'Time spent in each command stage', ['stage'])
+http_latency = metrics.histogram('nlshell_http_request_duration_seconds', 'HTTP request latency', ['method', 'endpoint'])
+commands_total = metrics.counter('nlshell_commands_total', 'Commands executed, by executor and outcome', ['executor', 'success'])
+fallbacks_total = metrics.counter('nlshell_executor_fallbacks_total', 'mini-bash failures retried in the system terminal', ['outcome'])
+timeouts_total = metrics.counter('nlshell_command_timeouts_total', 'Commands killed at their deadline', ['executor'])
+cache_lookups = metrics.counter('nlshell_cache_lookups_total', 'Cache lookups, by cache and result', ['cache', 'result'])
+commands_in_flight = metrics.gauge('nlshell_commands_in_flight', 'Commands currently executing')
+
+# Sampled per-request traces, one JSON line per trace; read them with trace_report.py
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0.1'))
+TRACE_FILE = os.getenv('TRACE_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'traces.jsonl'))
+if WORKER_ID:
+    root, ext = os.path.splitext(TRACE_FILE)
+    TRACE_FILE = f"{root}.{WORKER_ID}{ext}"  # one file per worker so rotation never races
+tracer = Tracer(
+    sink=TraceSink(TRACE_FILE, max_bytes=int(os.getenv('TRACE_MAX_BYTES', str(10 * 1024 * 1024)))) if TRACE_SAMPLE_RATE > 0 else None,
+    sample_rate=TRACE_SAMPLE_RATE
+)
+
+# CPU profiling of upcoming requests, only after an authenticated /api/debug/profile call arms it
+PROFILER_TOKEN = os.getenv('PROFILER_TOKEN')
+request_profiler = RequestProfiler(max_seconds=float(os.getenv('PROFILER_MAX_SECONDS', '300')))
+
+
+@contextmanager
+def stage(name: str, **attributes):
+    """Time a command stage into the latency histogram and, when sampled, the current trace"""
+    with stage_latency.labels(name).time(), span(name, **attributes) as current:
+        yield current
 
 # Global state
 current_directory = os.getcwd()
-command_history = []
-feedback_log = []
+HISTORY_DB = os.getenv('HISTORY_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'history.db'))
+
+# Command history and mini-bash feedback live in SQLite, not in process memory
+history_store = HistoryStore(
+    path=HISTORY_DB,
+    max_rows=int(os.getenv('HISTORY_MAX_ROWS', '0')),
+    ring_capacity=int(os.getenv('HISTORY_RING_CAPACITY', '1000')),
+    shared=bus is not None
+)
+
+# With several workers the current directory is kept in SQLite so every worker agrees on it
+shared_state = SharedState(HISTORY_DB) if bus else None
+
+
+def sync_current_directory() -> None:
+    """Pick up a directory change made by another worker"""
+    global current_directory
+    if not shared_state:
+        return
+    path = shared_state.get('current_directory')
+    if path and path != current_directory and os.path.isdir(path):
+        os.chdir(path)
+        current_directory = path
+
+
+def change_directory(path: str) -> None:
+    """chdir and publish the new current directory to the other workers"""
+    global current_directory
+    os.chdir(path)
+    current_directory = os.getcwd()
+    if shared_state:
+        shared_state.set('current_directory', current_directory)
+
+
+sync_current_directory()
+
+def emit_batch(event: str, payload: Dict, rooms: List[str]) -> None:
+    with stage('emit'):
+        socketio.emit(event, payload, to=rooms)
+
+
+# Command events go out as compact, coalesced batches to the issuing session and history subscribers
+broadcaster = EventBroadcaster(
+    emit=emit_batch,
+    window=float(os.getenv('SOCKET_COALESCE_MS', '50')) / 1000
+)
 
-# Initialize Gemini API
+# Gemini API; the SDK is imported and the model built on first use
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-if GEMINI_API_KEY:
-    genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel('gemini-2.5-flash')
-else:
+model = LazyModel(GEMINI_API_KEY, os.getenv('GEMINI_MODEL', 'gemini-2.5-flash'))
+if not model:
     print("⚠️  Warning: GEMINI_API_KEY not set. Natural language processing will be limited.")
-    model = None
+
+# Deadline, hedging and circuit breaker around every Gemini call
+model_guard = GuardedModel(
+    timeout=float(os.getenv('GEMINI_TIMEOUT', '15')),
+    hedge_enabled=os.getenv('GEMINI_HEDGE', 'false').lower() == 'true',
+    breaker=CircuitBreaker(
+        failure_threshold=int(os.getenv('GEMINI_BREAKER_THRESHOLD', '3')),
+        recovery_timeout=float(os.getenv('GEMINI_BREAKER_RECOVERY', '30'))
+    )
+)
+
+# Few-shot examples are picked per request from past successful translations
+example_library = ExampleLibrary(
+    path=os.getenv('PROMPT_EXAMPLES_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'translation_examples.json')),
+    capacity=int(os.getenv('PROMPT_EXAMPLES_CAPACITY', '500'))
+)
+prompt_builder = PromptBuilder(example_library, k=int(os.getenv('PROMPT_EXAMPLES_K', '3')))
+token_accounting = TokenAccounting()
+directory_context = DirectoryContext(char_budget=int(os.getenv('DIR_CONTEXT_BUDGET', '1200')))
+
+# One ignore list for both the filename index and the walker
+file_search_ignore = [r.strip() for r in os.getenv('FILE_SEARCH_IGNORE', ','.join(DEFAULT_IGNORE)).split(',') if r.strip()]
+
+# Filename index answers file searches from memory instead of walking the disk (opt-in)
+file_index = None
+if os.getenv('FILE_INDEX_ENABLED', 'false').lower() == 'true':
+    default_roots = os.pathsep.join([os.path.expanduser("~"), "/Users", "/Applications"])
+    file_index = FileIndex(
+        roots=os.getenv('FILE_INDEX_ROOTS', default_roots).split(os.pathsep),
+        max_depth=int(os.getenv('FILE_INDEX_MAX_DEPTH', '6')),
+        max_entries=int(os.getenv('FILE_INDEX_MAX_ENTRIES', '500000')),
+        max_watches=int(os.getenv('FILE_INDEX_MAX_WATCHES', '8192')),
+        ignore=file_search_ignore,
+        persist_path=os.getenv('FILE_INDEX_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'file_index.json'))
+    )
+    # Under serve.py only worker 0 scans and holds inotify watches; the others reload its snapshot
+    file_index.start(build=WORKER_ID in (None, '0'))
+
+# Roots the index does not cover are walked in parallel rather than with find
+file_walker = ParallelWalker(
+    max_workers=int(os.getenv('FILE_SEARCH_WORKERS', '8')),
+    ignore=file_search_ignore,
+    max_depth=int(os.getenv('FILE_SEARCH_MAX_DEPTH', '5'))
+)
 
 
 class CommandProcessor:
     """Process natural language commands using Gemini AI"""
     
     def __init__(self, mini_bash_path: str = "../mini-bash"):
-        self.mini_bash_path = mini_bash_path
-        self.mini_bash_available = os.path.exists(mini_bash_path)
+        # Relative to this file, not the working directory, which moves with every cd
+        self.mini_bash_path = os.path.normpath(
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), os.path.expanduser(mini_bash_path)))
+        self._mini_bash_found = False
+        # Every subprocess runs on one event loop instead of holding a thread per command
+        self.engine = AsyncExecutor(max_concurrent=int(os.getenv('EXEC_MAX_CONCURRENT', '256')))
         
+    @property
+    def mini_bash_available(self) -> bool:
+        """Probed on use rather than at import, and picked up if mini-bash is built later"""
+        if not self._mini_bash_found:
+            self._mini_bash_found = os.path.exists(self.mini_bash_path)
+        return self._mini_bash_found
+    
     def convert_natural_language_to_command(self, text: str, current_dir: str) -> Dict:
         """Use Gemini AI to convert natural language to terminal command"""
         global model
@@ -61,34 +233,13 @@ class CommandProcessor:
                 "needs_file_search": False
             }
         
-        prompt = f"""You are an AI assistant that converts natural language instructions into terminal commands.
-        
-Current directory: {current_dir}
-User request: "{text}"
-
-Analyze the request and provide a JSON response with:
-1. "command": The exact terminal command to execute (macOS/Linux compatible)
-2. "explanation": Brief explanation of what the command does
-3. "confidence": Confidence level (0.0-1.0)
-4. "needs_file_search": true if we need to search for a file/directory first, false otherwise
-5. "target_file": If needs_file_search is true, what file/folder to search for
-6. "action_type": One of: "execute", "open_file", "open_app", "change_directory", "search"
-
-Examples:
-- "show me all python files" → {{"command": "find . -name '*.py'", "explanation": "Find all Python files", "confidence": 0.95, "needs_file_search": false}}
-- "open adi.c in vscode" → {{"command": "code", "explanation": "Open file in VS Code", "confidence": 0.9, "needs_file_search": true, "target_file": "adi.c", "action_type": "open_file"}}
-- "list all files" → {{"command": "ls -la", "explanation": "List all files with details", "confidence": 1.0, "needs_file_search": false}}
-- "go to downloads folder" → {{"command": "cd ~/Downloads", "explanation": "Change to Downloads directory", "confidence": 0.95, "needs_file_search": false, "action_type": "change_directory"}}
-
-IMPORTANT: 
-- For file operations, use macOS/Linux commands
-- If opening files in apps, provide the app command (code, open, subl, etc.)
-- Return ONLY valid JSON, no additional text
-
-JSON Response:"""
+        prompt, examples = prompt_builder.build(text, current_dir, directory_context.describe(current_dir))
+        start = time.monotonic()
 
         try:
-            response = model.generate_content(prompt)
+            with stage('gemini', examples=len(examples)):
+                response = model_guard.call(model.generate_content, prompt)
+            token_accounting.record(prompt, response, time.monotonic() - start, len(examples))
             result_text = response.text.strip()
             
             # Extract JSON from response
@@ -98,8 +249,15 @@ JSON Response:"""
                 result_text = result_text.split("```")[1].split("```")[0].strip()
             
             result = json.loads(result_text)
+            result["source"] = "gemini"
             return result
             
+        except CircuitOpenError:
+            print("⚡ Gemini circuit open, using fallback mapping")
+            return self._fallback_command_mapping(text)
+        except ModelTimeoutError as e:
+            print(f"⏱️  Gemini AI timeout: {e}")
+            return self._fallback_command_mapping(text)
         except Exception as e:
             print(f"❌ Gemini AI error: {e}")
             # Fallback to basic command mapping
@@ -154,8 +312,9 @@ JSON Response:"""
             "needs_file_search": False
         }
     
-    def search_file_system(self, filename: str, start_dir: str = "/") -> List[str]:
-        """Search for a file across the system"""
+    def search_file_system(self, filename: str, start_dir: str = "/", mode: str = "auto",
+                           on_match: Optional[Callable[[str], None]] = None, limit: int = 10) -> List[str]:
+        """Search for a file across the system, reporting each match to on_match as it is found"""
         print(f"🔍 Searching for '{filename}' starting from {start_dir}")
         
         results = []
@@ -166,34 +325,36 @@ JSON Response:"""
             start_dir  # Current directory
         ]
         
-        # Use find command for faster search
-        for search_path in search_paths:
-            try:
-                # Limit search depth to avoid performance issues
-                cmd = f"find '{search_path}' -maxdepth 5 -name '{filename}' 2>/dev/null"
-                result = subprocess.run(
-                    cmd,
-                    shell=True,
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-                
-                if result.stdout:
-                    found_paths = result.stdout.strip().split('\n')
-                    results.extend([p for p in found_paths if p])
-                    
-            except Exception as e:
-                print(f"⚠️  Search error in {search_path}: {e}")
-                continue
+        # Answer from the filename index and only walk the roots it does not cover
+        if file_index is not None and file_index.ready:
+            results = file_index.lookup(filename, limit=limit, mode=mode)
+            search_paths = [p for p in search_paths if not file_index.covers(p)]
+            if on_match:
+                for path in results:
+                    on_match(path)
+        
+        if search_paths and len(results) < limit:
+            seen = set(results)
+            
+            def stream(path: str) -> None:
+                if path not in seen and on_match:
+                    on_match(path)
+            
+            walked = file_walker.walk(search_paths, filename, mode=mode, limit=limit - len(results),
+                                      timeout=5, on_match=stream)
+            results.extend(p for p in walked if p not in seen)
         
         # Remove duplicates and limit results
-        results = list(set(results))[:10]
+        results = list(dict.fromkeys(results))[:limit]
         print(f"✅ Found {len(results)} matches")
         return results
     
-    def execute_in_mini_bash(self, command: str) -> Dict:
+    def execute_in_mini_bash(self, command: str, cwd: Optional[str] = None) -> Dict:
         """Execute command in mini-bash"""
+        return self.engine.run(self.run_in_mini_bash(command, cwd))
+    
+    async def run_in_mini_bash(self, command: str, cwd: Optional[str] = None) -> Dict:
+        """Coroutine behind execute_in_mini_bash, run on the executor loop"""
         if not self.mini_bash_available:
             return {
                 "success": False,
@@ -206,94 +367,118 @@ JSON Response:"""
         # No need to redirect anymore
         
         try:
-            process = subprocess.Popen(
-                [self.mini_bash_path],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                cwd=current_directory
-            )
-            
-            stdout, stderr = process.communicate(input=f"{command}\nexit\n", timeout=10)
-            
-            # Clean up mini-bash prompt output
-            output_lines = stdout.strip().split('\n')
-            cleaned_output = []
-            for line in output_lines:
-                # Skip mini-bash welcome message and prompts
-                if 'Advanced Mini Bash Shell' not in line and \
-                   'Type \'exit\' to quit' not in line and \
-                   'mini-bash:' not in line and \
-                   line.strip():
-                    cleaned_output.append(line)
-            
-            final_output = '\n'.join(cleaned_output).strip()
-            
-            # For file operations that don't produce output, add success message
-            if not final_output and command.split()[0] in ['mkdir', 'rmdir', 'touch', 'rm', 'cp', 'mv']:
-                final_output = f"✅ Command '{command}' executed successfully"
-            
-            return {
-                "success": process.returncode == 0,
-                "output": final_output,
-                "error": stderr.strip(),
-                "executor": "mini-bash"
-            }
-            
-        except subprocess.TimeoutExpired:
-            process.kill()
+            with span('mini_bash', command=command) as current:
+                process = await self.engine.run_process(
+                    [self.mini_bash_path],
+                    input=f"{command}\nexit\n",
+                    cwd=cwd or current_directory,
+                    timeout=10
+                )
+                if current:
+                    current.set(returncode=process["returncode"], timed_out=process["timed_out"])
+        except Exception as e:
             return {
                 "success": False,
                 "output": "",
-                "error": "Command timed out",
+                "error": str(e),
                 "executor": "mini-bash"
             }
-        except Exception as e:
+        
+        stage_latency.labels('mini_bash').observe(process["elapsed"])
+        if process["timed_out"]:
+            timeouts_total.labels('mini-bash').inc()
             return {
                 "success": False,
                 "output": "",
-                "error": str(e),
+                "error": "Command timed out",
                 "executor": "mini-bash"
             }
+        
+        # Clean up mini-bash prompt output
+        output_lines = process["stdout"].strip().split('\n')
+        cleaned_output = []
+        for line in output_lines:
+            # Skip mini-bash welcome message and prompts
+            if 'Advanced Mini Bash Shell' not in line and \
+               'Type \'exit\' to quit' not in line and \
+               'mini-bash:' not in line and \
+               line.strip():
+                cleaned_output.append(line)
+        
+        final_output = '\n'.join(cleaned_output).strip()
+        
+        # For file operations that don't produce output, add success message
+        if not final_output and command.split()[0] in ['mkdir', 'rmdir', 'touch', 'rm', 'cp', 'mv']:
+            final_output = f"✅ Command '{command}' executed successfully"
+        
+        return {
+            "success": process["returncode"] == 0,
+            "output": final_output,
+            "error": process["stderr"].strip(),
+            "executor": "mini-bash",
+            "truncated": process["truncated"]
+        }
     
-    def execute_in_system_terminal(self, command: str) -> Dict:
+    def execute_in_system_terminal(self, command: str, cwd: Optional[str] = None) -> Dict:
         """Execute command in system terminal (Mac/Linux)"""
+        return self.engine.run(self.run_in_system_terminal(command, cwd))
+    
+    async def run_in_system_terminal(self, command: str, cwd: Optional[str] = None,
+                                     on_output: Optional[Callable[[str, str], None]] = None) -> Dict:
+        """Coroutine behind execute_in_system_terminal; on_output(stream, text) sees output as it arrives"""
         try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=30,
-                cwd=current_directory
-            )
-            
-            return {
-                "success": result.returncode == 0,
-                "output": result.stdout.strip(),
-                "error": result.stderr.strip(),
-                "executor": "system-terminal"
-            }
-            
-        except subprocess.TimeoutExpired:
+            with span('system_terminal', command=command) as current:
+                process = await self.engine.run_process(
+                    shell=command,
+                    cwd=cwd or current_directory,
+                    timeout=30,
+                    on_output=on_output
+                )
+                if current:
+                    current.set(returncode=process["returncode"], timed_out=process["timed_out"])
+        except Exception as e:
             return {
                 "success": False,
                 "output": "",
-                "error": "Command timed out",
+                "error": str(e),
                 "executor": "system-terminal"
             }
-        except Exception as e:
+        
+        stage_latency.labels('system_terminal').observe(process["elapsed"])
+        if process["timed_out"]:
+            timeouts_total.labels('system-terminal').inc()
             return {
                 "success": False,
                 "output": "",
-                "error": str(e),
+                "error": "Command timed out",
                 "executor": "system-terminal"
             }
+        
+        return {
+            "success": process["returncode"] == 0,
+            "output": process["stdout"].strip(),
+            "error": process["stderr"].strip(),
+            "executor": "system-terminal",
+            "truncated": process["truncated"]
+        }
     
     def execute_command(self, command: str, prefer_mini_bash: bool = True) -> Dict:
         """Execute command with fallback logic or force specific executor"""
-        global current_directory, feedback_log
+        return self.engine.run(self.run_command(command, prefer_mini_bash))
+    
+    async def run_command(self, command: str, prefer_mini_bash: bool = True,
+                          on_output: Optional[Callable[[str, str], None]] = None) -> Dict:
+        """Coroutine behind execute_command"""
+        with commands_in_flight.track(), span('execute', command=command, prefer_mini_bash=prefer_mini_bash) as current:
+            result = await self._dispatch(command, prefer_mini_bash, on_output)
+            if current:
+                current.set(executor=result["executor"], success=result["success"])
+        commands_total.labels(result["executor"], str(result["success"]).lower()).inc()
+        return result
+    
+    async def _dispatch(self, command: str, prefer_mini_bash: bool,
+                        on_output: Optional[Callable[[str, str], None]]) -> Dict:
+        global current_directory
         
         # Handle directory change
         if command.startswith("cd "):
@@ -302,8 +487,7 @@ JSON Response:"""
             
             try:
                 if os.path.isdir(target_dir):
-                    os.chdir(target_dir)
-                    current_directory = os.getcwd()
+                    change_directory(target_dir)
                     return {
                         "success": True,
                         "output": f"Changed directory to {current_directory}",
@@ -327,16 +511,17 @@ JSON Response:"""
         
         # Try mini-bash first
         if prefer_mini_bash and self.mini_bash_available:
-            result = self.execute_in_mini_bash(command)
+            result = await self.run_in_mini_bash(command)
             
             # If mini-bash fails, try system terminal
             if not result["success"]:
                 print(f"⚠️  mini-bash failed, trying system terminal...")
-                system_result = self.execute_in_system_terminal(command)
+                system_result = await self.run_in_system_terminal(command, on_output=on_output)
                 
+                fallbacks_total.labels('recovered' if system_result["success"] else 'failed').inc()
                 if system_result["success"]:
                     # Log feedback: command not supported in mini-bash
-                    feedback_log.append({
+                    history_store.add_feedback({
                         "timestamp": datetime.now().isoformat(),
                         "command": command,
                         "status": "not_implemented_in_mini_bash",
@@ -349,11 +534,141 @@ JSON Response:"""
             return result
         else:
             # Use system terminal directly
-            return self.execute_in_system_terminal(command)
+            return await self.run_in_system_terminal(command, on_output=on_output)
 
 
 # Initialize command processor
 command_processor = CommandProcessor()
+executor_processes = metrics.gauge('nlshell_executor_processes', 'Subprocesses on the async executor', ['state'])
+executor_processes.labels('running').set_function(lambda: command_processor.engine.stats["running"])
+executor_processes.labels('queued').set_function(lambda: command_processor.engine.stats["queued"])
+
+# Mistyped direct commands are fixed locally, before Gemini or the executors see them
+typo_corrector = TypoCorrector()
+threading.Thread(target=typo_corrector.warm, name="typo-index", daemon=True).start()
+
+# Paged file previews, read through mmap instead of whole-file strings
+file_preview = FilePreview()
+
+# tail -f without a process per follower: appended bytes go to a Socket.IO room per file
+log_follower = LogFollower(
+    on_data=lambda path, payload: socketio.emit('follow_data', payload, to=f"follow:{path}"),
+    allowed_roots=[r for r in os.getenv('FOLLOW_ALLOWED_ROOTS', '/var/log').split(':') if r],
+    coalesce_interval=float(os.getenv('FOLLOW_COALESCE_MS', '100')) / 1000,
+    max_streams=int(os.getenv('FOLLOW_MAX_STREAMS', '512'))
+)
+
+
+def tail_follow_target(command: str) -> Optional[str]:
+    """Return the file of a plain 'tail -f FILE' command, or None for anything else"""
+    try:
+        tokens = shlex.split(command)
+    except ValueError:
+        return None
+    if len(tokens) < 3 or tokens[0] != 'tail' or any(t in ('|', ';', '&&', '||', '>', '>>') for t in tokens):
+        return None
+    follow, files, skip = False, [], False
+    for token in tokens[1:]:
+        if skip:
+            skip = False
+        elif token in ('-n', '-c', '--lines', '--bytes'):
+            skip = True
+        elif token.startswith('--follow') or (token.startswith('-') and not token.startswith('--') and
+                                                ('f' in token or 'F' in token)):
+            follow = True
+        elif not token.startswith('-'):
+            files.append(token)
+    return files[0] if follow and len(files) == 1 else None
+
+
+# Keystroke completions for the input bar, ranked by the persisted history from the start
+completion_engine = CompletionEngine()
+
+
+def warm_completions() -> None:
+    seeded = completion_engine.seed(
+        (command, datetime.fromisoformat(timestamp).timestamp())
+        for command, timestamp in history_store.recent_commands(int(os.getenv('COMPLETION_SEED_HISTORY', '1000'))))
+    completion_engine.warm(current_directory)
+    print(f"⌨️  Completions seeded from {seeded} history entries")
+
+
+threading.Thread(target=warm_completions, name="completion", daemon=True).start()
+
+# Warm likely next translations while the user is idle; opt-in, since every prediction
+# is a real model call that counts toward the breaker and token metrics
+prefetcher = None
+if os.getenv('PREFETCH_ENABLED', 'false').lower() == 'true':
+    prefetcher = Prefetcher(
+        translate=command_processor.convert_natural_language_to_command,
+        execute=(lambda command, cwd, prefer_mini_bash: command_processor.execute_in_mini_bash(command, cwd=cwd)
+                 if prefer_mini_bash else command_processor.execute_in_system_terminal(command, cwd=cwd))
+        if os.getenv('PREFETCH_RESULTS', 'false').lower() == 'true' else None,
+        idle_delay=float(os.getenv('PREFETCH_IDLE_DELAY', '1.5'))
+    )
+
+# RSS sampling against a budget; on a critical alarm the caches below can be dropped
+memory_watch = MemoryWatch(
+    budget_bytes=int(float(os.getenv('MEMORY_BUDGET_MB', '0')) * 2**20),
+    warn_ratio=float(os.getenv('MEMORY_WARN_RATIO', '0.8')),
+    interval=float(os.getenv('MEMORY_SAMPLE_SECONDS', '10')),
+    shed_on_alarm=os.getenv('MEMORY_SHED_ON_ALARM', 'false').lower() == 'true'
+)
+memory_watch.register_shedder('history_ring', history_store.shed_ring)
+memory_watch.register_shedder('directory_context', directory_context.clear)
+memory_watch.register_shedder('file_preview', file_preview.clear)
+if prefetcher:
+    memory_watch.register_shedder('prefetch', prefetcher.clear)
+if int(os.getenv('MEMORY_TRACEMALLOC_FRAMES', '0')) > 0:
+    memory_watch.start_tracing(int(os.getenv('MEMORY_TRACEMALLOC_FRAMES')))
+metrics.gauge('nlshell_process_resident_memory_bytes', 'Resident set size').set_function(rss_bytes)
+
+
+def learn_from_command(user_input: str, command: str, directory: str, example: Optional[Dict] = None,
+                       replicate: bool = True) -> None:
+    """Feed a successful command to the local caches and, with several workers, to theirs"""
+    directory_context.note_command(directory, command)
+    typo_corrector.learn(command)
+    completion_engine.record(command)
+    if example:
+        # Only the worker that ran the command rewrites the examples file
+        example_library.add(user_input, example, persist=replicate)
+    if replicate and bus:
+        bus.publish('learn', {"user_input": user_input, "command": command,
+                              "directory": directory, "example": example})
+
+
+if bus:
+    bus.subscribe('learn', lambda message: learn_from_command(**message, replicate=False))
+    app.before_request(sync_current_directory)
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    if not request.path.startswith('/api/debug/'):
+        g.profile = request_profiler.begin_request()
+
+
+@app.teardown_request
+def stop_request_profile(exc=None):
+    request_profiler.end_request(g.pop('profile', None))
+
+
+@app.after_request
+def observe_request(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        http_latency.labels(request.method, endpoint).observe(time.perf_counter() - started)
+    return response
+
+
+def startup_stats() -> Dict:
+    """Import time and time to the first health check, both from the top of this module"""
+    if STARTUP["first_health_seconds"] is None:
+        STARTUP["first_health_seconds"] = round(time.perf_counter() - IMPORT_STARTED, 3)
+    return STARTUP
 
 
 @app.route('/api/health', methods=['GET'])
@@ -362,12 +677,140 @@ def health_check():
     return jsonify({
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "gemini_available": model is not None,
+        "gemini_available": model.configured,
+        "gemini_model": model.get_stats(),
+        "startup": startup_stats(),
+        "gemini_guard": model_guard.stats(),
+        "directory_context": directory_context.get_stats(),
+        "prefetch": prefetcher.get_stats() if prefetcher else None,
+        "typo_correction": typo_corrector.get_stats(),
+        "file_index": file_index.get_stats() if file_index else None,
+        "completion": completion_engine.get_stats(),
+        "follow": log_follower.get_stats(),
+        "history_store": history_store.get_stats(),
+        "socket_events": broadcaster.get_stats(),
+        "wire_format": compressor.get_stats(),
+        "executor": command_processor.engine.get_stats(),
+        "tracing": tracer.get_stats(),
+        "memory": {"rss": memory_watch.samples[-1][1] if memory_watch.samples else None,
+                   "peak_rss": memory_watch.peak, "state": memory_watch.state},
+        "worker": {"id": WORKER_ID, "pid": os.getpid(), "bus": bus.stats if bus else None},
         "mini_bash_available": command_processor.mini_bash_available,
         "current_directory": current_directory
     })
 
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text exposition of this worker's metrics"""
+    return Response(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+
+def debug_authorized() -> bool:
+    """Debug endpoints are off unless PROFILER_TOKEN is set, and need it as a bearer token"""
+    if not PROFILER_TOKEN:
+        return False
+    header = request.headers.get('Authorization', '')
+    supplied = header[7:] if header.startswith('Bearer ') else request.headers.get('X-Debug-Token', '')
+    return hmac.compare_digest(supplied.encode(), PROFILER_TOKEN.encode())
+
+
+@app.route('/api/debug/profile', methods=['GET', 'POST', 'DELETE'])
+def debug_profile():
+    """POST arms profiling for the next N requests / T seconds, GET reports or dumps, DELETE disarms"""
+    if not debug_authorized():
+        return jsonify({"error": "Not found"}), 404
+    try:
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+            session = request_profiler.arm(
+                mode=data.get('mode', 'sample'),
+                requests=data.get('requests'),
+                seconds=data.get('seconds'),
+                interval_ms=float(data.get('interval_ms', 5.0))
+            )
+            return jsonify({"armed": session})
+        if request.method == 'DELETE':
+            return jsonify({"finished": request_profiler.disarm()})
+        fmt = request.args.get('format')
+        if not fmt:
+            return jsonify(request_profiler.status())
+        body, mimetype = request_profiler.dump(fmt, limit=request.args.get('limit', 50, type=int))
+        response = Response(body, mimetype=mimetype)
+        if fmt == 'pstats':
+            response.headers['Content-Disposition'] = 'attachment; filename=profile.pstats'
+        return response
+    except ProfileError as e:
+        return jsonify({"error": str(e)}), e.status
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid profiling parameters: {e}"}), 400
+
+
+@app.route('/api/debug/memory', methods=['GET'])
+def debug_memory():
+    """RSS, budget state, recent alarms and the tracemalloc snapshots held"""
+    if not debug_authorized():
+        return jsonify({"error": "Not found"}), 404
+    stats = memory_watch.get_stats()
+    if request.args.get('samples') == 'true':
+        stats["samples"] = memory_watch.recent_samples()
+    limit = request.args.get('top', type=int)
+    if limit:
+        stats["top"] = memory_watch.top_allocators(limit, request.args.get('key', 'lineno'))
+    return jsonify(stats)
+
+
+@app.route('/api/debug/memory/tracemalloc', methods=['POST', 'DELETE'])
+def debug_tracemalloc():
+    """POST starts tracemalloc (optionally with {"frames": N}), DELETE stops it"""
+    if not debug_authorized():
+        return jsonify({"error": "Not found"}), 404
+    if request.method == 'DELETE':
+        memory_watch.stop_tracing()
+    else:
+        data = request.get_json(silent=True) or {}
+        memory_watch.start_tracing(int(data.get('frames', 1)))
+    return jsonify(memory_watch.get_stats()["tracemalloc"])
+
+
+@app.route('/api/debug/memory/snapshot', methods=['POST'])
+def debug_memory_snapshot():
+    """Take a tracemalloc snapshot; the response includes the diff against the previous one"""
+    if not debug_authorized():
+        return jsonify({"error": "Not found"}), 404
+    data = request.get_json(silent=True) or {}
+    try:
+        return jsonify(memory_watch.snapshot(data.get('label'), limit=int(data.get('limit', 20))))
+    except RuntimeError as e:
+        return jsonify({"error": f"{e}; POST /api/debug/memory/tracemalloc first"}), 409
+
+
+@app.route('/api/debug/memory/diff', methods=['GET'])
+def debug_memory_diff():
+    """Allocation sites that changed most between two snapshots (?from=1&to=2)"""
+    if not debug_authorized():
+        return jsonify({"error": "Not found"}), 404
+    try:
+        return jsonify(memory_watch.diff(
+            request.args.get('from', type=int),
+            request.args.get('to', type=int),
+            key_type=request.args.get('key', 'lineno'),
+            limit=request.args.get('limit', 20, type=int)
+        ))
+    except KeyError as e:
+        return jsonify({"error": f"Unknown snapshot, {e.args[0]}"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@app.route('/api/debug/memory/shed', methods=['POST'])
+def debug_memory_shed():
+    """Drop the in-memory caches now"""
+    if not debug_authorized():
+        return jsonify({"error": "Not found"}), 404
+    return jsonify(memory_watch.shed())
+
+
 @app.route('/api/directory', methods=['GET'])
 def get_directory():
     """Get current directory"""
@@ -378,23 +821,36 @@ def get_directory():
     })
 
 
-@app.route('/api/execute', methods=['POST'])
-def execute_command():
-    """Execute a natural language or direct command"""
-    global current_directory, command_history
-    
-    data = request.json
-    user_input = data.get('command', '').strip()
-    is_voice = data.get('is_voice', False)
-    preferred_executor = data.get('preferred_executor', 'mini-bash')  # 'mini-bash' or 'system-terminal'
-    
-    if not user_input:
-        return jsonify({"error": "No command provided"}), 400
-    
-    print(f"\n{'🎤' if is_voice else '⌨️ '} User input: {user_input}")
+def prepare_command(user_input: str) -> Tuple[Optional[Dict], Optional[Tuple[Dict, int]]]:
+    """Translate user input to a command; returns (ai_result, None) or (None, (payload, status)) when answered early"""
+    # Catch typos like 'gti status' before spending a model call on them
+    ai_result = None
+    with span('typo_check'):
+        correction = typo_corrector.check(user_input)
+    if correction and correction["command"]:
+        print(f"🔤 Corrected typo: {user_input} → {correction['command']}")
+        ai_result = {
+            "command": correction["command"],
+            "explanation": f"Corrected typo in '{user_input}'",
+            "confidence": 0.9,
+            "needs_file_search": False,
+            "source": "typo-correction",
+            "suggestions": correction["suggestions"]
+        }
+    elif correction:
+        # Only a hint; the input still runs, translated or as typed
+        print(f"🔤 Possible typo, suggestions: {correction['suggestions']}")
     
-    # Convert natural language to command
-    ai_result = command_processor.convert_natural_language_to_command(user_input, current_directory)
+    # Convert natural language to command, unless it was predicted and prefetched
+    if ai_result is None and prefetcher:
+        prefetcher.touch()
+        ai_result = prefetcher.get_translation(user_input, current_directory)
+        cache_lookups.labels('prefetch_translation', 'hit' if ai_result else 'miss').inc()
+    if ai_result is None:
+        with stage('translate'):
+            ai_result = command_processor.convert_natural_language_to_command(user_input, current_directory)
+    if correction and not correction["command"]:
+        ai_result = {**ai_result, "suggestions": correction["suggestions"]}
     command = ai_result["command"]
     
     print(f"🤖 AI interpretation: {command}")
@@ -404,8 +860,18 @@ def execute_command():
     if ai_result.get("needs_file_search"):
         target_file = ai_result.get("target_file")
         if target_file:
-            print(f"🔍 Searching for file: {target_file}")
-            search_results = command_processor.search_file_system(target_file, current_directory)
+            local_match = directory_context.resolve(current_directory, target_file)
+            if local_match:
+                print(f"📂 Found {target_file} in directory snapshot, skipping search")
+                directory_context.record("searches_avoided")
+                cache_lookups.labels('directory_snapshot', 'hit').inc()
+                search_results = [local_match]
+            else:
+                print(f"🔍 Searching for file: {target_file}")
+                directory_context.record("searches_performed")
+                cache_lookups.labels('directory_snapshot', 'miss').inc()
+                with stage('file_search', target=target_file):
+                    search_results = command_processor.search_file_system(target_file, current_directory)
             
             if search_results:
                 file_path = search_results[0]  # Use first match
@@ -413,8 +879,7 @@ def execute_command():
                 
                 # Change to that directory
                 if file_dir and os.path.isdir(file_dir):
-                    os.chdir(file_dir)
-                    current_directory = os.getcwd()
+                    change_directory(file_dir)
                     print(f"📂 Changed to directory: {current_directory}")
                 
                 # Modify command to use found file
@@ -426,20 +891,65 @@ def execute_command():
                         app_name = "subl"
                     
                     command = f"{app_name} '{file_path}'"
+                    # Keep what the model said; the found path only makes sense on this machine
+                    ai_result.setdefault("model_command", ai_result["command"])
+                    ai_result["command"] = command
                 
                 ai_result["search_results"] = search_results
                 ai_result["selected_file"] = file_path
             else:
-                return jsonify({
+                return None, ({
                     "success": False,
                     "error": f"File not found: {target_file}",
                     "command": command,
                     "ai_interpretation": ai_result
-                }), 404
+                }, 404)
+    elif ai_result.get("source") == "gemini" and directory_context.mentions_entry(current_directory, command):
+        directory_context.record("resolved_in_prompt")
     
-    # Execute command with preferred executor
-    prefer_mini_bash = (preferred_executor == 'mini-bash')
-    result = command_processor.execute_command(command, prefer_mini_bash=prefer_mini_bash)
+    # tail -f would only run until the executor timeout kills it; hand it to a follow stream instead
+    follow_path = tail_follow_target(command)
+    if follow_path:
+        try:
+            full_path = log_follower.resolve(follow_path, current_directory)
+        except FollowError as e:
+            return None, ({"success": False, "output": "", "error": str(e), "executor": "follow",
+                           "command": command, "ai_interpretation": ai_result,
+                           "current_directory": current_directory}, e.status)
+        print(f"👀 Handing '{command}' to a follow stream")
+        return None, ({
+            "success": True,
+            "output": log_follower.tail(full_path),
+            "error": "",
+            "executor": "follow",
+            "command": command,
+            "follow": {"path": full_path},
+            "ai_interpretation": ai_result,
+            "current_directory": current_directory
+        }, 200)
+    
+    return ai_result, None
+
+
+def prefetched_result(command: str, prefer_mini_bash: bool) -> Optional[Dict]:
+    """Result of a command the prefetcher already ran speculatively with the same executor, if still fresh"""
+    if not prefetcher:
+        return None
+    result = prefetcher.get_result(command, current_directory, prefer_mini_bash)
+    cache_lookups.labels('prefetch_result', 'hit' if result else 'miss').inc()
+    return result
+
+
+def record_execution(user_input: str, is_voice: bool, ai_result: Dict, result: Dict,
+                     session_id: Optional[str], prefer_mini_bash: bool = True) -> int:
+    """Learn from, store and announce a finished command; returns its history id"""
+    command = ai_result["command"]
+    if result["success"]:
+        # Learn from translations that actually worked, as the model gave them
+        example = None
+        if ai_result.get("source") == "gemini":
+            example = {**ai_result, "command": ai_result.get("model_command", command)}
+        learn_from_command(user_input, command, current_directory, example=example)
     
     # Add to history
     history_entry = {
@@ -451,38 +961,199 @@ def execute_command():
         "ai_interpretation": ai_result,
         "directory": current_directory
     }
-    command_history.append(history_entry)
+    with span('history'):
+        history_id = history_store.add_history(history_entry)
     
-    # Emit to WebSocket clients
-    socketio.emit('command_executed', history_entry)
+    if prefetcher:
+        prefetcher.observe(user_input, current_directory, prefer_mini_bash)
     
-    return jsonify({
+    # Tell the issuing session and history subscribers; full output is at /api/history/<id>
+    rooms = [HISTORY_ROOM] + ([session_room(session_id)] if session_id else [])
+    with span('publish', rooms=len(rooms)):
+        broadcaster.publish('command_executed', command_delta(history_id, history_entry), rooms)
+    return history_id
+
+
+def execution_response(ai_result: Dict, result: Dict, history_id: int) -> Dict:
+    return {
         "success": result["success"],
         "output": result["output"],
         "error": result["error"],
         "executor": result["executor"],
-        "command": command,
+        # Output past the executor's per-stream cap was dropped
+        "truncated": result.get("truncated", False),
+        "command": ai_result["command"],
         "ai_interpretation": ai_result,
-        "current_directory": current_directory
-    })
+        "current_directory": current_directory,
+        "history_id": history_id
+    }
+
+
+def start_command_trace(user_input: str, is_voice: bool, data: Dict, force: bool = False):
+    """Root span for one command; voice requests carry the client's recognition time as a child span"""
+    root = tracer.start('voice' if is_voice else 'execute', force=force, input=user_input,
+                        preferred_executor=data.get('preferred_executor', 'mini-bash'))
+    recognition_ms = (data.get('voice_timing') or {}).get('recognition_ms') if is_voice else None
+    if root and isinstance(recognition_ms, (int, float)):
+        with tracer.activate(root):
+            record_span('speech_recognition', recognition_ms / 1000, end=root.start, source='client')
+    return root
+
+
+def finish_command_trace(root, result: Dict, history_id: Optional[int] = None) -> None:
+    if root:
+        root.set(success=result.get("success"), executor=result.get("executor"),
+                 command=result.get("command"), history_id=history_id)
+    tracer.finish(root)
+
+
+@app.route('/api/execute', methods=['POST'])
+def execute_command():
+    """Execute a natural language or direct command"""
+    data = request.json
+    user_input = data.get('command', '').strip()
+    is_voice = data.get('is_voice', False)
+    preferred_executor = data.get('preferred_executor', 'mini-bash')  # 'mini-bash' or 'system-terminal'
+    session_id = data.get('session_id') or request.headers.get('X-Session-Id')
+    
+    if not user_input:
+        return jsonify({"error": "No command provided"}), 400
+    
+    print(f"\n{'🎤' if is_voice else '⌨️ '} User input: {user_input}")
+    
+    # Forcing a trace writes to disk on demand, so it needs the debug token like the debug endpoints
+    force_trace = request.headers.get('X-Trace') == '1' and debug_authorized()
+    root = start_command_trace(user_input, is_voice, data, force=force_trace)
+    with tracer.activate(root):
+        ai_result, early = prepare_command(user_input)
+        if early:
+            payload, status = early
+            finish_command_trace(root, payload)
+            return jsonify(payload), status
+        command = ai_result["command"]
+        
+        # Execute command with preferred executor
+        prefer_mini_bash = (preferred_executor == 'mini-bash')
+        result = prefetched_result(command, prefer_mini_bash)
+        if result is None:
+            result = command_processor.execute_command(command, prefer_mini_bash=prefer_mini_bash)
+        
+        history_id = record_execution(user_input, is_voice, ai_result, result, session_id, prefer_mini_bash)
+        response = execution_response(ai_result, result, history_id)
+    finish_command_trace(root, response, history_id)
+    return jsonify(response)
+
+
+def parse_fields(value: Optional[str]) -> Optional[List[str]]:
+    """?fields=command,success,output -> ['command', 'success', 'output'] (None means all)"""
+    if not value:
+        return None
+    return [f.strip() for f in value.split(',') if f.strip()]
 
 
 @app.route('/api/history', methods=['GET'])
 def get_history():
-    """Get command history"""
-    limit = request.args.get('limit', 50, type=int)
+    """Get command history, newest page first; pass next_cursor back as 'before' for older pages"""
+    limit = max(1, min(request.args.get('limit', 50, type=int), 500))
+    fields = parse_fields(request.args.get('fields'))
+    success = request.args.get('success')
+    page = history_store.history(
+        limit=limit,
+        before=request.args.get('before', type=int),
+        executor=request.args.get('executor'),
+        success=None if success is None else success.lower() == 'true'
+    )
+    return jsonify({
+        "history": [record.to_dict(fields) for record in reversed(page["entries"])],
+        "total": history_store.count(),
+        "next_cursor": page["next_cursor"]
+    })
+
+
+@app.route('/api/history/<int:entry_id>', methods=['GET'])
+def get_history_entry(entry_id):
+    """Full history entry, including the complete output"""
+    entry = history_store.get_entry(entry_id)
+    if entry is None:
+        return jsonify({"error": "History entry not found"}), 404
+    return jsonify(entry)
+
+
+@app.route('/api/history/search', methods=['GET'])
+def search_history():
+    """Full-text search over past inputs and commands"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "No query provided"}), 400
+    
+    fields = parse_fields(request.args.get('fields'))
+    page = history_store.search(
+        query,
+        limit=max(1, min(request.args.get('limit', 50, type=int), 500)),
+        before=request.args.get('before', type=int)
+    )
     return jsonify({
-        "history": command_history[-limit:],
-        "total": len(command_history)
+        "query": query,
+        "results": [record.to_dict(fields) for record in page["entries"]],
+        "count": len(page["entries"]),
+        "next_cursor": page["next_cursor"]
     })
 
 
+@app.route('/api/complete', methods=['GET'])
+def get_completions():
+    """Complete a partially typed command"""
+    text = request.args.get('q', '')
+    limit = min(request.args.get('limit', TOP_K, type=int), TOP_K)
+    return jsonify({
+        "query": text,
+        "completions": completion_engine.complete(text, current_directory, limit)
+    })
+
+
+@app.route('/api/file', methods=['GET'])
+def get_file():
+    """Read a byte range (offset/length) or line range (start_line/num_lines) of a file"""
+    path = request.args.get('path', '').strip()
+    if not path:
+        return jsonify({"error": "No path provided"}), 400
+    
+    try:
+        return jsonify(file_preview.read(
+            path,
+            current_directory,
+            offset=request.args.get('offset', type=int),
+            length=request.args.get('length', type=int),
+            start_line=request.args.get('start_line', type=int),
+            num_lines=request.args.get('num_lines', type=int)
+        ))
+    except FilePreviewError as e:
+        return jsonify({"error": str(e)}), e.status
+    except OSError as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route('/api/feedback', methods=['GET'])
 def get_feedback():
     """Get feedback log (commands not supported in mini-bash)"""
+    page = history_store.feedback(
+        limit=max(1, min(request.args.get('limit', 100, type=int), 500)),
+        before=request.args.get('before', type=int)
+    )
     return jsonify({
-        "feedback": feedback_log,
-        "total": len(feedback_log)
+        "feedback": page["entries"][::-1],
+        "total": history_store.count('feedback'),
+        "next_cursor": page["next_cursor"]
+    })
+
+
+@app.route('/api/usage', methods=['GET'])
+def get_usage():
+    """Get Gemini token usage and latency per call"""
+    limit = request.args.get('limit', 20, type=int)
+    return jsonify({
+        **token_accounting.summary(limit),
+        "example_library_size": len(example_library)
     })
 
 
@@ -492,11 +1163,12 @@ def search_files():
     data = request.json
     filename = data.get('filename', '').strip()
     start_dir = data.get('start_dir', current_directory)
+    mode = data.get('mode', 'auto')  # 'auto', 'exact', 'glob' or 'prefix'
     
     if not filename:
         return jsonify({"error": "No filename provided"}), 400
     
-    results = command_processor.search_file_system(filename, start_dir)
+    results = command_processor.search_file_system(filename, start_dir, mode)
     
     return jsonify({
         "results": results,
@@ -509,34 +1181,190 @@ def search_files():
 def handle_connect():
     """Handle WebSocket connection"""
     print('✅ Client connected')
+    sync_current_directory()
+    session_id = request.args.get('session_id')
+    if session_id:
+        join_room(session_room(session_id))
     emit('connected', {
         "status": "connected",
-        "current_directory": current_directory
+        "current_directory": current_directory,
+        "session_id": session_id
     })
 
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle WebSocket disconnection"""
+    log_follower.drop_subscriber(request.sid)
     print('❌ Client disconnected')
 
 
+@socketio.on('subscribe_history')
+def handle_subscribe_history(data=None):
+    """Receive command_executed events for every session, not just this one"""
+    join_room(HISTORY_ROOM)
+    emit('history_subscribed', {"room": HISTORY_ROOM})
+
+
+@socketio.on('unsubscribe_history')
+def handle_unsubscribe_history(data=None):
+    """Go back to events for this session only"""
+    leave_room(HISTORY_ROOM)
+
+
+@socketio.on('complete')
+def handle_ws_complete(data):
+    """Socket.IO equivalent of /api/complete"""
+    sync_current_directory()
+    text = (data or {}).get('q', '')
+    limit = min(int(data.get('limit', TOP_K)), TOP_K) if data else TOP_K
+    emit('completions', {
+        "query": text,
+        "request_id": data.get('request_id') if data else None,
+        "completions": completion_engine.complete(text, current_directory, limit)
+    })
+
+
+@socketio.on('search_files')
+def handle_ws_search(data):
+    """Stream file search matches to the requesting client as they are found"""
+    filename = (data or {}).get('filename', '').strip()
+    search_id = data.get('search_id') if data else None
+    if not filename:
+        emit('error', {"error": "No filename provided", "search_id": search_id})
+        return
+    
+    sid = request.sid
+    sync_current_directory()
+    start_dir = data.get('start_dir', current_directory)
+    mode = data.get('mode', 'auto')
+    limit = min(int(data.get('limit', 10)), 100)
+    
+    def run_search():
+        started = time.monotonic()
+        results = command_processor.search_file_system(
+            filename, start_dir, mode,
+            on_match=lambda path: socketio.emit('search_match', {"search_id": search_id, "path": path}, to=sid),
+            limit=limit
+        )
+        socketio.emit('search_complete', {
+            "search_id": search_id,
+            "search_term": filename,
+            "results": results,
+            "count": len(results),
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 1)
+        }, to=sid)
+    
+    socketio.start_background_task(run_search)
+
+
+@socketio.on('follow')
+def handle_ws_follow(data):
+    """Start streaming bytes appended to a file (tail -f) to this client"""
+    path = (data or {}).get('path', '').strip()
+    if not path:
+        emit('follow_error', {"error": "No path provided"})
+        return
+    
+    sync_current_directory()
+    try:
+        full_path = log_follower.resolve(path, current_directory)
+        started = log_follower.follow(full_path, request.sid, backlog=int(data.get('backlog', 4096)))
+    except FollowError as e:
+        emit('follow_error', {"path": path, "error": str(e), "status": e.status})
+        return
+    
+    join_room(f"follow:{full_path}")
+    emit('follow_started', started)
+
+
+@socketio.on('unfollow')
+def handle_ws_unfollow(data):
+    """Stop streaming a followed file to this client"""
+    path = (data or {}).get('path', '').strip()
+    if not path:
+        emit('follow_error', {"error": "No path provided"})
+        return
+    
+    sync_current_directory()
+    try:
+        full_path = log_follower.resolve(path, current_directory)
+    except FollowError as e:
+        if e.status != 404:
+            emit('follow_error', {"path": path, "error": str(e), "status": e.status})
+            return
+        # The file may be gone while its stream is still open; stop that stream anyway
+        full_path = os.path.realpath(os.path.join(current_directory, os.path.expanduser(path)))
+    
+    leave_room(f"follow:{full_path}")
+    log_follower.unfollow(full_path, request.sid)
+    emit('follow_stopped', {"path": full_path})
+
+
 @socketio.on('execute_command')
 def handle_ws_command(data):
-    """Handle command execution via WebSocket"""
+    """Handle command execution via WebSocket, streaming output as command_output events"""
     user_input = data.get('command', '').strip()
     is_voice = data.get('is_voice', False)
+    request_id = data.get('request_id')
+    prefer_mini_bash = data.get('preferred_executor', 'mini-bash') == 'mini-bash'
+    session_id = data.get('session_id') or request.args.get('session_id')
+    sid = request.sid
     
     if not user_input:
-        emit('error', {"error": "No command provided"})
+        emit('error', {"error": "No command provided", "request_id": request_id})
+        return
+    
+    emit('command_result', {"status": "processing", "command": user_input, "request_id": request_id})
+    sync_current_directory()
+    root = start_command_trace(user_input, is_voice, data)
+    with tracer.activate(root):
+        ai_result, early = prepare_command(user_input)
+    if early:
+        finish_command_trace(root, early[0])
+        emit('command_result', {**early[0], "status": "done", "request_id": request_id})
+        return
+    command = ai_result["command"]
+    
+    def complete(result: Dict) -> None:
+        with tracer.activate(root):
+            history_id = record_execution(user_input, is_voice, ai_result, result, session_id, prefer_mini_bash)
+            response = execution_response(ai_result, result, history_id)
+            with span('emit_result'):
+                socketio.emit('command_result', {**response, "status": "done", "request_id": request_id}, to=sid)
+        finish_command_trace(root, response, history_id)
+    
+    result = prefetched_result(command, prefer_mini_bash)
+    if result is not None:
+        complete(result)
         return
     
-    # Process command (same as REST API)
-    # ... (similar logic to execute_command endpoint)
-    emit('command_result', {"status": "processing", "command": user_input})
+    # Output is emitted from a background task; the executor loop only queues it
+    relay = OutputRelay(
+        lambda stream, text: socketio.emit('command_output', {"request_id": request_id, "stream": stream, "data": text}, to=sid),
+        socketio.start_background_task)
+    
+    def finish(future) -> None:
+        try:
+            result = future.result()
+        except Exception as e:
+            result = {"success": False, "output": "", "error": str(e), "executor": "none"}
+        relay.close()
+        complete(result)
+    
+    # Returns straight away; the process runs on the executor loop and reports back to this client
+    with tracer.activate(root):
+        future = command_processor.engine.submit(
+            command_processor.run_command(command, prefer_mini_bash, on_output=relay.push))
+    # Recording touches SQLite and the bus, so keep it off the executor loop
+    future.add_done_callback(lambda f: socketio.start_background_task(finish, f))
+
+
+STARTUP = {"import_seconds": round(time.perf_counter() - IMPORT_STARTED, 3), "first_health_seconds": None}
 
 
 if __name__ == '__main__':
+    model.warm()
     print("\n" + "="*60)
     print("🚀 AI-Powered Terminal Backend Starting...")
     print("="*60)
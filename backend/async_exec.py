@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Async Exec
+One asyncio event loop running every command subprocess, with non-blocking
+pipe readers, output caps and timeouts that kill the whole process group
+"""
+
+import asyncio
+import codecs
+import contextvars
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Coroutine, Dict, List, Optional
+
+
+MAX_OUTPUT = 4 * 1024 * 1024  # bytes kept per stream; anything beyond is read and dropped
+READ_CHUNK = 64 * 1024
+
+
+async def _in_context(context: contextvars.Context, coro: Coroutine):
+    # Each task runs in its own context copy, so these sets stay local to this task
+    for var, value in context.items():
+        var.set(value)
+    return await coro
+
+
+class AsyncExecutor:
+    """Runs subprocesses on a dedicated event loop; callers get futures or block on run()"""
+
+    def __init__(self, max_concurrent: int = 256, max_output: int = MAX_OUTPUT):
+        self.max_concurrent = max_concurrent
+        self.max_output = max_output
+        self.loop = asyncio.new_event_loop()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.stats = {"running": 0, "peak": 0, "queued": 0, "completed": 0, "timeouts": 0, "errors": 0}
+        threading.Thread(target=self._run_loop, name="async-exec", daemon=True).start()
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule coro on the executor loop from any thread, seeing the caller's context variables"""
+        return asyncio.run_coroutine_threadsafe(_in_context(contextvars.copy_context(), coro), self.loop)
+
+    def run(self, coro: Coroutine):
+        """Run coro on the executor loop and wait for its result"""
+        return self.submit(coro).result()
+
+    async def run_process(self, argv: Optional[List[str]] = None, shell: Optional[str] = None,
+                          input: Optional[str] = None, cwd: Optional[str] = None, timeout: float = 30.0,
+                          on_output: Optional[Callable[[str, str], None]] = None) -> Dict:
+        """Run argv, or a shell command line, and collect stdout/stderr as text.
+
+        on_output(stream, text) is called with each chunk as it arrives.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        self.stats["queued"] += 1
+        async with self._slots:
+            self.stats["queued"] -= 1
+            self.stats["running"] += 1
+            self.stats["peak"] = max(self.stats["peak"], self.stats["running"])
+            try:
+                return await self._run(argv, shell, input, cwd, timeout, on_output)
+            finally:
+                self.stats["running"] -= 1
+
+    async def _run(self, argv, shell, input, cwd, timeout, on_output) -> Dict:
+        start = time.monotonic()
+        options = {
+            "stdin": asyncio.subprocess.PIPE if input is not None else asyncio.subprocess.DEVNULL,
+            "stdout": asyncio.subprocess.PIPE,
+            "stderr": asyncio.subprocess.PIPE,
+            "cwd": cwd,
+            # Own process group, so a timeout can kill everything the command started
+            "start_new_session": True
+        }
+        if shell is not None:
+            process = await asyncio.create_subprocess_shell(shell, **options)
+        else:
+            process = await asyncio.create_subprocess_exec(*argv, **options)
+
+        output = {"stdout": [], "stderr": []}
+        truncated = False
+
+        async def pump(stream: asyncio.StreamReader, name: str) -> None:
+            nonlocal truncated
+            kept = 0
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            while True:
+                chunk = await stream.read(READ_CHUNK)
+                if not chunk:
+                    break
+                if kept < self.max_output:
+                    output[name].append(chunk[:self.max_output - kept])
+                    kept += len(chunk)
+                if kept > self.max_output:
+                    truncated = True
+                if on_output:
+                    text = decoder.decode(chunk)
+                    if text:
+                        on_output(name, text)
+
+        async def feed() -> None:
+            if input is None:
+                return
+            try:
+                process.stdin.write(input.encode("utf-8"))
+                await process.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                process.stdin.close()
+
+        timed_out = False
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(feed(), pump(process.stdout, "stdout"), pump(process.stderr, "stderr"), process.wait()),
+                timeout
+            )
+        except asyncio.TimeoutError:
+            timed_out = True
+            self.stats["timeouts"] += 1
+            self._kill(process)
+            await process.wait()
+        except Exception:
+            self.stats["errors"] += 1
+            self._kill(process)
+            await process.wait()
+            raise
+
+        self.stats["completed"] += 1
+        return {
+            "returncode": process.returncode,
+            "stdout": b"".join(output["stdout"]).decode("utf-8", errors="replace"),
+            "stderr": b"".join(output["stderr"]).decode("utf-8", errors="replace"),
+            "timed_out": timed_out,
+            "truncated": truncated,
+            "elapsed": time.monotonic() - start
+        }
+
+    @staticmethod
+    def _kill(process: asyncio.subprocess.Process) -> None:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "max_concurrent": self.max_concurrent}
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Load Benchmark
+Drives /api/execute (or the execute_command Socket.IO event) with concurrent
+synthetic load or a replayed history, against a backend started here with a
+stub Gemini model and stub or real executors. Reports throughput and
+p50/p95/p99 end to end and per stage (from the backend's traces), and
+compares against a stored baseline.
+
+    python bench_load.py --concurrency 16 --duration 30 --executor stub
+    python bench_load.py --replay history.db --speed 10 --executor mini-bash
+    python bench_load.py --transport socketio --output run.json --baseline baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import queue
+import random
+import re
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+# bench_stats lives at the repository root with the other benchmarks; appended so it never shadows backend modules
+sys.path.append(os.path.dirname(BACKEND_DIR))
+
+from bench_stats import distribution, latency_regressions, rate_regression
+
+# Natural-language and direct inputs in roughly the mix the UI sees
+DEFAULT_WORKLOAD = [
+    "list files", "show files", "where am i", "current directory", "show disk usage",
+    "ls -la", "pwd", "echo hello", "whoami", "date", "git status", "ls", "uname -a",
+    "show running processes", "check memory usage",
+]
+
+
+# ----------------------------------------------------------------------
+# Server side: the backend with stubs, run in a child process
+# ----------------------------------------------------------------------
+
+class StubResponse:
+    def __init__(self, text: str):
+        self.text = text
+        self.usage_metadata = None
+
+
+class StubModel:
+    """Answers like Gemini after a simulated delay, using the backend's own fallback mapping"""
+
+    def __init__(self, latency: float, jitter: float, mapper):
+        self.latency = latency
+        self.jitter = jitter
+        self.mapper = mapper
+
+    def __bool__(self) -> bool:
+        return True
+
+    def generate_content(self, prompt: str) -> StubResponse:
+        # The request is the last 'Request: "..."' line; earlier ones are few-shot examples
+        requests_seen = re.findall(r'Request: "(.*)"', prompt)
+        text = requests_seen[-1] if requests_seen else ""
+        if self.latency > 0:
+            time.sleep(max(0.0, random.lognormvariate(math.log(self.latency), self.jitter)) if self.jitter else self.latency)
+        mapped = self.mapper(text)
+        return StubResponse(json.dumps({
+            "command": mapped["command"],
+            "explanation": "stub model",
+            "confidence": 0.9,
+            "needs_file_search": False
+        }))
+
+
+def stub_executor(latency: float):
+    """Replacement for AsyncExecutor.run_process that sleeps instead of forking"""
+    async def run_process(argv=None, shell=None, input=None, cwd=None, timeout=30.0, on_output=None):
+        start = time.monotonic()
+        await asyncio.sleep(latency)
+        output = f"stub output for {shell or input or argv}\n"
+        if on_output:
+            on_output("stdout", output)
+        return {"returncode": 0, "stdout": output, "stderr": "", "timed_out": False,
+                "truncated": False, "elapsed": time.monotonic() - start}
+    return run_process
+
+
+def serve(args: argparse.Namespace) -> None:
+    from werkzeug.serving import make_server
+    import app
+
+    if args.gemini_ms >= 0:
+        app.model = StubModel(args.gemini_ms / 1000, args.gemini_jitter, app.command_processor._fallback_command_mapping)
+    if args.executor == "stub":
+        app.command_processor.engine.run_process = stub_executor(args.executor_ms / 1000)
+    elif args.executor == "mini-bash" and not app.command_processor.mini_bash_available:
+        print("❌ mini-bash not built; run make in the repository root", file=sys.stderr)
+        sys.exit(2)
+
+    server = make_server("127.0.0.1", args.port, app.app, threaded=True)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    print("READY", flush=True)
+    server.serve_forever()
+    app.tracer.sink.flush()
+
+
+def start_server(args: argparse.Namespace, workdir: str) -> Tuple[subprocess.Popen, str, str]:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    trace_file = os.path.join(workdir, "traces.jsonl")
+    env = {**os.environ,
+           "HISTORY_DB": os.path.join(workdir, "history.db"),
+           "TRACE_FILE": trace_file,
+           "TRACE_SAMPLE_RATE": "1",
+           "FILE_INDEX_ENABLED": "false",
+           "PREFETCH_ENABLED": "false",
+           "MEMORY_SAMPLE_SECONDS": "0",
+           "PROMPT_EXAMPLES_FILE": os.path.join(workdir, "examples.json")}
+    env.pop("NLSHELL_BUS", None)
+    command = [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port),
+               "--executor", args.executor, "--executor-ms", str(args.executor_ms),
+               "--gemini-ms", str(args.gemini_ms), "--gemini-jitter", str(args.gemini_jitter)]
+    log = open(os.path.join(workdir, "server.log"), "w")
+    proc = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.PIPE, stderr=log, text=True)
+    deadline = time.monotonic() + 60
+    for line in proc.stdout:
+        if line.strip() == "READY":
+            break
+        log.write(line)
+        if time.monotonic() > deadline:
+            break
+    if proc.poll() is not None:
+        raise RuntimeError(f"backend failed to start, see {log.name}")
+    # Keep draining the backend's console output so it never blocks on a full pipe
+    threading.Thread(target=lambda: [log.write(l) for l in proc.stdout], daemon=True).start()
+    return proc, f"http://127.0.0.1:{port}", trace_file
+
+
+# ----------------------------------------------------------------------
+# Workloads
+# ----------------------------------------------------------------------
+
+def load_replay(path: str) -> List[Tuple[float, str]]:
+    """(seconds since first, input) from a history database or a JSONL log (traces or history entries)"""
+    items = []
+    if path.endswith(".db"):
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        for timestamp, user_input in conn.execute("SELECT timestamp, user_input FROM history ORDER BY id"):
+            items.append((datetime.fromisoformat(timestamp).timestamp(), user_input))
+        conn.close()
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                text = record.get("user_input") or record.get("attributes", {}).get("input")
+                when = record.get("start") or record.get("timestamp")
+                if isinstance(when, str):
+                    when = datetime.fromisoformat(when).timestamp()
+                if text:
+                    items.append((float(when or 0), text))
+    if not items:
+        raise SystemExit(f"No commands found in {path}")
+    first = items[0][0]
+    return [(max(0.0, t - first), text) for t, text in items]
+
+
+# ----------------------------------------------------------------------
+# Load generation
+# ----------------------------------------------------------------------
+
+class HttpClient:
+    def __init__(self, url: str, executor: str):
+        self.session = requests.Session()
+        self.url = url + "/api/execute"
+        self.preferred = "system-terminal" if executor == "system" else "mini-bash"
+
+    def execute(self, text: str) -> bool:
+        response = self.session.post(self.url, json={"command": text, "preferred_executor": self.preferred}, timeout=60)
+        return response.status_code == 200
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class SocketClient:
+    """One Socket.IO connection; execute() waits for the final command_result"""
+
+    def __init__(self, url: str, executor: str):
+        import socketio
+        try:
+            import websocket  # noqa: F401  (websocket-client enables the WebSocket transport)
+            transports = ["websocket"]
+        except ImportError:
+            transports = ["polling"]
+        self.preferred = "system-terminal" if executor == "system" else "mini-bash"
+        self.client = socketio.Client()
+        self._waiting: Dict[str, threading.Event] = {}
+        self._ok: Dict[str, bool] = {}
+        self._counter = 0
+
+        @self.client.on("command_result")
+        def on_result(data):
+            if data.get("status") != "done":
+                return
+            request_id = data.get("request_id")
+            if request_id in self._waiting:
+                # A failed command is still a served request; only transport/handler errors count
+                self._ok[request_id] = "success" in data
+                self._waiting[request_id].set()
+
+        self.client.connect(url, transports=transports)
+
+    def execute(self, text: str) -> bool:
+        self._counter += 1
+        request_id = f"{threading.get_ident()}-{self._counter}"
+        done = self._waiting[request_id] = threading.Event()
+        self.client.emit("execute_command", {"command": text, "request_id": request_id,
+                                             "preferred_executor": self.preferred})
+        finished = done.wait(60)
+        del self._waiting[request_id]
+        return finished and self._ok.pop(request_id, False)
+
+    def close(self) -> None:
+        self.client.disconnect()
+
+
+def run_load(args: argparse.Namespace, url: str) -> Dict:
+    """Closed loop (each worker sends its next request when the last returns) unless replaying with --speed"""
+    jobs: queue.Queue = queue.Queue()  # (scheduled, text) jobs; None stops a worker
+    results: List[Tuple[float, float, bool]] = []  # (completed at, latency, ok)
+    lock = threading.Lock()
+    client_class = SocketClient if args.transport == "socketio" else HttpClient
+    clients = [client_class(url, args.executor) for _ in range(args.concurrency)]
+
+    def worker(client) -> None:
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            scheduled, text = job
+            # Latency counts from the scheduled send time, so a backed-up server can't hide its queueing
+            start = scheduled if scheduled else time.perf_counter()
+            try:
+                ok = client.execute(text)
+            except Exception:
+                ok = False
+            end = time.perf_counter()
+            with lock:
+                results.append((end, end - start, ok))
+
+    threads = [threading.Thread(target=worker, args=(c,), daemon=True) for c in clients]
+    for t in threads:
+        t.start()
+
+    workload = load_replay(args.replay) if args.replay else None
+    warmup_texts = [t for _, t in workload] if workload else DEFAULT_WORKLOAD
+    for i in range(args.warmup):
+        jobs.put((0.0, warmup_texts[i % len(warmup_texts)]))
+    while len(results) < args.warmup:
+        time.sleep(0.01)
+    with lock:
+        results.clear()
+
+    wall_start = time.time()
+    started = time.perf_counter()
+    sent = 0
+    if workload and args.speed > 0:
+        for offset, text in workload:
+            due = started + offset / args.speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            jobs.put((due, text))
+            sent += 1
+    else:
+        texts = [t for _, t in workload] if workload else None
+        deadline = started + args.duration
+        while time.perf_counter() < deadline and (args.requests is None or sent < args.requests):
+            if texts is not None and sent >= len(texts):
+                break
+            # Keep the queue short so the closed loop stays closed
+            if jobs.qsize() >= args.concurrency:
+                time.sleep(0.001)
+                continue
+            text = texts[sent] if texts is not None else random.choice(DEFAULT_WORKLOAD)
+            jobs.put((0.0, text))
+            sent += 1
+
+    for _ in threads:
+        jobs.put(None)
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+    latencies = [latency for _, latency, _ in results]
+    errors = sum(1 for _, _, ok in results if not ok)
+    return {
+        "wall_start": wall_start,
+        "requests": len(results),
+        "errors": errors,
+        "elapsed": round(elapsed, 3),
+        "throughput": round(len(results) / elapsed, 2) if elapsed else 0.0,
+        "latency": distribution(latencies)
+    }
+
+
+# ----------------------------------------------------------------------
+# Reporting
+# ----------------------------------------------------------------------
+
+def stage_breakdown(trace_file: str, since: float) -> Dict[str, Dict[str, float]]:
+    """Per-stage latency from the backend's traces: span durations summed per request"""
+    stages: Dict[str, List[float]] = {}
+    if not os.path.exists(trace_file):
+        return {}
+    with open(trace_file, encoding="utf-8") as f:
+        for line in f:
+            try:
+                trace = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if trace["start"] < since:
+                continue  # warm-up
+            stages.setdefault("server_total", []).append(trace["duration_ms"] / 1000)
+            per_request: Dict[str, float] = {}
+            for span in trace["spans"]:
+                if span["parent_id"] is None or span["duration_ms"] is None:
+                    continue
+                per_request[span["name"]] = per_request.get(span["name"], 0.0) + span["duration_ms"] / 1000
+            for name, seconds in per_request.items():
+                stages.setdefault(name, []).append(seconds)
+    return {name: distribution(samples) for name, samples in sorted(stages.items())}
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float, floor_ms: float) -> List[str]:
+    """Human-readable regressions: slower percentiles or lower throughput beyond tolerance"""
+    regressions = []
+    dropped = rate_regression("requests", report["throughput"], baseline["throughput"], tolerance, "req/s")
+    if dropped:
+        regressions.append(dropped)
+    regressions += latency_regressions("end_to_end", report["latency"], baseline["latency"], tolerance, floor_ms)
+    for name, stats in report.get("stages", {}).items():
+        regressions += latency_regressions(name, stats, baseline.get("stages", {}).get(name), tolerance, floor_ms)
+    return regressions
+
+
+def print_report(report: Dict) -> None:
+    config = report["config"]
+    print("\n" + "="*72)
+    print(f"🏋️  {config['transport']} load: concurrency {config['concurrency']}, executor {config['executor']}, "
+          f"gemini stub {config['gemini_ms']} ms")
+    print("="*72)
+    print(f"requests {report['requests']}  errors {report['errors']}  "
+          f"elapsed {report['elapsed']}s  throughput {report['throughput']} req/s")
+    print(f"\n{'stage':<22}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)")
+    rows = [("end_to_end (client)", report["latency"])] + list(report.get("stages", {}).items())
+    for name, stats in rows:
+        if stats.get("count"):
+            print(f"{name:<22}{stats['count']:>8}{stats['p50']:>10.2f}{stats['p95']:>10.2f}"
+                  f"{stats['p99']:>10.2f}{stats['max']:>10.2f}")
+    print("="*72 + "\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test the backend and report per-stage latency")
+    parser.add_argument("--url", help="benchmark a running backend instead of starting one (no stage breakdown)")
+    parser.add_argument("--transport", choices=["http", "socketio"], default="http")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of closed-loop load")
+    parser.add_argument("--requests", type=int, help="stop after this many requests")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--replay", help="history.db or JSONL log whose inputs are replayed in order")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="replay at N× the recorded pace (open loop); 0 sends as fast as workers allow")
+    parser.add_argument("--executor", choices=["stub", "mini-bash", "system"], default="stub")
+    parser.add_argument("--executor-ms", type=float, default=5.0, help="stub executor latency")
+    parser.add_argument("--gemini-ms", type=float, default=300.0, help="stub model latency; -1 disables the model")
+    parser.add_argument("--gemini-jitter", type=float, default=0.3, help="lognormal sigma of the stub latency")
+    parser.add_argument("--output", help="write the report as JSON")
+    parser.add_argument("--baseline", help="compare against a report saved with --output")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative slowdown")
+    parser.add_argument("--floor-ms", type=float, default=1.0, help="ignore latency changes smaller than this")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    with tempfile.TemporaryDirectory(prefix="nlshell-bench-") as workdir:
+        proc = trace_file = None
+        url = args.url
+        if not url:
+            proc, url, trace_file = start_server(args, workdir)
+        try:
+            report = run_load(args, url)
+        finally:
+            if proc:
+                proc.terminate()  # the backend flushes its traces before exiting
+                try:
+                    proc.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+        report["stages"] = stage_breakdown(trace_file, report.pop("wall_start")) if trace_file else {}
+        report.pop("wall_start", None)
+
+    report["config"] = {k: getattr(args, k) for k in ("transport", "concurrency", "duration", "requests",
+                                                        "replay", "speed", "executor", "executor_ms",
+                                                        "gemini_ms", "gemini_jitter")}
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        differing = [k for k, v in report["config"].items()
+                     if k not in ("duration", "requests") and baseline.get("config", {}).get(k) != v]
+        if differing:
+            print(f"⚠️  Baseline was recorded with different settings: {', '.join(differing)}")
+        regressions = compare(report, baseline, args.tolerance, args.floor_ms)
+        if regressions:
+            print("❌ Regressions against baseline:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print("✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
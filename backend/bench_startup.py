@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+Cold-starts the backend in fresh interpreters and reports import cost per
+module and time to the first /api/health answer
+
+    python bench_startup.py [--runs 5] [--top 15] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Runs inside the child: import the app, answer one health check, report what the app measured
+HEALTH_PROBE = """
+import json, app
+health = app.app.test_client().get('/api/health').get_json()
+print('STARTUP ' + json.dumps(health['startup']))
+"""
+
+
+def child_env(history_db: str) -> Dict[str, str]:
+    """Keep background work that isn't part of startup (indexing, prefetch) out of the measurement"""
+    return {**os.environ, "HISTORY_DB": history_db, "FILE_INDEX_ENABLED": "false",
+            "PREFETCH_ENABLED": "false", "PYTHONDONTWRITEBYTECODE": "1"}
+
+
+def import_profile(env: Dict[str, str]) -> Dict[str, float]:
+    """Cumulative import seconds of each module app.py imports directly, from -X importtime"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"],
+                          cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120)
+    costs, children = {}, {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # header row
+        # Children are printed before their parent; app's direct imports sit one level below it
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        if depth == 1:
+            children[name.strip()] = int(cumulative) / 1e6
+        elif depth == 0:
+            if name.strip() == "app":
+                costs = {**children, "app": int(cumulative) / 1e6}
+            children = {}
+    return costs
+
+
+def health_run(env: Dict[str, str]) -> Dict[str, float]:
+    """Wall time from spawning the interpreter to the first health answer"""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", HEALTH_PROBE], cwd=BACKEND_DIR, env=env,
+                          capture_output=True, text=True, timeout=120)
+    wall = time.perf_counter() - start
+    for line in proc.stdout.splitlines():
+        if line.startswith("STARTUP "):
+            return {"process_to_health": wall, **json.loads(line[len("STARTUP "):])}
+    raise RuntimeError(f"health probe failed:\n{proc.stderr[-2000:]}")
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {"median": round(statistics.median(samples), 4), "min": round(min(samples), 4),
+            "max": round(max(samples), 4)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure backend cold-start cost")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="modules to list by import cost")
+    parser.add_argument("--json", action="store_true", help="print one JSON document for tracking")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = child_env(os.path.join(tmp, "history.db"))
+        profiles = [import_profile(env) for _ in range(args.runs)]
+        health = [health_run(env) for _ in range(args.runs)]
+
+    modules = {}
+    for name in profiles[0]:
+        modules[name] = statistics.median(p.get(name, 0.0) for p in profiles)
+    ranked = sorted(((name, cost) for name, cost in modules.items() if name != "app"),
+                    key=lambda item: item[1], reverse=True)[:args.top]
+
+    report = {
+        "runs": args.runs,
+        "import_app": summarize([p.get("app", 0.0) for p in profiles]),
+        "process_to_health": summarize([h["process_to_health"] for h in health]),
+        "import_seconds": summarize([h["import_seconds"] for h in health]),
+        "first_health_seconds": summarize([h["first_health_seconds"] for h in health]),
+        "modules": [{"module": name, "seconds": round(cost, 4)} for name, cost in ranked]
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print("\n" + "="*60)
+    print(f"⏱️  Backend startup ({args.runs} cold runs, medians)")
+    print("="*60)
+    print(f"import app:                 {report['import_app']['median']*1000:8.1f} ms")
+    print(f"app import (self-reported): {report['import_seconds']['median']*1000:8.1f} ms")
+    print(f"first health check:         {report['first_health_seconds']['median']*1000:8.1f} ms")
+    print(f"process start → health:     {report['process_to_health']['median']*1000:8.1f} ms")
+    print("-"*60)
+    for item in report["modules"]:
+        print(f"{item['seconds']*1000:8.1f} ms  {item['module']}")
+    print("="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
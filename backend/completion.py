@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Completion
+Prefix tries over PATH executables, cwd entries and history, ranked by frecency
+"""
+
+import math
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+# Completions cached per trie node; also the most a caller can ask for
+TOP_K = 8
+
+# Frecency doubles in weight every HALF_LIFE seconds of wall time, so recent use wins
+HALF_LIFE = 3 * 24 * 3600.0
+
+# Never-used entries rank below anything used, shorter names first
+UNUSED_BASE = -1.0e6
+
+
+def _log_add(a: float, b: float) -> float:
+    """log(exp(a) + exp(b)) without overflow"""
+    if a < b:
+        a, b = b, a
+    if b == -math.inf:
+        return a
+    return a + math.log1p(math.exp(b - a))
+
+
+class _Node:
+    __slots__ = ("children", "score", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.score: Optional[float] = None
+        self.top: List[Tuple[float, str]] = []
+
+
+class PrefixTrie:
+    """Trie whose nodes cache the best TOP_K completions below them"""
+
+    def __init__(self):
+        self.root = _Node()
+        self.words: Set[str] = set()
+
+    def _path(self, word: str, create: bool) -> Optional[List[_Node]]:
+        node = self.root
+        path = [node]
+        for char in word:
+            child = node.children.get(char)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[char] = _Node()
+            node = child
+            path.append(node)
+        return path
+
+    def set(self, word: str, score: float) -> None:
+        """Insert word or raise its score; scores must not decrease (use remove first)"""
+        path = self._path(word, create=True)
+        self.words.add(word)
+        path[-1].score = score
+        for node in path:
+            top = [entry for entry in node.top if entry[1] != word]
+            if len(top) < TOP_K or score > top[-1][0]:
+                top.append((score, word))
+                top.sort(key=lambda entry: (-entry[0], entry[1]))
+                del top[TOP_K:]
+            node.top = top
+
+    def remove(self, word: str) -> None:
+        path = self._path(word, create=False)
+        if not path or path[-1].score is None:
+            return
+        path[-1].score = None
+        self.words.discard(word)
+        # Recompute cached tops bottom-up and prune empty branches
+        for depth in range(len(path) - 1, -1, -1):
+            node = path[depth]
+            candidates = [(node.score, word[:depth])] if node.score is not None else []
+            for child in node.children.values():
+                candidates.extend(child.top)
+            candidates.sort(key=lambda entry: (-entry[0], entry[1]))
+            node.top = candidates[:TOP_K]
+            if depth and not node.children and node.score is None:
+                del path[depth - 1].children[word[depth - 1]]
+
+    def score_of(self, word: str) -> Optional[float]:
+        path = self._path(word, create=False)
+        return path[-1].score if path else None
+
+    def complete(self, prefix: str, limit: int = TOP_K) -> List[Tuple[float, str]]:
+        path = self._path(prefix, create=False)
+        if not path:
+            return []
+        return path[-1].top[:limit]
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.words
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+
+def _unused_score(word: str) -> float:
+    return UNUSED_BASE - len(word)
+
+
+class CompletionEngine:
+    """Keeps the tries current and merges their suggestions"""
+
+    def __init__(self, path_check_interval: float = 30.0):
+        self.path_check_interval = path_check_interval
+        self.executables = PrefixTrie()
+        self.history = PrefixTrie()
+        self.entries = PrefixTrie()
+        self._path_value = None
+        self._path_mtimes: Dict[str, float] = {}
+        self._last_path_check = 0.0
+        self._entries_dir = None
+        self._entries_mtime = None
+        self._usage: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Incremental maintenance
+    # ------------------------------------------------------------------
+
+    def _frecency(self, word: str) -> float:
+        return self._usage.get(word, _unused_score(word))
+
+    def _sync(self, trie: PrefixTrie, wanted: set) -> None:
+        """Apply only the differences between trie contents and wanted"""
+        for word in trie.words - wanted:
+            trie.remove(word)
+        for word in wanted - trie.words:
+            trie.set(word, self._frecency(word))
+
+    def _refresh_executables(self) -> None:
+        now = time.monotonic()
+        path_value = os.environ.get("PATH", "")
+        if path_value == self._path_value and now - self._last_path_check < self.path_check_interval:
+            return
+        self._last_path_check = now
+
+        directories = [d for d in path_value.split(os.pathsep) if d]
+        mtimes = {}
+        for directory in directories:
+            try:
+                mtimes[directory] = os.stat(directory).st_mtime
+            except OSError:
+                continue
+        if path_value == self._path_value and mtimes == self._path_mtimes:
+            return
+
+        names = set()
+        for directory in mtimes:
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.is_file() and os.access(entry.path, os.X_OK):
+                            names.add(entry.name)
+            except OSError:
+                continue
+        self._sync(self.executables, names)
+        self._path_value = path_value
+        self._path_mtimes = mtimes
+
+    def _refresh_entries(self, directory: str) -> None:
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return
+        if directory == self._entries_dir and mtime == self._entries_mtime:
+            return
+
+        names = set()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        names.add(entry.name + ("/" if entry.is_dir() else ""))
+                    except OSError:
+                        names.add(entry.name)
+        except OSError:
+            pass
+        if directory != self._entries_dir:
+            self.entries = PrefixTrie()
+        self._sync(self.entries, names)
+        self._entries_dir = directory
+        self._entries_mtime = mtime
+
+    def warm(self, directory: str) -> None:
+        with self._lock:
+            self._refresh_executables()
+            self._refresh_entries(directory)
+
+    def seed(self, commands: Iterable[Tuple[str, Optional[float]]]) -> int:
+        """Replay (command, epoch seconds) pairs from persisted history; returns how many"""
+        count = 0
+        for command, timestamp in commands:
+            self.record(command, timestamp)
+            count += 1
+        return count
+
+    def record(self, command: str, timestamp: Optional[float] = None) -> None:
+        """Bump frecency for an executed command, its executable and its arguments"""
+        command = " ".join(command.split())
+        if not command:
+            return
+        weight = (timestamp or time.time()) / HALF_LIFE * math.log(2)
+        words = command.split()
+        with self._lock:
+            for word in [command, words[0]] + words[1:]:
+                previous = self._usage.get(word, -math.inf)
+                self._usage[word] = _log_add(previous, weight)
+
+            self.history.set(command, self._usage[command])
+            if words[0] in self.executables:
+                self.executables.set(words[0], self._usage[words[0]])
+            for word in words[1:]:
+                for name in (word, word.rstrip("/") + "/"):
+                    if name in self.entries:
+                        self.entries.set(name, self._usage.get(word, self._frecency(name)))
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def complete(self, text: str, directory: str, limit: int = TOP_K) -> List[Dict]:
+        # Nodes only cache TOP_K entries, so a larger limit could not be honoured
+        limit = min(limit, TOP_K)
+        with self._lock:
+            self._refresh_executables()
+            self._refresh_entries(directory)
+
+            candidates = [(score, line, "history") for score, line in self.history.complete(text, limit)]
+            if " " not in text.strip() and not text.endswith(" "):
+                candidates += [(score, name, "command") for score, name in self.executables.complete(text, limit)]
+            else:
+                head, _, last = text.rpartition(" ")
+                candidates += [(score, f"{head} {name}", "file") for score, name in self.entries.complete(last, limit)]
+
+        candidates.sort(key=lambda c: (-c[0], c[1]))
+        seen = set()
+        results = []
+        for score, value, kind in candidates:
+            if value in seen or value == text:
+                continue
+            seen.add(value)
+            results.append({"text": value, "type": kind, "used": score > UNUSED_BASE / 2})
+            if len(results) >= limit:
+                break
+        return results
+
+    def get_stats(self) -> Dict:
+        return {"executables": len(self.executables), "history": len(self.history),
+                "entries": len(self.entries), "entries_directory": self._entries_dir}
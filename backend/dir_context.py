@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Directory Context
+Compact, cached snapshot of the current directory for the Gemini prompt
+"""
+
+import os
+import shlex
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class DirectoryContext:
+    """Caches a size-bounded listing per directory, refreshed when the directory changes"""
+
+    def __init__(self, char_budget: int = 1200, max_entries: int = 200,
+                 recent_capacity: int = 20, cache_size: int = 32):
+        self.char_budget = char_budget
+        self.max_entries = max_entries
+        self.recent_capacity = recent_capacity
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "snapshots_built": 0,
+            "cache_hits": 0,
+            "searches_avoided": 0,
+            "resolved_in_prompt": 0,
+            "searches_performed": 0
+        }
+
+    def _scan(self, path: str, mtime_ns: int) -> Dict:
+        entries = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.name.startswith('.'):
+                        continue
+                    try:
+                        is_dir = entry.is_dir()
+                        modified = entry.stat().st_mtime
+                    except OSError:
+                        continue
+                    entries.append((modified, entry.name + ("/" if is_dir else "")))
+        except OSError:
+            pass
+
+        # Most recently modified entries first, so they survive the budget cut
+        entries.sort(reverse=True)
+        names = [name for _, name in entries[:self.max_entries]]
+        self.stats["snapshots_built"] += 1
+        return {"mtime_ns": mtime_ns, "names": names, "name_set": {n.rstrip("/") for n in names}}
+
+    def _snapshot(self, path: str) -> Optional[Dict]:
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+        with self._lock:
+            cached = self._cache.get(path)
+            if cached and cached["mtime_ns"] == mtime_ns:
+                self._cache.move_to_end(path)
+                self.stats["cache_hits"] += 1
+                return cached
+
+            snapshot = self._scan(path, mtime_ns)
+            self._cache[path] = snapshot
+            self._cache.move_to_end(path)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return snapshot
+
+    def describe(self, path: str) -> str:
+        """Prompt text listing recent files and top-level entries, within the budget"""
+        snapshot = self._snapshot(path)
+        if snapshot is None:
+            return ""
+
+        with self._lock:
+            recent = [p for p in reversed(self._recent) if os.path.dirname(p) != path or
+                      os.path.basename(p) in snapshot["name_set"]]
+
+        lines = []
+        used = 0
+        if recent:
+            shown = [os.path.relpath(p, path) if os.path.dirname(p) == path else p for p in recent[:5]]
+            recent_line = "Recently used files: " + ", ".join(shown)
+            lines.append(recent_line)
+            used += len(recent_line)
+
+        listed = []
+        prefix = "Entries here: "
+        used += len(prefix)
+        for name in snapshot["names"]:
+            if used + len(name) + 2 > self.char_budget:
+                break
+            listed.append(name)
+            used += len(name) + 2
+
+        if listed:
+            more = len(snapshot["names"]) - len(listed)
+            lines.append(prefix + ", ".join(listed) + (f" (+{more} more)" if more > 0 else ""))
+        return "\n".join(lines)
+
+    def resolve(self, path: str, name: str) -> Optional[str]:
+        """Return the full path of name if it is a top-level entry of path"""
+        snapshot = self._snapshot(path)
+        if snapshot and name in snapshot["name_set"]:
+            return os.path.join(path, name)
+        return None
+
+    def note_command(self, path: str, command: str) -> None:
+        """Remember files referenced by an executed command"""
+        try:
+            words = shlex.split(command)
+        except ValueError:
+            words = command.split()
+
+        snapshot = self._snapshot(path)
+        names = snapshot["name_set"] if snapshot else set()
+        with self._lock:
+            for word in words[1:]:
+                candidate = os.path.expanduser(word)
+                full = candidate if os.path.isabs(candidate) else os.path.join(path, candidate)
+                if word in names or (os.path.isabs(candidate) and os.path.isfile(candidate)):
+                    self._recent.pop(full, None)
+                    self._recent[full] = None
+            while len(self._recent) > self.recent_capacity:
+                self._recent.popitem(last=False)
+
+    def mentions_entry(self, path: str, command: str) -> bool:
+        """True if command refers to an entry of the cached snapshot"""
+        with self._lock:
+            cached = self._cache.get(path)
+        if not cached:
+            return False
+        return any(word.strip("'\"") in cached["name_set"] for word in command.split()[1:])
+
+    def record(self, stat: str) -> None:
+        with self._lock:
+            self.stats[stat] += 1
+
+    def clear(self) -> int:
+        """Drop cached snapshots (they are rebuilt on demand); returns how many were held"""
+        with self._lock:
+            dropped = len(self._cache)
+            self._cache.clear()
+        return dropped
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self.stats, "cached_directories": len(self._cache),
+                    "recent_files": len(self._recent), "char_budget": self.char_budget}
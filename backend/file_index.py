@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+File Index
+In-memory filename index over configured roots, kept current with inotify
+"""
+
+import bisect
+import fnmatch
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+import inotify
+from file_walker import DEFAULT_IGNORE
+
+WATCH_MASK = (inotify.IN_CREATE | inotify.IN_DELETE | inotify.IN_MOVED_FROM |
+              inotify.IN_MOVED_TO | inotify.IN_DELETE_SELF | inotify.IN_ONLYDIR)
+
+
+class FileIndex:
+    """Maps file names to the directories that contain them"""
+
+    def __init__(self, roots: List[str], max_depth: int = 6, max_entries: int = 500000,
+                 max_watches: int = 8192, ignore: Optional[Iterable[str]] = None,
+                 persist_path: Optional[str] = None, rescan_interval: float = 300.0,
+                 persist_interval: float = 60.0):
+        resolved = sorted({os.path.realpath(os.path.expanduser(r)) for r in roots if os.path.isdir(os.path.expanduser(r))})
+        # Nested roots would be indexed twice
+        self.roots = [r for r in resolved if not any(r != o and r.startswith(o.rstrip(os.sep) + os.sep) for o in resolved)]
+        self.max_depth = max_depth
+        self.max_entries = max_entries
+        self.max_watches = max_watches
+        self.ignore = list(DEFAULT_IGNORE if ignore is None else ignore)
+        # Same rule syntax as the walker: plain names by set lookup, wildcard rules with fnmatch
+        self.ignore_names = {r for r in self.ignore if not any(c in r for c in "*?[")}
+        self.ignore_patterns = [r for r in self.ignore if r not in self.ignore_names]
+        self.persist_path = persist_path
+        self.rescan_interval = rescan_interval
+        self.persist_interval = persist_interval
+
+        # dir -> names inside it; name -> dirs containing it; dir -> depth below its root
+        self.children: Dict[str, Set[str]] = {}
+        self.by_name: Dict[str, Set[str]] = {}
+        self.depth: Dict[str, int] = {}
+        self.entries = 0
+        self.truncated = False
+        self.ready = False
+
+        self._sorted_names: List[str] = []
+        self._names_dirty = True
+        self._watches: Dict[int, str] = {}
+        self._watch_of: Dict[str, int] = {}
+        self._inotify = None
+        self._dirty_since_save = False
+        self._needs_rebuild = False
+        self._loaded_mtime = None
+        self._lock = threading.RLock()
+        self.stats = {"builds": 0, "last_build_seconds": None, "events": 0,
+                      "queries": 0, "query_seconds": 0.0, "loaded_from_disk": False,
+                      "rescans": 0}
+
+    # ------------------------------------------------------------------
+    # Mutation
+    # ------------------------------------------------------------------
+
+    def _ignored(self, name: str) -> bool:
+        return name in self.ignore_names or any(fnmatch.fnmatchcase(name, p) for p in self.ignore_patterns)
+
+    def _add(self, directory: str, name: str) -> None:
+        names = self.children.setdefault(directory, set())
+        if name in names:
+            return
+        names.add(name)
+        self.by_name.setdefault(name, set()).add(directory)
+        self.entries += 1
+        self._names_dirty = True
+        self._dirty_since_save = True
+
+    def _remove(self, directory: str, name: str) -> None:
+        names = self.children.get(directory)
+        if not names or name not in names:
+            return
+        names.discard(name)
+        dirs = self.by_name.get(name)
+        if dirs:
+            dirs.discard(directory)
+            if not dirs:
+                del self.by_name[name]
+        self.entries -= 1
+        self._names_dirty = True
+        self._dirty_since_save = True
+        self._drop_tree(os.path.join(directory, name))
+
+    def _drop_tree(self, directory: str) -> None:
+        names = self.children.pop(directory, None)
+        self.depth.pop(directory, None)
+        wd = self._watch_of.pop(directory, None)
+        if wd is not None:
+            self._watches.pop(wd, None)
+            if self._inotify:
+                self._inotify.rm_watch(wd)
+        for name in names or ():
+            dirs = self.by_name.get(name)
+            if dirs:
+                dirs.discard(directory)
+                if not dirs:
+                    del self.by_name[name]
+            self.entries -= 1
+            self._drop_tree(os.path.join(directory, name))
+
+    def _watch(self, directory: str) -> None:
+        if not self._inotify or directory in self._watch_of or len(self._watches) >= self.max_watches:
+            return
+        try:
+            wd = self._inotify.add_watch(directory, WATCH_MASK)
+        except OSError:
+            return
+        self._watches[wd] = directory
+        self._watch_of[directory] = wd
+
+    def _scan(self, root: str, start_depth: int) -> None:
+        """Index everything below root, honouring depth, ignore and size budgets"""
+        stack = [(root, start_depth)]
+        while stack:
+            directory, depth = stack.pop()
+            directory = sys.intern(directory)
+            self.children.setdefault(directory, set())
+            self.depth[directory] = depth
+            self._watch(directory)
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if self._ignored(entry.name):
+                            continue
+                        if self.entries >= self.max_entries:
+                            self.truncated = True
+                            return
+                        self._add(directory, entry.name)
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        if is_dir and depth < self.max_depth:
+                            stack.append((entry.path, depth + 1))
+            except OSError:
+                continue
+
+    def _rescan_unwatched(self) -> None:
+        """Re-read directories that have no inotify watch, so the watch budget never leaves them stale"""
+        with self._lock:
+            unwatched = [d for d in self.children if d not in self._watch_of]
+            for directory in unwatched:
+                if directory not in self.children:
+                    continue  # Dropped along with a removed parent
+                try:
+                    with os.scandir(directory) as it:
+                        entries = {e.name: e for e in it if not self._ignored(e.name)}
+                except OSError:
+                    continue
+                for name in self.children[directory] - entries.keys():
+                    self._remove(directory, name)
+                depth = self.depth.get(directory, 0)
+                for name in entries.keys() - self.children[directory]:
+                    if self.entries >= self.max_entries:
+                        self.truncated = True
+                        break
+                    self._add(directory, name)
+                    try:
+                        is_dir = entries[name].is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if is_dir and depth < self.max_depth:
+                        self._scan(entries[name].path, depth + 1)
+        self.stats["rescans"] += 1
+
+    def build(self) -> None:
+        """Rebuild the whole index from disk"""
+        start = time.monotonic()
+        watcher = None
+        if inotify.available():
+            try:
+                watcher = inotify.Inotify()
+            except OSError as e:
+                print(f"⚠️  inotify unavailable, falling back to periodic rescans: {e}")
+
+        # Scan into a fresh index so lookups keep answering from the old one meanwhile
+        fresh = FileIndex(self.roots, self.max_depth, self.max_entries, self.max_watches, self.ignore)
+        fresh._inotify = watcher
+        for root in fresh.roots:
+            fresh._scan(root, 0)
+
+        with self._lock:
+            old_watcher = self._inotify
+            self.children, self.by_name, self.depth = fresh.children, fresh.by_name, fresh.depth
+            self._watches, self._watch_of = fresh._watches, fresh._watch_of
+            self.entries = fresh.entries
+            self.truncated = fresh.truncated
+            self._inotify = watcher
+            self.ready = True
+            self._needs_rebuild = False
+            self._names_dirty = True
+
+        if old_watcher:
+            old_watcher.close()
+        elapsed = time.monotonic() - start
+        self.stats["builds"] += 1
+        self.stats["last_build_seconds"] = round(elapsed, 3)
+        print(f"📇 File index built: {self.entries} entries in {elapsed:.2f}s"
+              f"{' (truncated)' if self.truncated else ''}")
+        self.save()
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self) -> None:
+        if not self.persist_path:
+            return
+        with self._lock:
+            snapshot = {
+                "roots": self.roots,
+                "max_depth": self.max_depth,
+                "depth": self.depth,
+                "children": {d: sorted(n) for d, n in self.children.items()},
+                "truncated": self.truncated
+            }
+            self._dirty_since_save = False
+        try:
+            tmp_path = f"{self.persist_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, separators=(",", ":"))
+            os.replace(tmp_path, self.persist_path)
+        except Exception as e:
+            print(f"⚠️  Could not persist file index: {e}")
+
+    def load(self) -> bool:
+        """Load a previous snapshot so lookups work while the index is rebuilt"""
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return False
+        try:
+            mtime = os.stat(self.persist_path).st_mtime_ns
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except Exception as e:
+            print(f"⚠️  Could not load file index: {e}")
+            return False
+        if snapshot.get("roots") != self.roots or snapshot.get("max_depth") != self.max_depth:
+            return False
+
+        # Read into a fresh index and swap, so a reload replaces rather than merges
+        fresh = FileIndex(self.roots, self.max_depth, self.max_entries, self.max_watches, self.ignore)
+        for directory, names in snapshot["children"].items():
+            directory = sys.intern(directory)
+            fresh.children.setdefault(directory, set())
+            for name in names:
+                fresh._add(directory, name)
+
+        with self._lock:
+            self.children, self.by_name = fresh.children, fresh.by_name
+            self.depth = snapshot["depth"]
+            self.entries = fresh.entries
+            self.truncated = snapshot.get("truncated", False)
+            self.ready = True
+            self._names_dirty = True
+            self._dirty_since_save = False
+            self._loaded_mtime = mtime
+        self.stats["loaded_from_disk"] = True
+        print(f"📇 File index loaded from disk: {self.entries} entries")
+        return True
+
+    # ------------------------------------------------------------------
+    # Background maintenance
+    # ------------------------------------------------------------------
+
+    def start(self, build: bool = True) -> None:
+        """Load the persisted snapshot, then build and watch in the background.
+
+        With build=False this process only reads: it reloads the snapshot whenever
+        the process that builds and watches saves a new one.
+        """
+        self.load()
+        target = self._run if build else self._follow_snapshot
+        threading.Thread(target=target, name="file-index", daemon=True).start()
+
+    def _follow_snapshot(self) -> None:
+        while True:
+            time.sleep(min(self.persist_interval, 5.0))
+            try:
+                mtime = os.stat(self.persist_path).st_mtime_ns if self.persist_path else None
+            except OSError:
+                continue
+            if mtime is not None and mtime != self._loaded_mtime:
+                self.load()
+
+    def _run(self) -> None:
+        try:
+            self.build()
+        except Exception as e:
+            print(f"❌ File index build failed: {e}")
+        last_build = last_save = time.monotonic()
+
+        while True:
+            watcher = self._inotify
+            if watcher:
+                try:
+                    events = watcher.read_events(timeout=1.0)
+                except (OSError, ValueError):
+                    events = []
+                if events:
+                    self._apply(events)
+            else:
+                time.sleep(1.0)
+
+            now = time.monotonic()
+            if self._needs_rebuild or (not self._inotify and now - last_build > self.rescan_interval):
+                self.build()
+                last_build = last_save = now
+            elif len(self._watches) < len(self.children) and now - last_build > self.rescan_interval:
+                # Past the watch budget; those directories only change on rescan
+                self._rescan_unwatched()
+                last_build = now
+            elif self._dirty_since_save and now - last_save > self.persist_interval:
+                self.save()
+                last_save = now
+
+    def _apply(self, events) -> None:
+        with self._lock:
+            for wd, mask, _, name in events:
+                self.stats["events"] += 1
+                if mask & inotify.IN_Q_OVERFLOW:
+                    self._needs_rebuild = True
+                    continue
+                directory = self._watches.get(wd)
+                if directory is None:
+                    continue
+                if mask & (inotify.IN_DELETE_SELF | inotify.IN_IGNORED):
+                    parent, base = os.path.split(directory)
+                    self._remove(parent, base)
+                    self._drop_tree(directory)
+                elif mask & (inotify.IN_CREATE | inotify.IN_MOVED_TO):
+                    if self._ignored(name):
+                        continue
+                    self._add(directory, name)
+                    depth = self.depth.get(directory, 0)
+                    if mask & inotify.IN_ISDIR and depth < self.max_depth:
+                        self._scan(os.path.join(directory, name), depth + 1)
+                elif mask & (inotify.IN_DELETE | inotify.IN_MOVED_FROM):
+                    self._remove(directory, name)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def covers(self, path: str) -> bool:
+        """True if path lies under an indexed root and the index holds all of it"""
+        if not self.ready or self.truncated:
+            return False
+        path = os.path.realpath(os.path.expanduser(path))
+        return any(path == r or path.startswith(r + os.sep) for r in self.roots)
+
+    def _names(self) -> List[str]:
+        if self._names_dirty:
+            self._sorted_names = sorted(self.by_name)
+            self._names_dirty = False
+        return self._sorted_names
+
+    def _prefix_range(self, prefix: str) -> List[str]:
+        names = self._names()
+        lo = bisect.bisect_left(names, prefix)
+        hi = bisect.bisect_left(names, prefix + "\U0010ffff")
+        return names[lo:hi]
+
+    def lookup(self, pattern: str, limit: int = 10, mode: str = "auto") -> List[str]:
+        """Find paths by exact name, glob pattern or name prefix"""
+        start = time.perf_counter()
+        if mode == "auto":
+            mode = "glob" if any(c in pattern for c in "*?[") else "exact"
+
+        results = []
+        with self._lock:
+            if mode == "exact":
+                names = [pattern] if pattern in self.by_name else []
+            elif mode == "prefix":
+                names = self._prefix_range(pattern)
+            else:
+                literal = pattern
+                for i, c in enumerate(pattern):
+                    if c in "*?[":
+                        literal = pattern[:i]
+                        break
+                candidates = self._prefix_range(literal) if literal else self._names()
+                names = [n for n in candidates if fnmatch.fnmatchcase(n, pattern)]
+
+            for name in names:
+                for directory in sorted(self.by_name.get(name, ())):
+                    results.append(os.path.join(directory, name))
+                    if len(results) >= limit:
+                        break
+                if len(results) >= limit:
+                    break
+
+        self.stats["queries"] += 1
+        self.stats["query_seconds"] += time.perf_counter() - start
+        return results
+
+    def get_stats(self) -> Dict:
+        queries = self.stats["queries"]
+        return {
+            "ready": self.ready,
+            "roots": self.roots,
+            "entries": self.entries,
+            "directories": len(self.children),
+            "watches": len(self._watches),
+            "unwatched_directories": max(len(self.children) - len(self._watches), 0),
+            "rescans": self.stats["rescans"],
+            "inotify": self._inotify is not None,
+            "truncated": self.truncated,
+            "builds": self.stats["builds"],
+            "last_build_seconds": self.stats["last_build_seconds"],
+            "events": self.stats["events"],
+            "queries": queries,
+            "avg_query_microseconds": round(self.stats["query_seconds"] * 1e6 / queries, 1) if queries else 0,
+            "loaded_from_disk": self.stats["loaded_from_disk"]
+        }
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+File Preview
+Byte and line range reads through mmap with a lazily built line index
+"""
+
+import mmap
+import os
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+BLOCK_SIZE = 1 << 20   # newline counts are kept per 1 MiB block
+MAX_BYTES = 1 << 20    # largest byte range served per request
+MAX_LINES = 2000       # largest line range served per request
+
+
+class FilePreviewError(Exception):
+    """Raised for requests that cannot be served; carries an HTTP status"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class LineIndex:
+    """Cumulative newline counts at block boundaries, extended only as far as needed"""
+
+    def __init__(self, size: int, mtime_ns: int):
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.lock = threading.Lock()
+        # newlines_before[i] = number of newlines in bytes [0, i * BLOCK_SIZE)
+        self.newlines_before = array('Q', [0])
+
+    @property
+    def scanned_bytes(self) -> int:
+        return min((len(self.newlines_before) - 1) * BLOCK_SIZE, self.size)
+
+    @property
+    def complete(self) -> bool:
+        return self.scanned_bytes >= self.size
+
+    def extend(self, mm: mmap.mmap, until_line: Optional[int] = None) -> None:
+        """Count newlines block by block until until_line is covered (or the end)"""
+        while not self.complete:
+            if until_line is not None and self.newlines_before[-1] > until_line:
+                return
+            start = self.scanned_bytes
+            end = min(start + BLOCK_SIZE, self.size)
+            self.newlines_before.append(self.newlines_before[-1] + mm[start:end].count(b"\n"))
+
+    def total_lines(self, mm: mmap.mmap) -> int:
+        self.extend(mm)
+        count = self.newlines_before[-1]
+        # A final line without a trailing newline still counts
+        if self.size and mm[self.size - 1:self.size] != b"\n":
+            count += 1
+        return count
+
+    def line_offset(self, mm: mmap.mmap, line: int) -> int:
+        """Byte offset where 0-based line starts (size if past the end)"""
+        if line <= 0:
+            return 0
+        self.extend(mm, until_line=line)
+        # Block containing the line-th newline
+        block = bisect_right(self.newlines_before, line - 1) - 1
+        if block >= len(self.newlines_before) - 1 and self.complete and self.newlines_before[-1] < line:
+            return self.size
+        position = block * BLOCK_SIZE
+        remaining = line - self.newlines_before[block]
+        while remaining > 0:
+            found = mm.find(b"\n", position)
+            if found < 0:
+                return self.size
+            position = found + 1
+            remaining -= 1
+        return position
+
+
+class FilePreview:
+    """Serves ranges of files without reading them whole"""
+
+    def __init__(self, cache_size: int = 16):
+        self.cache_size = cache_size
+        self._indexes: "OrderedDict[str, LineIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, path: str, cwd: str) -> str:
+        """Resolve path against cwd and refuse anything outside it"""
+        full = os.path.realpath(os.path.join(cwd, os.path.expanduser(path)))
+        root = os.path.realpath(cwd)
+        if full != root and not full.startswith(root.rstrip(os.sep) + os.sep):
+            raise FilePreviewError("Path is outside the current directory", 403)
+        if not os.path.isfile(full):
+            raise FilePreviewError(f"File not found: {path}", 404)
+        return full
+
+    def _index_for(self, path: str, size: int, mtime_ns: int) -> LineIndex:
+        with self._lock:
+            index = self._indexes.get(path)
+            if index is None or size < index.size or (size == index.size and mtime_ns != index.mtime_ns):
+                index = LineIndex(size, mtime_ns)
+            elif size > index.size:
+                # Appended to: keep full blocks, rescan the partial last one
+                full_blocks = index.size // BLOCK_SIZE
+                del index.newlines_before[full_blocks + 1:]
+                index.size, index.mtime_ns = size, mtime_ns
+            self._indexes[path] = index
+            self._indexes.move_to_end(path)
+            while len(self._indexes) > self.cache_size:
+                self._indexes.popitem(last=False)
+            return index
+
+    def clear(self) -> int:
+        """Drop cached line indexes; returns how many were held"""
+        with self._lock:
+            dropped = len(self._indexes)
+            self._indexes.clear()
+        return dropped
+
+    def read(self, path: str, cwd: str, offset: Optional[int] = None, length: Optional[int] = None,
+             start_line: Optional[int] = None, num_lines: Optional[int] = None) -> Dict:
+        if offset is not None and offset < 0:
+            raise FilePreviewError("offset must not be negative")
+        if length is not None and length <= 0:
+            raise FilePreviewError("length must be positive")
+        full = self.resolve(path, cwd)
+        stat = os.stat(full)
+        size = stat.st_size
+        result = {"path": full, "size": size}
+
+        if size == 0:
+            return {**result, "content": "", "offset": 0, "length": 0, "next_offset": 0,
+                    "eof": True, "start_line": 0, "lines": 0, "total_lines": 0}
+
+        with open(full, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = min(size, len(mm))
+            if start_line is not None:
+                start, end, first_line, lines, total = self._line_range(mm, full, size, stat.st_mtime_ns,
+                                                                        start_line, num_lines)
+                result.update({"start_line": first_line, "lines": lines})
+                if total is not None:
+                    result["total_lines"] = total
+            else:
+                start = min(offset or 0, size)
+                end = min(size, start + min(length or MAX_BYTES, MAX_BYTES))
+            content = mm[start:end]
+
+        return {
+            **result,
+            "content": content.decode('utf-8', errors='replace'),
+            "offset": start,
+            "length": end - start,
+            "next_offset": end,
+            "eof": end >= size
+        }
+
+    def _line_range(self, mm: mmap.mmap, path: str, size: int, mtime_ns: int,
+                    start_line: int, num_lines: Optional[int]) -> Tuple[int, int, int, int, Optional[int]]:
+        count = max(1, min(num_lines or 100, MAX_LINES))
+        index = self._index_for(path, size, mtime_ns)
+        with index.lock:
+            return self._locate(mm, index, size, start_line, count)
+
+    def _locate(self, mm: mmap.mmap, index: LineIndex, size: int,
+                start_line: int, count: int) -> Tuple[int, int, int, int, Optional[int]]:
+        total = None
+        if start_line < 0:
+            # Negative start counts back from the end, like tail -n
+            total = index.total_lines(mm)
+            start_line = max(0, total + start_line)
+        start = index.line_offset(mm, start_line)
+        end = index.line_offset(mm, start_line + count)
+        # Stop at the byte budget on a line boundary where possible
+        if end - start > MAX_BYTES:
+            cut = mm.rfind(b"\n", start, start + MAX_BYTES)
+            end = cut + 1 if cut >= 0 else start + MAX_BYTES
+        # Count only the bytes returned; a read past the end returns none
+        lines = mm[start:end].count(b"\n")
+        if end > start and end == size and mm[size - 1:size] != b"\n":
+            lines += 1
+        if index.complete and total is None:
+            total = index.total_lines(mm)
+        return start, end, start_line, lines, total
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+File Walker
+Parallel os.scandir search with pruning, early exit and streamed matches
+"""
+
+import fnmatch
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Callable, Iterable, List, Optional
+
+
+DEFAULT_IGNORE = [".git", "node_modules", "__pycache__", ".venv", "venv", ".cache",
+                  ".Trash", ".npm", ".mypy_cache", ".pytest_cache"]
+
+
+def compile_matcher(pattern: str, mode: str = "auto") -> Callable[[str], bool]:
+    """Return a predicate for names matching pattern exactly, as a glob or as a prefix"""
+    if mode == "auto":
+        mode = "glob" if any(c in pattern for c in "*?[") else "exact"
+    if mode == "prefix":
+        return lambda name: name.startswith(pattern)
+    if mode == "glob":
+        return re.compile(fnmatch.translate(pattern)).match
+    return lambda name: name == pattern
+
+
+class ParallelWalker:
+    """Walks several roots at once on a pool of threads"""
+
+    def __init__(self, max_workers: int = 8, ignore: Optional[Iterable[str]] = None, max_depth: int = 5):
+        self.max_workers = max_workers
+        self.max_depth = max_depth
+        rules = list(DEFAULT_IGNORE if ignore is None else ignore)
+        # Plain names are checked with a set lookup, wildcard rules with fnmatch
+        self.ignore_names = {r for r in rules if not any(c in r for c in "*?[")}
+        self.ignore_globs = [re.compile(fnmatch.translate(r)).match for r in rules if r not in self.ignore_names]
+        # Room for a few searches at once before they start queueing behind each other
+        self._executor = ThreadPoolExecutor(max_workers=max_workers * 4, thread_name_prefix="walker")
+
+    def _ignored(self, name: str) -> bool:
+        return name in self.ignore_names or any(match(name) for match in self.ignore_globs)
+
+    def walk(self, roots: List[str], pattern: str, mode: str = "auto", limit: int = 10,
+             timeout: float = 5.0, on_match: Optional[Callable[[str], None]] = None) -> List[str]:
+        """Search roots for names matching pattern; stops after limit matches or timeout"""
+        matches_name = compile_matcher(pattern, mode)
+        deadline = time.monotonic() + timeout
+        pending = queue.Queue()
+        results: List[str] = []
+        seen_roots = set()
+        lock = threading.Lock()
+        done = threading.Event()
+
+        for root in roots:
+            root = os.path.realpath(os.path.expanduser(root))
+            if root not in seen_roots and os.path.isdir(root):
+                seen_roots.add(root)
+                pending.put((root, 0))
+
+        def found(path: str) -> None:
+            with lock:
+                if done.is_set() or path in results:
+                    return
+                results.append(path)
+                if len(results) >= limit:
+                    done.set()
+            if on_match:
+                try:
+                    on_match(path)
+                except Exception as e:
+                    print(f"⚠️  Search stream error: {e}")
+
+        def worker() -> None:
+            while not done.is_set():
+                try:
+                    directory, depth = pending.get(timeout=0.05)
+                except queue.Empty:
+                    if pending.unfinished_tasks == 0 or time.monotonic() > deadline:
+                        return
+                    continue
+                try:
+                    if time.monotonic() > deadline:
+                        done.set()
+                        continue
+                    with os.scandir(directory) as it:
+                        for entry in it:
+                            if done.is_set():
+                                break
+                            if self._ignored(entry.name):
+                                continue
+                            if matches_name(entry.name):
+                                found(entry.path)
+                            try:
+                                if depth + 1 < self.max_depth and entry.is_dir(follow_symlinks=False):
+                                    pending.put((entry.path, depth + 1))
+                            except OSError:
+                                continue
+                except OSError:
+                    pass
+                finally:
+                    pending.task_done()
+
+        workers = [self._executor.submit(worker) for _ in range(self.max_workers)]
+        wait(workers, timeout=max(0.0, deadline - time.monotonic()) + 0.1)
+        done.set()
+
+        with lock:
+            return list(results)
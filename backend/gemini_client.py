@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Gemini Client
+Defers importing google.generativeai (and its grpc/protobuf stack) and
+building the model until the first call that needs it
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class LazyModel:
+    """Stands in for genai.GenerativeModel; truthy when an API key is configured"""
+
+    def __init__(self, api_key: Optional[str], model_name: str = "gemini-2.5-flash"):
+        self.api_key = api_key
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+        self.load_seconds: Optional[float] = None
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def __bool__(self) -> bool:
+        return self.configured
+
+    def get(self):
+        """The real model, importing the SDK on first use"""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    if not self.api_key:
+                        raise RuntimeError("GEMINI_API_KEY not set")
+                    start = time.perf_counter()
+                    import google.generativeai as genai
+                    genai.configure(api_key=self.api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+                    self.load_seconds = time.perf_counter() - start
+                    print(f"🤖 Gemini SDK loaded in {self.load_seconds:.2f}s")
+        return self._model
+
+    def generate_content(self, *args: Any, **kwargs: Any):
+        return self.get().generate_content(*args, **kwargs)
+
+    def warm(self) -> None:
+        """Load the SDK in the background so the first request doesn't pay for it"""
+        if self.configured and not self.loaded:
+            threading.Thread(target=self.get, name="gemini-warm", daemon=True).start()
+
+    def get_stats(self) -> Dict:
+        return {
+            "configured": self.configured,
+            "loaded": self.loaded,
+            "model": self.model_name,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None
+        }
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+History Store
+SQLite (WAL) persistence for command history and feedback, written in batches,
+with the most recent history kept in memory as compact records
+"""
+
+import json
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Records keep only this much of the output; the full entry stays in SQLite
+OUTPUT_PREVIEW = 400
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    user_input TEXT NOT NULL,
+    command TEXT NOT NULL,
+    is_voice INTEGER NOT NULL,
+    success INTEGER NOT NULL,
+    executor TEXT,
+    directory TEXT,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_timestamp ON history(timestamp);
+CREATE INDEX IF NOT EXISTS history_executor ON history(executor, id);
+CREATE INDEX IF NOT EXISTS history_success ON history(success, id);
+
+CREATE TABLE IF NOT EXISTS feedback (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    command TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS feedback_timestamp ON feedback(timestamp);
+CREATE INDEX IF NOT EXISTS feedback_status ON feedback(status, id);
+
+CREATE TABLE IF NOT EXISTS history_sequence (id INTEGER PRIMARY KEY CHECK (id = 1), value INTEGER NOT NULL);
+INSERT OR IGNORE INTO history_sequence VALUES (1, 0);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+    user_input, command, content='history', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS history_fts_insert AFTER INSERT ON history BEGIN
+    INSERT INTO history_fts(rowid, user_input, command) VALUES (new.id, new.user_input, new.command);
+END;
+CREATE TRIGGER IF NOT EXISTS history_fts_delete AFTER DELETE ON history BEGIN
+    INSERT INTO history_fts(history_fts, rowid, user_input, command)
+    VALUES ('delete', old.id, old.user_input, old.command);
+END;
+"""
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class HistoryRecord:
+    """One history entry flattened to the fields clients render"""
+
+    __slots__ = ("id", "timestamp", "user_input", "command", "is_voice", "success", "executor",
+                 "directory", "output", "output_size", "error", "source", "confidence")
+
+    FIELDS = __slots__
+
+    def __init__(self, entry_id: int, entry: Dict):
+        result = entry.get("result") or {}
+        interpretation = entry.get("ai_interpretation") or {}
+        output = result.get("output") or ""
+        self.id = entry_id
+        self.timestamp = entry.get("timestamp")
+        # Commands, inputs and directories repeat a lot; share one copy of each
+        self.user_input = _intern(entry.get("user_input", ""))
+        self.command = _intern(entry.get("command", ""))
+        self.is_voice = bool(entry.get("is_voice"))
+        self.success = bool(result.get("success"))
+        self.executor = _intern(result.get("executor"))
+        self.directory = _intern(entry.get("directory"))
+        self.output = output[:OUTPUT_PREVIEW]
+        self.output_size = len(output)
+        self.error = (result.get("error") or "")[:OUTPUT_PREVIEW]
+        self.source = _intern(interpretation.get("source"))
+        self.confidence = interpretation.get("confidence")
+
+    def to_dict(self, fields: Optional[Iterable[str]] = None) -> Dict:
+        data = {name: getattr(self, name) for name in (fields or self.FIELDS) if name in self.FIELDS}
+        if "output" in data:
+            data["output_truncated"] = self.output_size > len(self.output)
+        return data
+
+
+class HistoryStore:
+    """History and feedback on disk; one writer thread, a read connection per thread.
+
+    With shared=True several processes use the same database: ids come from a
+    sequence row and reads always go to SQLite, since this process's ring
+    would miss the other workers' entries.
+    """
+
+    def __init__(self, path: str, batch_size: int = 100, flush_interval: float = 0.2,
+                 max_rows: int = 0, ring_capacity: int = 1000, shared: bool = False):
+        self.path = path
+        self.shared = shared
+        if shared:
+            ring_capacity = 0
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows
+        self._queue: "queue.Queue[Tuple[str, Dict]]" = queue.Queue()
+        self._local = threading.local()
+        self.stats = {"written": 0, "batches": 0, "write_seconds": 0.0, "ring_hits": 0, "ring_misses": 0}
+
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        try:
+            conn.executescript(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError as e:
+            print(f"⚠️  SQLite FTS5 unavailable, history search falls back to LIKE: {e}")
+            self.fts = False
+        conn.commit()
+
+        # Ids are handed out here so the in-memory records and the rows agree
+        self._id_lock = threading.Lock()
+        self._next_id = (conn.execute("SELECT MAX(id) FROM history").fetchone()[0] or 0) + 1
+        self._history_count = conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+        with conn:
+            conn.execute("UPDATE history_sequence SET value = MAX(value, ?)", (self._next_id - 1,))
+        # Pruning keeps the newest max_rows ids; a larger ring would serve rows already deleted
+        if max_rows:
+            ring_capacity = min(ring_capacity, max_rows)
+        # Once the ring is as large as max_rows it holds exactly what SQLite keeps
+        self._ring_holds_all = ring_capacity > 0 and ring_capacity == max_rows
+        self.ring: "deque[HistoryRecord]" = deque(maxlen=ring_capacity)
+        rows = conn.execute("SELECT id, entry FROM history ORDER BY id DESC LIMIT ?", (ring_capacity,)).fetchall()
+        for row in reversed(rows):
+            self.ring.append(HistoryRecord(row["id"], json.loads(row["entry"])))
+        # True while the ring still holds every row, so it can answer any page on its own;
+        # an empty zero-capacity ring holds nothing and must never claim that
+        self._ring_complete = len(rows) < ring_capacity or self._ring_holds_all
+
+        self._writer = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _allocate_shared_id(self) -> int:
+        conn = self._reader()
+        with conn:
+            # The UPDATE takes the write lock, so the value read back is ours alone
+            conn.execute("UPDATE history_sequence SET value = value + 1")
+            return conn.execute("SELECT value FROM history_sequence").fetchone()[0]
+
+    def add_history(self, entry: Dict) -> int:
+        with self._id_lock:
+            if self.shared:
+                entry_id = self._allocate_shared_id()
+            else:
+                entry_id = self._next_id
+                self._next_id += 1
+            if len(self.ring) == self.ring.maxlen and not self._ring_holds_all:
+                self._ring_complete = False
+            self.ring.append(HistoryRecord(entry_id, entry))
+            self._history_count += 1
+        self._queue.put(("history", (entry_id, entry)))
+        return entry_id
+
+    def add_feedback(self, entry: Dict) -> None:
+        self._queue.put(("feedback", entry))
+
+    def flush(self) -> None:
+        """Block until everything queued so far is on disk"""
+        if self._queue.unfinished_tasks:
+            # Tells the writer to stop gathering and commit now
+            self._queue.put(("flush", {}))
+            self._queue.join()
+
+    def _run(self) -> None:
+        conn = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            # Gather whatever else arrives shortly after, up to batch_size
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+                if batch[-1][0] == "flush":
+                    break
+            try:
+                self._write(conn, batch)
+            except Exception as e:
+                print(f"❌ History write failed: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, conn: sqlite3.Connection, batch: List[Tuple[str, Dict]]) -> None:
+        start = time.perf_counter()
+        history_rows = []
+        feedback_rows = []
+        for kind, entry in batch:
+            if kind == "history":
+                entry_id, entry = entry
+                result = entry.get("result") or {}
+                history_rows.append((
+                    entry_id, entry.get("timestamp"), entry.get("user_input", ""), entry.get("command", ""),
+                    int(bool(entry.get("is_voice"))), int(bool(result.get("success"))),
+                    result.get("executor"), entry.get("directory"), json.dumps(entry, default=str)
+                ))
+            elif kind == "feedback":
+                feedback_rows.append((entry.get("timestamp"), entry.get("command", ""),
+                                      entry.get("status", ""), entry.get("error")))
+        with conn:
+            if history_rows:
+                conn.executemany(
+                    "INSERT INTO history (id, timestamp, user_input, command, is_voice, success, executor, directory, entry) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", history_rows)
+                if self.max_rows:
+                    conn.execute("DELETE FROM history WHERE id <= (SELECT MAX(id) FROM history) - ?", (self.max_rows,))
+            if feedback_rows:
+                conn.executemany("INSERT INTO feedback (timestamp, command, status, error) VALUES (?, ?, ?, ?)",
+                                 feedback_rows)
+        self.stats["written"] += len(history_rows) + len(feedback_rows)
+        self.stats["batches"] += 1
+        self.stats["write_seconds"] += time.perf_counter() - start
+
+    # ------------------------------------------------------------------
+    # Reads (newest first, paginated with an id cursor)
+    # ------------------------------------------------------------------
+
+    def _page(self, sql: str, params: list, limit: int) -> Tuple[List[sqlite3.Row], Optional[int]]:
+        limit = max(1, limit)  # a negative LIMIT means no limit in SQLite
+        rows = self._reader().execute(sql + " ORDER BY h.id DESC LIMIT ?", params + [limit + 1]).fetchall()
+        next_cursor = rows[limit - 1]["id"] if len(rows) > limit else None
+        return rows[:limit], next_cursor
+
+    def history(self, limit: int = 50, before: Optional[int] = None, executor: Optional[str] = None,
+                success: Optional[bool] = None) -> Dict:
+        page = self._ring_page(limit, before, executor, success)
+        if page is not None:
+            return page
+        self.stats["ring_misses"] += 1
+        self.flush()
+        clauses, params = [], []
+        if before is not None:
+            clauses.append("h.id < ?")
+            params.append(before)
+        if executor:
+            clauses.append("h.executor = ?")
+            params.append(executor)
+        if success is not None:
+            clauses.append("h.success = ?")
+            params.append(int(success))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows, next_cursor = self._page(f"SELECT h.id, h.entry FROM history h{where}", params, limit)
+        return {"entries": [self._record(row) for row in rows], "next_cursor": next_cursor}
+
+    def _ring_page(self, limit: int, before: Optional[int], executor: Optional[str],
+                   success: Optional[bool]) -> Optional[Dict]:
+        """Answer from memory, or None if the page reaches past the oldest record held"""
+        limit = max(1, limit)
+        with self._id_lock:
+            records = list(self.ring)
+            complete = self._ring_complete
+        matches = []
+        for record in reversed(records):
+            if before is not None and record.id >= before:
+                continue
+            if (executor and record.executor != executor) or (success is not None and record.success != success):
+                continue
+            matches.append(record)
+            if len(matches) > limit:
+                self.stats["ring_hits"] += 1
+                return {"entries": matches[:limit], "next_cursor": matches[limit - 1].id}
+        if not complete:
+            return None
+        self.stats["ring_hits"] += 1
+        return {"entries": matches, "next_cursor": None}
+
+    def search(self, query: str, limit: int = 50, before: Optional[int] = None) -> Dict:
+        """Match words (as prefixes) in the user input or command"""
+        self.flush()
+        words = [w for w in query.split() if w]
+        if not words:
+            return {"entries": [], "next_cursor": None}
+        params: list = []
+        if self.fts:
+            # Quote every word so user input can't inject FTS5 syntax
+            match = " ".join('"' + w.replace('"', '""') + '"*' for w in words)
+            sql = "SELECT h.id, h.entry FROM history_fts JOIN history h ON h.id = history_fts.rowid WHERE history_fts MATCH ?"
+            params.append(match)
+        else:
+            sql = "SELECT h.id, h.entry FROM history h WHERE 1"
+            for w in words:
+                sql += " AND (h.user_input LIKE ? OR h.command LIKE ?)"
+                params += [f"%{w}%", f"%{w}%"]
+        if before is not None:
+            sql += " AND h.id < ?"
+            params.append(before)
+        rows, next_cursor = self._page(sql, params, limit)
+        return {"entries": [self._record(row) for row in rows], "next_cursor": next_cursor}
+
+    def feedback(self, limit: int = 100, before: Optional[int] = None) -> Dict:
+        self.flush()
+        sql = "SELECT h.id, h.timestamp, h.command, h.status, h.error FROM feedback h"
+        params = []
+        if before is not None:
+            sql += " WHERE h.id < ?"
+            params.append(before)
+        rows, next_cursor = self._page(sql, params, limit)
+        return {"entries": [dict(row) for row in rows], "next_cursor": next_cursor}
+
+    def _record(self, row: sqlite3.Row) -> HistoryRecord:
+        return HistoryRecord(row["id"], json.loads(row["entry"]))
+
+    def recent_commands(self, limit: int = 1000) -> List[Tuple[str, str]]:
+        """(command, ISO timestamp) of the latest successful entries, oldest first"""
+        self.flush()
+        rows = self._reader().execute(
+            "SELECT command, timestamp FROM history WHERE success = 1 ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [(row["command"], row["timestamp"]) for row in reversed(rows)]
+
+    def get_entry(self, entry_id: int) -> Optional[Dict]:
+        """The full stored entry, including complete output and interpretation"""
+        self.flush()
+        row = self._reader().execute("SELECT id, entry FROM history WHERE id = ?", (entry_id,)).fetchone()
+        if row is None:
+            return None
+        entry = json.loads(row["entry"])
+        entry["id"] = row["id"]
+        return entry
+
+    def count(self, table: str = "history") -> int:
+        if table == "history" and not self.shared:
+            return min(self._history_count, self.max_rows) if self.max_rows else self._history_count
+        if table not in ("history", "feedback"):
+            raise ValueError(table)
+        self.flush()
+        return self._reader().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def shed_ring(self) -> int:
+        """Empty the in-memory ring; reads fall back to SQLite until it refills"""
+        with self._id_lock:
+            dropped = len(self.ring)
+            self.ring.clear()
+            self._ring_complete = False
+        return dropped
+
+    def get_stats(self) -> Dict:
+        batches = self.stats["batches"]
+        return {
+            "path": self.path,
+            "fts": self.fts,
+            "written": self.stats["written"],
+            "batches": batches,
+            "pending": self._queue.qsize(),
+            "ring_size": len(self.ring),
+            "ring_hits": self.stats["ring_hits"],
+            "ring_misses": self.stats["ring_misses"],
+            "avg_batch_ms": round(self.stats["write_seconds"] * 1000 / batches, 2) if batches else 0
+        }
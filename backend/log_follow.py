@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Log Follow
+tail -f for many files on one inotify instance and one thread
+"""
+
+import codecs
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set
+
+import inotify
+
+
+FILE_MASK = inotify.IN_MODIFY | inotify.IN_ATTRIB | inotify.IN_MOVE_SELF | inotify.IN_DELETE_SELF
+DIR_MASK = inotify.IN_CREATE | inotify.IN_MOVED_TO | inotify.IN_ONLYDIR
+
+
+class FollowError(Exception):
+    """Raised for follow requests that cannot be served; carries an HTTP status"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class _Stream:
+    __slots__ = ("path", "file", "inode", "offset", "decoder", "subscribers",
+                 "wd", "dirty", "truncated", "rotated", "bytes_sent", "emits")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = None
+        self.inode = None
+        self.offset = 0
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.subscribers: Set[str] = set()
+        self.wd: Optional[int] = None
+        self.dirty = False
+        self.truncated = False
+        self.rotated = False
+        self.bytes_sent = 0
+        self.emits = 0
+
+
+class LogFollower:
+    """Pushes bytes appended to followed files to on_data(path, payload)"""
+
+    def __init__(self, on_data: Callable[[str, Dict], None], allowed_roots: Optional[List[str]] = None,
+                 coalesce_interval: float = 0.1, max_chunk: int = 64 * 1024, max_streams: int = 512,
+                 poll_interval: float = 1.0):
+        self.on_data = on_data
+        self.allowed_roots = [os.path.realpath(os.path.expanduser(r)) for r in (allowed_roots or [])]
+        self.coalesce_interval = coalesce_interval
+        self.max_chunk = max_chunk
+        self.max_streams = max_streams
+        self.poll_interval = poll_interval
+
+        self._streams: Dict[str, _Stream] = {}
+        self._file_watches: Dict[int, _Stream] = {}
+        self._dir_watches: Dict[int, str] = {}
+        self._dir_names: Dict[str, Set[str]] = {}
+        self._inotify = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self.stats = {"events": 0, "emits": 0, "bytes": 0, "rotations": 0, "truncations": 0}
+
+    # ------------------------------------------------------------------
+    # Subscriptions
+    # ------------------------------------------------------------------
+
+    def resolve(self, path: str, cwd: str) -> str:
+        """Resolve path against cwd; only cwd and the configured roots may be followed"""
+        full = os.path.realpath(os.path.join(cwd, os.path.expanduser(path)))
+        roots = [os.path.realpath(cwd)] + self.allowed_roots
+        if not any(full == r or full.startswith(r.rstrip(os.sep) + os.sep) for r in roots):
+            raise FollowError("Path is outside the followable directories", 403)
+        if not os.path.isfile(full):
+            raise FollowError(f"File not found: {path}", 404)
+        return full
+
+    def follow(self, path: str, subscriber: str, backlog: int = 4096) -> Dict:
+        """Subscribe to an already resolved path; returns the last backlog bytes as context"""
+        with self._lock:
+            stream = self._streams.get(path)
+            if stream is None:
+                if len(self._streams) >= self.max_streams:
+                    raise FollowError("Too many followed files", 429)
+                stream = _Stream(path)
+                try:
+                    self._open(stream, at_end=True)
+                except OSError as e:
+                    raise FollowError(str(e), 404)
+                self._streams[path] = stream
+                self._watch(stream)
+                print(f"👀 Following {path}")
+            stream.subscribers.add(subscriber)
+            offset = stream.offset
+        self._ensure_thread()
+        return {"path": path, "offset": offset, "data": self.tail(path, backlog, end=offset)}
+
+    def unfollow(self, path: str, subscriber: str) -> None:
+        with self._lock:
+            stream = self._streams.get(path)
+            if stream is None:
+                return
+            stream.subscribers.discard(subscriber)
+            if not stream.subscribers:
+                self._close(stream)
+
+    def drop_subscriber(self, subscriber: str) -> None:
+        """Forget a disconnected client on every stream it followed"""
+        with self._lock:
+            for stream in list(self._streams.values()):
+                stream.subscribers.discard(subscriber)
+                if not stream.subscribers:
+                    self._close(stream)
+
+    def tail(self, path: str, backlog: int = 4096, end: Optional[int] = None) -> str:
+        """The last backlog bytes before end (default: end of file), starting on a line"""
+        try:
+            with open(path, 'rb') as f:
+                if end is None:
+                    end = os.fstat(f.fileno()).st_size
+                if backlog <= 0 or end <= 0:
+                    return ""
+                start = max(0, end - backlog)
+                f.seek(start)
+                data = f.read(end - start)
+        except OSError:
+            return ""
+        # Start on a line boundary unless that would drop everything
+        if start > 0:
+            cut = data.find(b"\n")
+            if 0 <= cut < len(data) - 1:
+                data = data[cut + 1:]
+        return data.decode('utf-8', errors='replace')
+
+    # ------------------------------------------------------------------
+    # Files and watches (called with the lock held)
+    # ------------------------------------------------------------------
+
+    def _open(self, stream: _Stream, at_end: bool) -> None:
+        f = open(stream.path, 'rb')
+        st = os.fstat(f.fileno())
+        if stream.file:
+            stream.file.close()
+        stream.file = f
+        stream.inode = (st.st_dev, st.st_ino)
+        stream.offset = st.st_size if at_end else 0
+        stream.decoder.reset()
+
+    def _watch(self, stream: _Stream) -> None:
+        if not inotify.available():
+            return
+        if self._inotify is None:
+            try:
+                self._inotify = inotify.Inotify()
+            except OSError as e:
+                print(f"⚠️  inotify unavailable, polling followed files: {e}")
+                return
+        try:
+            stream.wd = self._inotify.add_watch(stream.path, FILE_MASK)
+            self._file_watches[stream.wd] = stream
+        except OSError:
+            stream.wd = None
+        # The parent directory tells us when a rotated file is recreated
+        directory, name = os.path.split(stream.path)
+        if directory not in self._dir_names:
+            try:
+                self._dir_watches[self._inotify.add_watch(directory, DIR_MASK)] = directory
+            except OSError:
+                pass
+            self._dir_names[directory] = set()
+        self._dir_names[directory].add(name)
+
+    def _unwatch_file(self, stream: _Stream) -> None:
+        if stream.wd is not None:
+            if self._file_watches.get(stream.wd) is stream:
+                del self._file_watches[stream.wd]
+                if self._inotify:
+                    self._inotify.rm_watch(stream.wd)
+            stream.wd = None
+
+    def _close(self, stream: _Stream) -> None:
+        self._streams.pop(stream.path, None)
+        self._unwatch_file(stream)
+        directory, name = os.path.split(stream.path)
+        names = self._dir_names.get(directory)
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del self._dir_names[directory]
+                for wd, watched in list(self._dir_watches.items()):
+                    if watched == directory:
+                        del self._dir_watches[wd]
+                        if self._inotify:
+                            self._inotify.rm_watch(wd)
+        if stream.file:
+            stream.file.close()
+            stream.file = None
+        print(f"👀 Stopped following {stream.path}")
+
+    # ------------------------------------------------------------------
+    # Event loop
+    # ------------------------------------------------------------------
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="log-follow", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        last_poll = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._streams:
+                    self._thread = None
+                    return
+                watcher = self._inotify
+            if watcher:
+                try:
+                    events = watcher.read_events(timeout=self.poll_interval)
+                except (OSError, ValueError):
+                    events = []
+                self._mark(events)
+            else:
+                time.sleep(self.coalesce_interval)
+
+            # Polling also covers files whose watches could not be added
+            now = time.monotonic()
+            if now - last_poll >= self.poll_interval:
+                last_poll = now
+                with self._lock:
+                    for stream in self._streams.values():
+                        if stream.wd is None or watcher is None:
+                            stream.dirty = True
+
+            # Let a burst of writes settle so it goes out as one emit per stream
+            time.sleep(self.coalesce_interval)
+            if watcher:
+                try:
+                    self._mark(watcher.read_events(timeout=0))
+                except (OSError, ValueError):
+                    pass
+            self._flush()
+
+    def _mark(self, events) -> None:
+        with self._lock:
+            for wd, mask, _, name in events:
+                self.stats["events"] += 1
+                if mask & inotify.IN_Q_OVERFLOW:
+                    for stream in self._streams.values():
+                        stream.dirty = True
+                    continue
+                stream = self._file_watches.get(wd)
+                if stream is not None:
+                    stream.dirty = True
+                    if mask & inotify.IN_IGNORED:
+                        del self._file_watches[wd]
+                        stream.wd = None
+                    continue
+                directory = self._dir_watches.get(wd)
+                if directory is not None and name in self._dir_names.get(directory, ()):
+                    target = self._streams.get(os.path.join(directory, name))
+                    if target is not None:
+                        target.dirty = True
+
+    def _flush(self) -> None:
+        payloads = []
+        with self._lock:
+            for stream in list(self._streams.values()):
+                if stream.dirty:
+                    stream.dirty = False
+                    payload = self._drain(stream)
+                    if payload:
+                        payloads.append((stream.path, payload))
+        for path, payload in payloads:
+            try:
+                self.on_data(path, payload)
+            except Exception as e:
+                print(f"⚠️  Follow stream error: {e}")
+
+    def _drain(self, stream: _Stream) -> Optional[Dict]:
+        """Read what was appended since the last drain, following rotation and truncation"""
+        chunks = []
+        if stream.file is not None:
+            try:
+                size = os.fstat(stream.file.fileno()).st_size
+            except OSError:
+                size = stream.offset
+            if size < stream.offset:
+                # copytruncate-style rotation or an explicit truncate
+                stream.offset = 0
+                stream.decoder.reset()
+                stream.truncated = True
+                self.stats["truncations"] += 1
+            chunks.append(self._read(stream))
+
+        # A different file now sits at the path: finish the old one, then switch over
+        # (a still-dirty stream has unread bytes in the old file; switch on a later pass)
+        try:
+            st = os.stat(stream.path)
+            current = (st.st_dev, st.st_ino)
+        except OSError:
+            current = None
+        if current is not None and current != stream.inode and not stream.dirty:
+            try:
+                self._open(stream, at_end=False)
+            except OSError:
+                current = None
+            if current is not None:
+                self._unwatch_file(stream)
+                if self._inotify:
+                    try:
+                        stream.wd = self._inotify.add_watch(stream.path, FILE_MASK)
+                        self._file_watches[stream.wd] = stream
+                    except OSError:
+                        stream.wd = None
+                stream.rotated = True
+                self.stats["rotations"] += 1
+                chunks.append(self._read(stream))
+
+        data = "".join(chunks)
+        if not data and not stream.truncated and not stream.rotated:
+            return None
+        payload = {"path": stream.path, "data": data, "offset": stream.offset,
+                   "truncated": stream.truncated, "rotated": stream.rotated}
+        stream.truncated = stream.rotated = False
+        stream.emits += 1
+        stream.bytes_sent += len(data)
+        self.stats["emits"] += 1
+        self.stats["bytes"] += len(data)
+        return payload
+
+    def _read(self, stream: _Stream) -> str:
+        stream.file.seek(stream.offset)
+        data = stream.file.read(self.max_chunk)
+        stream.offset += len(data)
+        if len(data) == self.max_chunk:
+            # More is waiting; pick it up on the next pass instead of hogging the loop
+            stream.dirty = True
+        return stream.decoder.decode(data)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "streams": len(self._streams),
+                "subscribers": sum(len(s.subscribers) for s in self._streams.values()),
+                "watches": len(self._file_watches) + len(self._dir_watches),
+                "inotify": self._inotify is not None
+            }
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Memory Watch
+Periodic RSS sampling with budget alarms, and tracemalloc snapshots/diffs
+that attribute memory to allocation sites
+"""
+
+import gc
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# Frames from these files are bookkeeping, not the application's memory
+_IGNORED = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def rss_bytes() -> int:
+    """Current resident set size; falls back to the peak where /proc isn't available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _site(stat) -> str:
+    frame = stat.traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+
+class MemoryWatch:
+    """RSS sampler thread plus on-demand tracemalloc snapshots"""
+
+    OK, WARN, CRITICAL = "ok", "warn", "critical"
+
+    def __init__(self, budget_bytes: int = 0, warn_ratio: float = 0.8, interval: float = 10.0,
+                 shed_on_alarm: bool = False, top_n: int = 10, history: int = 360,
+                 max_snapshots: int = 4, cooldown: float = 300.0):
+        self.budget_bytes = budget_bytes
+        self.warn_ratio = warn_ratio
+        self.interval = interval
+        self.shed_on_alarm = shed_on_alarm
+        self.top_n = top_n
+        self.max_snapshots = max_snapshots
+        self.cooldown = cooldown
+        self.samples: "deque[tuple]" = deque(maxlen=history)
+        self.peak = 0
+        self.state = self.OK
+        self.alarms: "deque[Dict]" = deque(maxlen=20)
+        self._last_alarm = 0.0
+        self._shedders: Dict[str, Callable[[], int]] = {}
+        self._snapshots: "deque[Dict]" = deque(maxlen=max_snapshots)
+        self._next_snapshot_id = 1
+        self._lock = threading.Lock()
+        if interval > 0:
+            threading.Thread(target=self._run, name="memory-watch", daemon=True).start()
+
+    def register_shedder(self, name: str, shed: Callable[[], int]) -> None:
+        """shed() drops a cache and returns how many entries it released"""
+        self._shedders[name] = shed
+
+    # ------------------------------------------------------------------
+    # RSS sampling and alarms
+    # ------------------------------------------------------------------
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"⚠️  Memory sampler error: {e}")
+            time.sleep(self.interval)
+
+    def sample(self) -> int:
+        rss = rss_bytes()
+        self.samples.append((time.time(), rss))
+        self.peak = max(self.peak, rss)
+        if self.budget_bytes:
+            self._check_budget(rss)
+        return rss
+
+    def _check_budget(self, rss: int) -> None:
+        if rss >= self.budget_bytes:
+            state = self.CRITICAL
+        elif rss >= self.budget_bytes * self.warn_ratio:
+            state = self.WARN
+        else:
+            state = self.OK
+        previous, self.state = self.state, state
+        escalated = (state == self.CRITICAL and previous != self.CRITICAL) or (state == self.WARN and previous == self.OK)
+        # Stay quiet while RSS hovers at one level, but repeat a critical alarm after the cooldown
+        repeat = state == self.CRITICAL and time.monotonic() - self._last_alarm > self.cooldown
+        if escalated or repeat:
+            self._alarm(state, rss)
+
+    def _alarm(self, state: str, rss: int) -> None:
+        self._last_alarm = time.monotonic()
+        alarm = {"time": time.time(), "state": state, "rss": rss, "budget": self.budget_bytes,
+                 "top": self.top_allocators(self.top_n)}
+        icon = "🚨" if state == self.CRITICAL else "⚠️ "
+        print(f"{icon} Memory {state}: RSS {rss / 2**20:.0f} MiB of {self.budget_bytes / 2**20:.0f} MiB budget")
+        if alarm["top"] is None:
+            print("   (POST /api/debug/memory/tracemalloc to attribute allocations)")
+        for entry in alarm["top"] or []:
+            print(f"   {entry['size'] / 2**10:10.1f} KiB  {entry['count']:7d} blocks  {entry['site']}")
+        if state == self.CRITICAL and self.shed_on_alarm:
+            alarm["shed"] = self.shed()
+        self.alarms.append(alarm)
+
+    def shed(self) -> Dict:
+        """Drop every registered cache and collect garbage; reports entries released and RSS change"""
+        before = rss_bytes()
+        released = {}
+        for name, shed in self._shedders.items():
+            try:
+                released[name] = shed()
+            except Exception as e:
+                released[name] = f"error: {e}"
+        collected = gc.collect()
+        after = rss_bytes()
+        print(f"🧹 Shed caches {released}, gc collected {collected}, RSS {before / 2**20:.0f} → {after / 2**20:.0f} MiB")
+        return {"released": released, "gc_collected": collected, "rss_before": before, "rss_after": after}
+
+    # ------------------------------------------------------------------
+    # tracemalloc
+    # ------------------------------------------------------------------
+
+    def start_tracing(self, frames: int = 1) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(max(1, min(frames, 64)))
+            print(f"🔎 tracemalloc started ({tracemalloc.get_traceback_limit()} frames)")
+
+    def stop_tracing(self) -> None:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            with self._lock:
+                self._snapshots.clear()  # their traces can't be compared with a new session's
+            print("🔎 tracemalloc stopped")
+
+    def top_allocators(self, limit: int = 10, key_type: str = "lineno") -> Optional[List[Dict]]:
+        """Largest live allocation sites right now, or None when tracemalloc isn't running"""
+        if not tracemalloc.is_tracing():
+            return None
+        stats = tracemalloc.take_snapshot().filter_traces(_IGNORED).statistics(key_type)
+        return [{"site": _site(s), "size": s.size, "count": s.count} for s in stats[:limit]]
+
+    def snapshot(self, label: Optional[str] = None, limit: int = 20) -> Dict:
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not running")
+        snap = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+        with self._lock:
+            record = {"id": self._next_snapshot_id, "label": label, "time": time.time(),
+                      "rss": rss_bytes(), "snapshot": snap}
+            self._next_snapshot_id += 1
+            previous = self._snapshots[-1] if self._snapshots else None
+            self._snapshots.append(record)
+        summary = self._describe(record)
+        summary["top"] = [{"site": _site(s), "size": s.size, "count": s.count}
+                          for s in snap.statistics("lineno")[:limit]]
+        if previous:
+            summary["since_previous"] = self.diff(previous["id"], record["id"], limit=limit)
+        return summary
+
+    def diff(self, from_id: int, to_id: int, key_type: str = "lineno", limit: int = 20) -> Dict:
+        """Allocation sites that grew (or shrank) the most between two snapshots"""
+        with self._lock:
+            by_id = {s["id"]: s for s in self._snapshots}
+        if from_id not in by_id or to_id not in by_id:
+            raise KeyError(f"snapshots kept: {sorted(by_id)}")
+        older, newer = by_id[from_id], by_id[to_id]
+        changes = newer["snapshot"].compare_to(older["snapshot"], key_type)
+        return {
+            "from": from_id,
+            "to": to_id,
+            "rss_change": newer["rss"] - older["rss"],
+            "traced_change": sum(c.size_diff for c in changes),
+            "sites": [{"site": _site(c), "size": c.size, "size_diff": c.size_diff,
+                       "count": c.count, "count_diff": c.count_diff} for c in changes[:limit]]
+        }
+
+    @staticmethod
+    def _describe(record: Dict) -> Dict:
+        return {"id": record["id"], "label": record["label"], "time": record["time"], "rss": record["rss"]}
+
+    def get_stats(self) -> Dict:
+        current = self.samples[-1][1] if self.samples else rss_bytes()
+        traced = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else None
+        with self._lock:
+            snapshots = [self._describe(s) for s in self._snapshots]
+        return {
+            "rss": current,
+            "peak_rss": max(self.peak, current),
+            "budget": self.budget_bytes or None,
+            "state": self.state,
+            "shed_on_alarm": self.shed_on_alarm,
+            "tracemalloc": {"tracing": traced is not None,
+                            "traced": traced[0] if traced else None,
+                            "traced_peak": traced[1] if traced else None,
+                            "frames": tracemalloc.get_traceback_limit() if traced else None},
+            "snapshots": snapshots,
+            "alarms": list(self.alarms)
+        }
+
+    def recent_samples(self) -> List[Dict]:
+        return [{"time": t, "rss": rss} for t, rss in self.samples]
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Message Bus
+Local pub/sub between worker processes over a Unix socket, and a Socket.IO
+client manager that fans emits out through it
+"""
+
+import json
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+from typing import Callable, Dict, List
+
+import socketio
+
+
+_FRAME = struct.Struct("!I")
+
+
+def _read_frame(conn: socket.socket) -> bytes:
+    header = _read_exact(conn, _FRAME.size)
+    return _read_exact(conn, _FRAME.unpack(header)[0])
+
+
+def _read_exact(conn: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = conn.recv(size)
+        if not chunk:
+            raise ConnectionError("bus connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+class Broker:
+    """Runs in the supervisor: relays every frame a worker sends to all other workers"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._clients: Dict[socket.socket, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.stats = {"frames": 0, "clients": 0}
+
+    def start(self) -> None:
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.path)
+        self._server.listen(64)
+        threading.Thread(target=self._accept, name="bus-accept", daemon=True).start()
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            with self._lock:
+                self._clients[conn] = threading.Lock()
+                self.stats["clients"] = len(self._clients)
+            threading.Thread(target=self._relay, args=(conn,), name="bus-relay", daemon=True).start()
+
+    def _relay(self, conn: socket.socket) -> None:
+        try:
+            while True:
+                frame = _read_frame(conn)
+                data = _FRAME.pack(len(frame)) + frame
+                with self._lock:
+                    targets = [(c, l) for c, l in self._clients.items() if c is not conn]
+                for target, write_lock in targets:
+                    try:
+                        with write_lock:
+                            target.sendall(data)
+                    except OSError:
+                        pass
+                self.stats["frames"] += 1
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            with self._lock:
+                self._clients.pop(conn, None)
+                self.stats["clients"] = len(self._clients)
+            conn.close()
+
+    def close(self) -> None:
+        self._server.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class BusClient:
+    """One worker's connection to the broker; messages are JSON on named channels"""
+
+    def __init__(self, path: str, connect_timeout: float = 10.0):
+        self.path = path
+        self._conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        deadline = time.monotonic() + connect_timeout
+        while True:
+            try:
+                self._conn.connect(path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.05)
+        self._write_lock = threading.Lock()
+        self._handlers: Dict[str, List[Callable[[Dict], None]]] = {}
+        self.stats = {"published": 0, "received": 0}
+        threading.Thread(target=self._read, name="bus-client", daemon=True).start()
+
+    def publish(self, channel: str, data) -> None:
+        frame = json.dumps({"channel": channel, "data": data}, separators=(",", ":"), default=str).encode("utf-8")
+        with self._write_lock:
+            self._conn.sendall(_FRAME.pack(len(frame)) + frame)
+        self.stats["published"] += 1
+
+    def subscribe(self, channel: str, handler: Callable[[Dict], None]) -> None:
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def _read(self) -> None:
+        try:
+            while True:
+                message = json.loads(_read_frame(self._conn))
+                self.stats["received"] += 1
+                for handler in self._handlers.get(message.get("channel"), ()):
+                    try:
+                        handler(message.get("data"))
+                    except Exception as e:
+                        print(f"⚠️  Bus handler error on {message.get('channel')}: {e}")
+        except (ConnectionError, OSError) as e:
+            print(f"❌ Message bus connection lost: {e}")
+
+
+class LocalBusManager(socketio.PubSubManager):
+    """Socket.IO client manager that shares emits and rooms across workers via the bus"""
+
+    name = "localbus"
+
+    def __init__(self, bus: BusClient, channel: str = "socketio", write_only: bool = False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.bus = bus
+        self._inbox: "queue.Queue[Dict]" = queue.Queue()
+        bus.subscribe(channel, self._inbox.put)
+
+    def _publish(self, data) -> None:
+        self.bus.publish(self.channel, data)
+
+    def _listen(self):
+        while True:
+            yield self._inbox.get()
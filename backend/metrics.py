@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Metrics
+Counters, gauges and log-bucketed latency histograms rendered in the
+Prometheus text exposition format, cheap enough to leave on in production
+"""
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+def log_buckets(lowest: float = 0.0005, highest: float = 60.0, per_doubling: int = 2) -> List[float]:
+    """HDR-style bounds: geometric steps, so every bucket has the same relative error"""
+    count = int(math.ceil(math.log2(highest / lowest) * per_doubling))
+    return [float(f"{lowest * 2 ** (i / per_doubling):.6g}") for i in range(count + 1)]
+
+
+LATENCY_BUCKETS = log_buckets()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str, **kwargs: str):
+        """Child for one label combination; keep the returned child around on hot paths"""
+        key = tuple(str(v) for v in values) if values else tuple(str(kwargs[n]) for n in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        return self.labels(*([""] * len(self.labelnames))) if self.labelnames else self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self, const: Tuple[Tuple[str, str], ...] = ()) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        names = tuple(n for n, _ in const) + self.labelnames
+        for key, child in sorted(self._children.items()):
+            values = tuple(v for _, v in const) + key
+            lines.extend(child.render(self.name, names, values))
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def render(self, name, names, values) -> List[str]:
+        return [f"{name}{_format_labels(names, values)} {_format_value(self.value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ("function",)
+
+    def __init__(self):
+        super().__init__()
+        self.function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the value from function at scrape time instead"""
+        self.function = function
+
+    def render(self, name, names, values) -> List[str]:
+        value = self.value
+        if self.function is not None:
+            try:
+                value = float(self.function())
+            except Exception:
+                value = math.nan
+        return [f"{name}{_format_labels(names, values)} {_format_value(value) if value == value else 'NaN'}"]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default().dec(amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._default().set_function(function)
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        """Count the block as in flight while it runs"""
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: List[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def render(self, name, names, values) -> List[str]:
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        lines = []
+        cumulative = 0
+        for bound, bucket in zip(self.bounds + [math.inf], counts):
+            cumulative += bucket
+            lines.append(f"{name}_bucket{_format_labels(names, values, ('le', _format_value(bound)))} {cumulative}")
+        labels = _format_labels(names, values)
+        lines.append(f"{name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{name}_count{labels} {count}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Optional[List[float]] = None):
+        super().__init__(name, help, labelnames)
+        self.bounds = sorted(buckets or LATENCY_BUCKETS)
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+
+class Registry:
+    """Owns the process's metrics; const_labels (e.g. worker id) are added to every sample"""
+
+    def __init__(self, const_labels: Optional[Dict[str, str]] = None):
+        self.const_labels = tuple(sorted((const_labels or {}).items()))
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        if not metric.labelnames:
+            metric._default()  # unlabelled metrics are exported from the start, at zero
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Optional[List[float]] = None) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render(self.const_labels))
+        return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
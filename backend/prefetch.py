@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Predictive Prefetch
+N-gram model over command history that warms translations while the user is idle
+"""
+
+import os
+import shlex
+import threading
+import time
+from collections import defaultdict, Counter, OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# Commands whose output may be computed ahead of time: no side effects, cheap
+SAFE_READ_ONLY = {
+    ("ls",), ("pwd",), ("date",), ("whoami",), ("uname",), ("df",), ("free",),
+    ("git", "status"), ("git", "log"), ("git", "branch"), ("git", "diff"),
+}
+
+
+def normalize(text: str) -> str:
+    """Key for predictor statistics only; prefetching uses the text as the user typed it"""
+    return " ".join(text.lower().split())
+
+
+def is_safe_read_only(command: str) -> bool:
+    """True for commands in SAFE_READ_ONLY with no shell operators"""
+    if any(op in command for op in ("|", ">", "<", ";", "&", "`", "$(")):
+        return False
+    try:
+        words = shlex.split(command)
+    except ValueError:
+        return False
+    if not words:
+        return False
+    return (words[0],) in SAFE_READ_ONLY or tuple(words[:2]) in SAFE_READ_ONLY
+
+
+class NgramPredictor:
+    """Bigram/trigram counts over the sequence of user inputs"""
+
+    def __init__(self, max_contexts: int = 5000):
+        self.max_contexts = max_contexts
+        self.bigrams: Dict[str, Counter] = defaultdict(Counter)
+        self.trigrams: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+        self.recent: List[str] = []
+        # Latest spelling of each normalized input, so predictions keep the user's case
+        self.spellings: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def observe(self, user_input: str) -> None:
+        current = normalize(user_input)
+        if not current:
+            return
+        with self._lock:
+            self.spellings[current] = user_input.strip()
+            self.spellings.move_to_end(current)
+            if len(self.spellings) > self.max_contexts:
+                self.spellings.popitem(last=False)
+            if self.recent:
+                self.bigrams[self.recent[-1]][current] += 1
+            if len(self.recent) >= 2:
+                self.trigrams[(self.recent[-2], self.recent[-1])][current] += 1
+            self.recent = (self.recent + [current])[-2:]
+
+            # Keep the tables bounded; drop the sparsest contexts first
+            for table in (self.bigrams, self.trigrams):
+                if len(table) > self.max_contexts:
+                    for key, _ in sorted(table.items(), key=lambda kv: sum(kv[1].values()))[:len(table) // 10]:
+                        del table[key]
+
+    def train(self, inputs: List[str]) -> None:
+        for user_input in inputs:
+            self.observe(user_input)
+
+    def predict(self, k: int = 3) -> List[Tuple[str, float]]:
+        """Most likely next inputs with probabilities, trigram first then bigram"""
+        with self._lock:
+            scores: Counter = Counter()
+            if len(self.recent) >= 2:
+                counts = self.trigrams.get((self.recent[-2], self.recent[-1]))
+                if counts:
+                    total = sum(counts.values())
+                    for text, count in counts.items():
+                        scores[text] += 0.7 * count / total
+            if self.recent:
+                counts = self.bigrams.get(self.recent[-1])
+                if counts:
+                    total = sum(counts.values())
+                    for text, count in counts.items():
+                        scores[text] += 0.3 * count / total
+            return [(self.spellings.get(text, text), round(score, 3)) for text, score in scores.most_common(k)]
+
+
+class Prefetcher:
+    """Runs predicted translations (and optionally safe commands) in the background"""
+
+    def __init__(self, translate: Callable[[str, str], Dict],
+                 execute: Optional[Callable[[str, str, bool], Dict]] = None,
+                 idle_delay: float = 1.5, ttl: float = 300.0, result_ttl: float = 5.0,
+                 min_probability: float = 0.2, capacity: int = 256):
+        self.translate = translate
+        self.execute = execute
+        self.idle_delay = idle_delay
+        self.ttl = ttl
+        self.result_ttl = result_ttl
+        self.min_probability = min_probability
+        self.capacity = capacity
+        self.predictor = NgramPredictor()
+        self._translations: "OrderedDict[Tuple[str, str], Tuple[float, Dict]]" = OrderedDict()
+        self._results: Dict[Tuple[str, str, bool], Tuple[float, int, Dict]] = {}
+        self._last_activity = time.monotonic()
+        self._activity = 0  # bumped on every touch/observe; a prefetch round stops when it changes
+        self._pending: Optional[Tuple[str, bool]] = None  # (cwd, prefer_mini_bash) of the last command
+        self._cond = threading.Condition()
+        self.stats = {"predictions": 0, "translations_prefetched": 0, "results_prefetched": 0,
+                      "fallbacks_skipped": 0, "translation_hits": 0, "result_hits": 0, "misses": 0}
+        self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+        self._thread.start()
+
+    def touch(self) -> None:
+        """Mark user activity so prefetching waits until the user is idle again"""
+        with self._cond:
+            self._last_activity = time.monotonic()
+            self._activity += 1
+
+    def observe(self, user_input: str, cwd: str, prefer_mini_bash: bool = True) -> None:
+        """Feed an executed input to the model and schedule a prefetch round"""
+        self.predictor.observe(user_input)
+        with self._cond:
+            self._last_activity = time.monotonic()
+            self._activity += 1
+            self._pending = (cwd, prefer_mini_bash)
+            self._cond.notify()
+
+    def get_translation(self, user_input: str, cwd: str) -> Optional[Dict]:
+        key = (user_input.strip(), cwd)
+        with self._cond:
+            entry = self._translations.pop(key, None)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            self.stats["translation_hits"] += 1
+            return dict(entry[1], prefetched=True)
+        self.stats["misses"] += 1
+        return None
+
+    def get_result(self, command: str, cwd: str, prefer_mini_bash: bool = True) -> Optional[Dict]:
+        key = (command, cwd, prefer_mini_bash)
+        with self._cond:
+            entry = self._results.pop(key, None)
+        if not entry:
+            return None
+        created, dir_mtime, result = entry
+        if time.monotonic() - created > self.result_ttl or dir_mtime != self._dir_mtime(cwd):
+            return None
+        self.stats["result_hits"] += 1
+        return dict(result, prefetched=True)
+
+    def _dir_mtime(self, cwd: str) -> int:
+        try:
+            return os.stat(cwd).st_mtime_ns
+        except OSError:
+            return -1
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                idle_for = time.monotonic() - self._last_activity
+                if idle_for < self.idle_delay:
+                    self._cond.wait(self.idle_delay - idle_for)
+                    continue
+                (cwd, prefer_mini_bash), self._pending = self._pending, None
+                activity = self._activity
+
+            try:
+                self._prefetch(cwd, prefer_mini_bash, activity)
+            except Exception as e:
+                print(f"⚠️  Prefetch error: {e}")
+
+    def _active_since(self, activity: int) -> bool:
+        with self._cond:
+            return self._activity != activity
+
+    def _prefetch(self, cwd: str, prefer_mini_bash: bool, activity: int) -> None:
+        for text, probability in self.predictor.predict():
+            if probability < self.min_probability:
+                continue
+            if self._active_since(activity):
+                return  # the user is active again; stop spending work on stale predictions
+            self.stats["predictions"] += 1
+            key = (text, cwd)
+            with self._cond:
+                cached = self._translations.get(key)
+            if cached and time.monotonic() - cached[0] < self.ttl:
+                translation = cached[1]
+            else:
+                translation = self.translate(text, cwd)
+                if translation.get("source") != "gemini":
+                    # Breaker-open or timeout fallback: the raw text, not a translation worth serving
+                    self.stats["fallbacks_skipped"] += 1
+                    continue
+                with self._cond:
+                    self._translations[key] = (time.monotonic(), translation)
+                    while len(self._translations) > self.capacity:
+                        self._translations.popitem(last=False)
+                self.stats["translations_prefetched"] += 1
+
+            command = translation.get("command", "")
+            if self.execute and not translation.get("needs_file_search") and is_safe_read_only(command):
+                if self._active_since(activity):
+                    return
+                dir_mtime = self._dir_mtime(cwd)
+                result = self.execute(command, cwd, prefer_mini_bash)
+                if not result.get("success"):
+                    continue  # a real run might fall back to another executor; don't guess
+                now = time.monotonic()
+                with self._cond:
+                    for stale in [k for k, v in self._results.items() if now - v[0] > self.result_ttl]:
+                        del self._results[stale]
+                    self._results[(command, cwd, prefer_mini_bash)] = (now, dir_mtime, result)
+                self.stats["results_prefetched"] += 1
+
+    def clear(self) -> int:
+        """Drop prefetched translations and results; returns how many were held"""
+        with self._cond:
+            dropped = len(self._translations) + len(self._results)
+            self._translations.clear()
+            self._results.clear()
+        return dropped
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "cached_translations": len(self._translations),
+                "cached_results": len(self._results), "predicted_next": self.predictor.predict()}
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Profiler
+On-demand CPU profiling of the next N requests or T seconds: a low-overhead
+stack sampler producing collapsed stacks for flamegraphs, or cProfile for
+exact call counts. Nothing is hooked in until a session is armed.
+"""
+
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+MODES = ("sample", "cprofile")
+
+
+class ProfileError(Exception):
+    """Raised for profiling requests that cannot be served; carries an HTTP status"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _frame_label(code) -> str:
+    # Parent directory included so flask/app.py and backend/app.py stay apart
+    path = code.co_filename
+    short = os.path.join(os.path.basename(os.path.dirname(path)), os.path.basename(path))
+    return f"{code.co_name} ({short}:{code.co_firstlineno})"
+
+
+class _Session:
+    def __init__(self, mode: str, requests: Optional[int], seconds: Optional[float], interval: float):
+        self.mode = mode
+        self.remaining = requests
+        self.requested = requests
+        self.seconds = seconds
+        self.interval = interval
+        self.started = time.time()
+        self.deadline = time.monotonic() + seconds if seconds else None
+        self.finished: Optional[float] = None
+        self.admitted = 0
+        self.threads: Dict[int, int] = {}  # thread ident -> nesting depth of armed requests
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.stats: Optional[pstats.Stats] = None
+        self.lock = threading.Lock()
+
+    @property
+    def accepting(self) -> bool:
+        if self.finished is not None:
+            return False
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return False
+        return self.remaining is None or self.remaining > 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "requests": self.requested,
+            "seconds": self.seconds,
+            "interval_ms": round(self.interval * 1000, 3) if self.mode == "sample" else None,
+            "started": self.started,
+            "finished": self.finished,
+            "requests_profiled": self.admitted,
+            "in_flight": len(self.threads),
+            "samples": self.samples if self.mode == "sample" else None
+        }
+
+
+class RequestProfiler:
+    """Profiles requests only while armed; begin_request is a single attribute check otherwise"""
+
+    def __init__(self, max_seconds: float = 300, max_requests: int = 1000):
+        self.max_seconds = max_seconds
+        self.max_requests = max_requests
+        self._session: Optional[_Session] = None
+        self._last: Optional[_Session] = None
+        self._lock = threading.Lock()
+
+    def arm(self, mode: str = "sample", requests: Optional[int] = None, seconds: Optional[float] = None,
+            interval_ms: float = 5.0) -> Dict:
+        if mode not in MODES:
+            raise ProfileError(f"mode must be one of {', '.join(MODES)}")
+        if not requests and not seconds:
+            raise ProfileError("give 'requests' and/or 'seconds' to bound the session")
+        if requests is not None and not 0 < requests <= self.max_requests:
+            raise ProfileError(f"requests must be between 1 and {self.max_requests}")
+        if seconds is not None and not 0 < seconds <= self.max_seconds:
+            raise ProfileError(f"seconds must be between 0 and {self.max_seconds}")
+        interval = min(max(interval_ms, 1.0), 1000.0) / 1000
+        with self._lock:
+            if self._session is not None:
+                raise ProfileError("a profiling session is already armed", 409)
+            session = _Session(mode, requests, seconds, interval)
+            self._session = session
+        if mode == "sample":
+            threading.Thread(target=self._sample, args=(session,), name="profiler-sampler", daemon=True).start()
+        if seconds:
+            timer = threading.Timer(seconds, self._expire, args=(session,))
+            timer.daemon = True
+            timer.start()
+        print(f"🔬 Profiling armed: {mode}, requests={requests}, seconds={seconds}")
+        return session.to_dict()
+
+    def disarm(self) -> Dict:
+        with self._lock:
+            session = self._session
+        if session is None:
+            raise ProfileError("no profiling session is armed", 409)
+        self._finish(session)
+        return session.to_dict()
+
+    def begin_request(self):
+        """Called at the start of every request; returns a token for end_request when profiled"""
+        session = self._session
+        if session is None:
+            return None
+        with session.lock:
+            if not session.accepting:
+                return None
+            if session.remaining is not None:
+                session.remaining -= 1
+            session.admitted += 1
+            ident = threading.get_ident()
+            session.threads[ident] = session.threads.get(ident, 0) + 1
+        profile = None
+        if session.mode == "cprofile":
+            profile = cProfile.Profile()
+            profile.enable()
+        return session, profile
+
+    def end_request(self, token) -> None:
+        if token is None:
+            return
+        session, profile = token
+        if profile is not None:
+            profile.disable()
+        with session.lock:
+            if profile is not None:
+                if session.stats is None:
+                    session.stats = pstats.Stats(profile)
+                else:
+                    session.stats.add(profile)
+            ident = threading.get_ident()
+            depth = session.threads.get(ident, 1) - 1
+            if depth:
+                session.threads[ident] = depth
+            else:
+                session.threads.pop(ident, None)
+            done = not session.accepting and not session.threads
+        if done:
+            self._finish(session)
+
+    def _expire(self, session: _Session) -> None:
+        with session.lock:
+            idle = not session.threads
+        if idle:
+            self._finish(session)
+        # otherwise the last in-flight request finishes the session in end_request
+
+    def _finish(self, session: _Session) -> None:
+        with self._lock:
+            if self._session is not session:
+                return
+            session.finished = time.time()
+            self._session = None
+            self._last = session
+        print(f"🔬 Profiling finished: {session.admitted} requests profiled")
+
+    def _sample(self, session: _Session) -> None:
+        """Wall-clock sampler over the threads currently serving profiled requests"""
+        own = threading.get_ident()
+        while session.finished is None:
+            time.sleep(session.interval)
+            with session.lock:
+                idents = [ident for ident in session.threads if ident != own]
+            if not idents:
+                continue
+            frames = sys._current_frames()
+            for ident in idents:
+                frame = frames.get(ident)
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                if labels:
+                    session.stacks[";".join(reversed(labels))] += 1
+                    session.samples += 1
+
+    def status(self) -> Dict:
+        session, last = self._session, self._last
+        return {
+            "armed": session.to_dict() if session else None,
+            "last": last.to_dict() if last else None
+        }
+
+    def dump(self, fmt: str = "text", limit: int = 50) -> Tuple[bytes, str]:
+        """Result of the last finished session as (body, mimetype)"""
+        session = self._last
+        if session is None:
+            raise ProfileError("no finished profiling session", 404)
+        if session.mode == "sample":
+            if fmt == "collapsed":
+                lines = [f"{stack} {count}" for stack, count in session.stacks.most_common()]
+                return ("\n".join(lines) + "\n").encode("utf-8"), "text/plain"
+            if fmt == "text":
+                return self._sample_summary(session, limit).encode("utf-8"), "text/plain"
+            raise ProfileError("sample sessions can be dumped as 'collapsed' or 'text'")
+        if session.stats is None:
+            raise ProfileError("the session profiled no requests", 404)
+        if fmt == "pstats":
+            # Same bytes Stats.dump_stats writes; load with pstats.Stats(path)
+            return marshal.dumps(session.stats.stats), "application/octet-stream"
+        if fmt == "text":
+            out = io.StringIO()
+            stats = pstats.Stats(stream=out)
+            stats.add(session.stats)
+            stats.sort_stats("cumulative").print_stats(limit)
+            return out.getvalue().encode("utf-8"), "text/plain"
+        raise ProfileError("cprofile sessions can be dumped as 'pstats' or 'text'")
+
+    @staticmethod
+    def _sample_summary(session: _Session, limit: int) -> str:
+        """Hottest functions by inclusive and exclusive sample counts"""
+        inclusive, exclusive = Counter(), Counter()
+        for stack, count in session.stacks.items():
+            frames = stack.split(";")
+            exclusive[frames[-1]] += count
+            for label in set(frames):
+                inclusive[label] += count
+        total = session.samples or 1
+        lines = [f"{session.samples} samples over {session.admitted} requests, "
+                 f"every {session.interval * 1000:.1f} ms", "", "  self%  total%  function"]
+        for label, count in inclusive.most_common(limit):
+            lines.append(f"{100 * exclusive[label] / total:6.1f}  {100 * count / total:6.1f}  {label}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Prompt Builder
+Compact Gemini prompts with dynamic few-shot selection and token accounting
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+
+# Fields the model is asked to produce; anything else is dropped from examples
+RESULT_FIELDS = ("command", "explanation", "confidence", "needs_file_search", "target_file", "action_type")
+
+# Seed examples, used until the library has learned better ones
+SEED_EXAMPLES = [
+    {"input": "show me all python files",
+     "output": {"command": "find . -name '*.py'", "explanation": "Find all Python files", "confidence": 0.95, "needs_file_search": False}},
+    {"input": "open adi.c in vscode",
+     "output": {"command": "code", "explanation": "Open file in VS Code", "confidence": 0.9, "needs_file_search": True, "target_file": "adi.c", "action_type": "open_file"}},
+    {"input": "list all files",
+     "output": {"command": "ls -la", "explanation": "List all files with details", "confidence": 1.0, "needs_file_search": False}},
+    {"input": "go to downloads folder",
+     "output": {"command": "cd ~/Downloads", "explanation": "Change to Downloads directory", "confidence": 0.95, "needs_file_search": False, "action_type": "change_directory"}},
+]
+
+FILE_HINT_WORDS = {"open", "edit", "file", "folder", "find", "search", "locate", "vscode", "code", "sublime"}
+
+_WORD_RE = re.compile(r"[\w.\-~/]+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens used for example similarity"""
+    return _WORD_RE.findall(text.lower())
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token) when the API gives no usage data"""
+    return max(1, (len(text) + 3) // 4)
+
+
+class ExampleLibrary:
+    """Bounded, persisted library of past successful translations"""
+
+    def __init__(self, path: Optional[str] = None, capacity: int = 500):
+        self.path = path
+        self.capacity = capacity
+        self.examples: List[Dict] = []
+        self._keys = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        examples = SEED_EXAMPLES
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    examples = json.load(f)
+            except Exception as e:
+                print(f"⚠️  Could not load example library {self.path}: {e}")
+        if self.capacity <= 0:
+            return
+        for example in examples[-self.capacity:]:
+            self._insert(example["input"], example["output"])
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump([{"input": e["input"], "output": e["output"]} for e in self.examples],
+                          f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"⚠️  Could not save example library {self.path}: {e}")
+
+    def _insert(self, user_input: str, output: Dict) -> bool:
+        key = " ".join(tokenize(user_input))
+        if not key or key in self._keys:
+            return False
+        self.examples.append({
+            "input": user_input,
+            "output": {k: output[k] for k in RESULT_FIELDS if k in output},
+            "key": key,
+            "tokens": set(key.split())
+        })
+        self._keys.add(key)
+        if len(self.examples) > self.capacity:
+            self._keys.discard(self.examples.pop(0)["key"])
+        return True
+
+    def add(self, user_input: str, output: Dict, persist: bool = True) -> None:
+        """Remember a translation that executed successfully"""
+        if "command" not in output or self.capacity <= 0:
+            return
+        with self._lock:
+            if self._insert(user_input, output) and persist:
+                self._save()
+
+    def most_relevant(self, text: str, k: int = 3) -> List[Dict]:
+        """Return the k examples whose inputs overlap most with text"""
+        query = set(tokenize(text))
+        with self._lock:
+            scored = []
+            for position, example in enumerate(self.examples):
+                overlap = len(query & example["tokens"])
+                if not overlap:
+                    continue
+                # Jaccard similarity, ties broken towards recently learned examples
+                score = overlap / len(query | example["tokens"])
+                scored.append((score, position, example))
+        scored.sort(key=lambda item: (item[0], item[1]), reverse=True)
+        return [example for _, _, example in scored[:k]]
+
+    def __len__(self) -> int:
+        return len(self.examples)
+
+
+class PromptBuilder:
+    """Builds the translation prompt from a compact template and relevant examples"""
+
+    def __init__(self, library: ExampleLibrary, k: int = 3):
+        self.library = library
+        self.k = k
+
+    def build(self, text: str, current_dir: str, context: str = "") -> Tuple[str, List[Dict]]:
+        """Return the prompt and the examples that were included in it"""
+        words = set(tokenize(text))
+        wants_files = bool(words & FILE_HINT_WORDS) or any("." in w.strip(".") for w in words)
+
+        fields = '"command" (exact macOS/Linux command), "explanation" (short), "confidence" (0.0-1.0), "needs_file_search" (bool)'
+        if wants_files:
+            fields += ', "target_file" (file/folder to search for when needs_file_search is true)'
+        fields += ', "action_type" (execute|open_file|open_app|change_directory|search)'
+
+        lines = [
+            "Convert the user's request into a terminal command.",
+            f"Current directory: {current_dir}",
+        ]
+        if context:
+            lines.append(context)
+            lines.append("If the file is listed above, use its path directly instead of setting needs_file_search.")
+        lines += [
+            f"Reply with ONLY a JSON object with keys: {fields}.",
+        ]
+        if wants_files:
+            lines.append("To open files in apps, give the app command (code, open, subl, etc.).")
+
+        examples = self.library.most_relevant(text, self.k)
+        if examples:
+            lines.append("Examples:")
+            for example in examples:
+                lines.append(f'"{example["input"]}" → {json.dumps(example["output"], separators=(",", ":"), ensure_ascii=False)}')
+
+        lines.append(f'Request: "{text}"')
+        lines.append("JSON:")
+        return "\n".join(lines), examples
+
+
+class TokenAccounting:
+    """Per-call record of prompt/response tokens and latency"""
+
+    def __init__(self, window: int = 200):
+        self.calls = deque(maxlen=window)
+        self.total_calls = 0
+        self.total_input_tokens = 0
+        self.total_output_tokens = 0
+        self.total_latency = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, prompt: str, response=None, latency: float = 0.0, examples_used: int = 0) -> Dict:
+        """Record one model call; token counts come from usage metadata when present"""
+        usage = getattr(response, "usage_metadata", None) if response is not None else None
+        input_tokens = getattr(usage, "prompt_token_count", None) if usage else None
+        output_tokens = getattr(usage, "candidates_token_count", None) if usage else None
+        estimated = input_tokens is None or output_tokens is None
+
+        if input_tokens is None:
+            input_tokens = estimate_tokens(prompt)
+        if output_tokens is None:
+            text = getattr(response, "text", "") if response is not None else ""
+            output_tokens = estimate_tokens(text) if text else 0
+
+        entry = {
+            "timestamp": time.time(),
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "latency_ms": round(latency * 1000, 1),
+            "prompt_chars": len(prompt),
+            "examples_used": examples_used,
+            "estimated": estimated
+        }
+        with self._lock:
+            self.calls.append(entry)
+            self.total_calls += 1
+            self.total_input_tokens += input_tokens
+            self.total_output_tokens += output_tokens
+            self.total_latency += latency
+        return entry
+
+    def summary(self, recent: int = 20) -> Dict:
+        with self._lock:
+            calls = self.total_calls
+            return {
+                "total_calls": calls,
+                "total_input_tokens": self.total_input_tokens,
+                "total_output_tokens": self.total_output_tokens,
+                "avg_input_tokens": round(self.total_input_tokens / calls, 1) if calls else 0,
+                "avg_output_tokens": round(self.total_output_tokens / calls, 1) if calls else 0,
+                "avg_latency_ms": round(self.total_latency * 1000 / calls, 1) if calls else 0,
+                # [-0:] would be the whole list
+                "recent_calls": list(self.calls)[-recent:] if recent > 0 else []
+            }
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Model Call Resilience
+Deadlines, hedged requests and a circuit breaker around Gemini calls
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Optional
+
+
+class ModelTimeoutError(Exception):
+    """Raised when a model call misses its deadline"""
+
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker is rejecting model calls"""
+
+
+class CircuitBreaker:
+    """Classic closed / open / half-open circuit breaker"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.total_failures = 0
+        self.total_successes = 0
+        self.times_opened = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Return True if a call may go through to the model"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.recovery_timeout:
+                    return False
+                # Recovery window elapsed: let a single probe through
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.total_successes += 1
+            self.consecutive_failures = 0
+            self.state = self.CLOSED
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.total_failures += 1
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict:
+        """Breaker state for the health endpoint"""
+        with self._lock:
+            retry_in = 0.0
+            if self.state == self.OPEN:
+                retry_in = max(0.0, self.recovery_timeout - (time.monotonic() - self.opened_at))
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout": self.recovery_timeout,
+                "retry_in_seconds": round(retry_in, 2),
+                "times_opened": self.times_opened,
+                "total_failures": self.total_failures,
+                "total_successes": self.total_successes
+            }
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies used to pick the hedge delay"""
+
+    def __init__(self, window: int = 100):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class GuardedModel:
+    """Runs model calls with a deadline, optional hedging and a circuit breaker"""
+
+    def __init__(self, timeout: float = 15.0, hedge_enabled: bool = False,
+                 hedge_min_samples: int = 20, hedge_default_delay: float = 2.0,
+                 breaker: Optional[CircuitBreaker] = None, max_workers: int = 8):
+        self.timeout = timeout
+        self.hedge_enabled = hedge_enabled
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_default_delay = hedge_default_delay
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies = LatencyTracker()
+        self.timeouts = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model-call")
+
+    def hedge_delay(self) -> float:
+        """Delay before a duplicate request is sent: the observed p95 latency"""
+        if len(self.latencies) < self.hedge_min_samples:
+            return self.hedge_default_delay
+        return self.latencies.percentile(95) or self.hedge_default_delay
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """Call fn(*args, **kwargs) under the breaker and deadline"""
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Model circuit breaker is open")
+
+        start = time.monotonic()
+        deadline = start + self.timeout
+        primary = self._executor.submit(fn, *args, **kwargs)
+        pending = {primary}
+        hedge = None
+
+        try:
+            if self.hedge_enabled:
+                delay = min(self.hedge_delay(), self.timeout)
+                done, _ = wait(pending, timeout=delay)
+                if not done:
+                    hedge = self._executor.submit(fn, *args, **kwargs)
+                    pending.add(hedge)
+                    self.hedges_sent += 1
+
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        if future is hedge:
+                            self.hedges_won += 1
+                        self.latencies.record(time.monotonic() - start)
+                        self.breaker.record_success()
+                        return future.result()
+                if not pending:
+                    raise next(iter(done)).exception()
+        except Exception:
+            self.breaker.record_failure()
+            raise
+
+        # Deadline missed; the worker threads are abandoned and finish on their own
+        for future in pending:
+            future.cancel()
+        self.timeouts += 1
+        self.latencies.record(self.timeout)
+        self.breaker.record_failure()
+        raise ModelTimeoutError(f"Model call exceeded {self.timeout:.1f}s deadline")
+
+    def stats(self) -> Dict:
+        p50 = self.latencies.percentile(50)
+        p95 = self.latencies.percentile(95)
+        return {
+            "timeout_seconds": self.timeout,
+            "hedging_enabled": self.hedge_enabled,
+            "hedge_delay_seconds": round(self.hedge_delay(), 3),
+            "hedges_sent": self.hedges_sent,
+            "hedges_won": self.hedges_won,
+            "timeouts": self.timeouts,
+            "latency_p50_seconds": round(p50, 3) if p50 is not None else None,
+            "latency_p95_seconds": round(p95, 3) if p95 is not None else None,
+            "circuit_breaker": self.breaker.snapshot()
+        }
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Serve
+Production launcher: N gunicorn-served worker processes accept on one shared
+listening socket, with a local message bus for Socket.IO fan-out and cache
+replication. Socket.IO is WebSocket-only here, since nothing routes a
+long-polling session back to the same worker.
+"""
+
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from message_bus import Broker
+
+
+def run_worker(fd: int, threads: int) -> None:
+    """Serve the app with gunicorn's threaded worker on the inherited socket.
+
+    The app joins the bus from the environment when it is imported. Each
+    WebSocket holds one of the threads for as long as it is open.
+    """
+    from gunicorn.app.base import BaseApplication
+
+    class WorkerApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", [f"fd://{fd}"])
+            self.cfg.set("workers", 1)
+            self.cfg.set("worker_class", "gthread")
+            self.cfg.set("threads", threads)
+            self.cfg.set("graceful_timeout", 4)
+            self.cfg.set("proc_name", f"nlshell-worker-{os.getenv('NLSHELL_WORKER_ID')}")
+
+        def load(self):
+            import app
+            app.model.warm()
+            print(f"👷 Worker {app.WORKER_ID} (pid {os.getpid()}) ready")
+            return app.app
+
+    WorkerApplication().run()
+
+
+def supervise(args: argparse.Namespace) -> None:
+    listener = socket.create_server((args.host, args.port), backlog=args.backlog)
+    listener.set_inheritable(True)
+    bus_path = os.path.join(tempfile.gettempdir(), f"nlshell-bus-{os.getpid()}.sock")
+    broker = Broker(bus_path)
+    broker.start()
+
+    def spawn(worker_id: int) -> subprocess.Popen:
+        return subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--worker", "--fd", str(listener.fileno()),
+             "--threads", str(args.threads)],
+            env={**os.environ, "NLSHELL_BUS": bus_path, "NLSHELL_WORKER_ID": str(worker_id)},
+            pass_fds=[listener.fileno()]
+        )
+
+    print("\n" + "="*60)
+    print(f"🚀 Starting {args.workers} workers on http://{args.host}:{args.port}")
+    print("="*60 + "\n")
+    workers = {i: spawn(i) for i in range(args.workers)}
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while not stopping:
+        for worker_id, proc in list(workers.items()):
+            if proc.poll() is not None and not stopping:
+                print(f"⚠️  Worker {worker_id} exited with code {proc.returncode}, restarting")
+                workers[worker_id] = spawn(worker_id)
+        time.sleep(1.0)
+
+    print("🛑 Stopping workers...")
+    for proc in workers.values():
+        proc.terminate()
+    for proc in workers.values():
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    broker.close()
+    listener.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the backend as several worker processes on one port")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_WORKERS", os.cpu_count() or 2)))
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "5002")))
+    parser.add_argument("--threads", type=int, default=int(os.getenv("WEB_THREADS", "32")),
+                        help="request threads per worker; each open WebSocket holds one")
+    parser.add_argument("--backlog", type=int, default=1024)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--fd", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.fd, args.threads)
+    else:
+        supervise(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Shared State
+Small key/value table in SQLite for state every worker process must agree on
+"""
+
+import json
+import sqlite3
+import threading
+from typing import Any
+
+
+class SharedState:
+    """Values are JSON; each thread reads through its own connection"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS shared_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def get(self, key: str, default: Any = None) -> Any:
+        row = self._conn().execute("SELECT value FROM shared_state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, key: str, value: Any) -> None:
+        with self._conn() as conn:
+            conn.execute("INSERT INTO shared_state (key, value) VALUES (?, ?) "
+                         "ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, json.dumps(value)))
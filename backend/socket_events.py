@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Socket Events
+Compact command summaries and coalesced, room-scoped Socket.IO broadcasts
+"""
+
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+SUMMARY_CHARS = 120
+
+# Clients that want every command, not just their own session's
+HISTORY_ROOM = "history"
+
+
+def session_room(session_id: str) -> str:
+    return f"session:{session_id}"
+
+
+def command_delta(entry_id: int, entry: Dict) -> Dict:
+    """What a client needs to render an executed command; the rest is at /api/history/<id>"""
+    result = entry.get("result") or {}
+    output = result.get("output") or ""
+    text = output if result.get("success") else (result.get("error") or output)
+    lines = text.strip().splitlines()
+    return {
+        "id": entry_id,
+        "timestamp": entry.get("timestamp"),
+        "user_input": entry.get("user_input"),
+        "command": entry.get("command"),
+        "status": "success" if result.get("success") else "error",
+        "executor": result.get("executor"),
+        "summary": lines[0][:SUMMARY_CHARS] if lines else "",
+        "output_size": len(output),
+        "directory": entry.get("directory")
+    }
+
+
+class EventBroadcaster:
+    """Buffers events briefly and emits each buffer as one batch per event and room set"""
+
+    def __init__(self, emit: Callable[[str, Dict, List[str]], None], window: float = 0.05,
+                 max_batch: int = 100):
+        self.emit = emit
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: Dict[Tuple[str, Tuple[str, ...]], List[Dict]] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"published": 0, "emits": 0}
+
+    def publish(self, event: str, payload: Dict, rooms: List[str]) -> None:
+        """Queue payload for everyone in any of rooms (each client receives it once)"""
+        key = (event, tuple(sorted(set(rooms))))
+        with self._cond:
+            self._pending.setdefault(key, []).append(payload)
+            self.stats["published"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="socket-events", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            # Let the rest of a burst arrive so it goes out together
+            time.sleep(self.window)
+            with self._cond:
+                pending, self._pending = self._pending, {}
+            for (event, rooms), payloads in pending.items():
+                for start in range(0, len(payloads), self.max_batch):
+                    try:
+                        self.emit(event, {"events": payloads[start:start + self.max_batch]}, list(rooms))
+                        self.stats["emits"] += 1
+                    except Exception as e:
+                        print(f"⚠️  Socket broadcast error: {e}")
+
+    def get_stats(self) -> Dict:
+        with self._cond:
+            return {**self.stats, "pending": sum(len(p) for p in self._pending.values())}
+
+
+class OutputRelay:
+    """Carries one command's output chunks from the executor loop to its client.
+
+    push() only enqueues, so the event loop never waits on a socket write; a
+    background task emits them in order, merging chunks that queued up meanwhile.
+    """
+
+    def __init__(self, emit: Callable[[str, str], None], start_task: Callable):
+        self.emit = emit
+        self._queue: "queue.Queue[Optional[Tuple[str, str]]]" = queue.Queue()
+        self._task = start_task(self._run)
+
+    def push(self, stream: str, text: str) -> None:
+        self._queue.put((stream, text))
+
+    def close(self) -> None:
+        """Send what is left and wait, so output reaches the client before the result"""
+        self._queue.put(None)
+        self._task.join()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while batch[-1] is not None:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            merged: List[List[str]] = []
+            for item in batch:
+                if item is None:
+                    break
+                if merged and merged[-1][0] == item[0]:
+                    merged[-1][1] += item[1]
+                else:
+                    merged.append(list(item))
+            for stream, text in merged:
+                try:
+                    self.emit(stream, text)
+                except Exception as e:
+                    print(f"⚠️  Output relay error: {e}")
+            if batch[-1] is None:
+                return
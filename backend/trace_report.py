@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Trace Report
+Prints the slowest traces from the JSONL trace files, with their span trees
+
+    python trace_report.py [--top 10] [--name voice] [--since 60] [FILE ...]
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+from typing import Dict, Iterator, List
+
+DEFAULT_PATTERN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "traces*.jsonl*")
+
+
+def read_traces(paths: List[str]) -> Iterator[Dict]:
+    for path in paths:
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # partially written last line
+
+
+def print_trace(trace: Dict) -> None:
+    started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(trace["start"]))
+    attrs = trace.get("attributes", {})
+    print(f"\n{trace['duration_ms']:9.1f} ms  {trace['name']}  {started}  trace={trace['trace_id'][:12]}")
+    print(f"            input: {attrs.get('input')!r}  →  {attrs.get('command')!r} "
+          f"[{attrs.get('executor')}, {'ok' if attrs.get('success') else 'failed'}]")
+
+    children: Dict[str, List[Dict]] = {}
+    for span in trace["spans"]:
+        children.setdefault(span["parent_id"], []).append(span)
+
+    def walk(parent_id, depth: int) -> None:
+        for span in sorted(children.get(parent_id, []), key=lambda s: s["start"]):
+            offset = (span["start"] - trace["start"]) * 1000
+            duration = span["duration_ms"] if span["duration_ms"] is not None else float("nan")
+            extra = {k: v for k, v in span["attributes"].items() if k not in ("input", "command")}
+            details = " ".join(f"{k}={v}" for k, v in extra.items())
+            error = f"  ❌ {span['error']}" if span.get("error") else ""
+            print(f"  {offset:+8.1f} ms {duration:9.1f} ms  {'  ' * depth}{span['name']}  {details}{error}")
+            walk(span["span_id"], depth + 1)
+
+    root = next((s for s in trace["spans"] if s["parent_id"] is None), None)
+    if root:
+        walk(root["span_id"], 0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Show the slowest recorded traces")
+    parser.add_argument("files", nargs="*", help=f"trace files (default: {DEFAULT_PATTERN})")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--name", help="only traces with this root name (execute, voice)")
+    parser.add_argument("--since", type=float, help="only traces from the last N minutes")
+    args = parser.parse_args()
+
+    paths = args.files or sorted(glob.glob(DEFAULT_PATTERN))
+    if not paths:
+        print("No trace files found")
+        return
+
+    cutoff = time.time() - args.since * 60 if args.since else None
+    traces = [t for t in read_traces(paths)
+              if (not args.name or t["name"] == args.name) and (cutoff is None or t["start"] >= cutoff)]
+    traces.sort(key=lambda t: t["duration_ms"], reverse=True)
+
+    print(f"🐢 {min(args.top, len(traces))} slowest of {len(traces)} traces")
+    for trace in traces[:args.top]:
+        print_trace(trace)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Tracing
+Sampled per-request traces with nested spans, written asynchronously to a
+rotating JSONL file (one trace per line)
+"""
+
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class Span:
+    """One timed step; start is wall-clock epoch seconds, duration is measured monotonically"""
+
+    __slots__ = ("trace", "name", "span_id", "parent_id", "start", "_t0", "duration", "attributes", "error")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def end(self) -> None:
+        if self.duration is None:
+            self.duration = time.perf_counter() - self._t0
+
+    def to_dict(self) -> Dict:
+        record = {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "attributes": self.attributes
+        }
+        if self.error:
+            record["error"] = self.error
+        return record
+
+
+class Trace:
+    """A sampled request: its root span and every span opened beneath it"""
+
+    __slots__ = ("trace_id", "spans", "root", "_lock")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.trace_id = uuid.uuid4().hex
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self.root = self.add(name, None, attributes)
+
+    def add(self, name: str, parent_id: Optional[str], attributes: Dict[str, Any]) -> Span:
+        span = Span(self, name, parent_id, attributes)
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            spans = [span.to_dict() for span in self.spans]
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "start": round(self.root.start, 6),
+            "duration_ms": round((self.root.duration or 0.0) * 1000, 3),
+            "attributes": self.root.attributes,
+            "spans": spans
+        }
+
+
+# The span new spans nest under; None when the current request isn't sampled
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+class TraceSink:
+    """Background writer appending trace lines to path, rotating at max_bytes"""
+
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 * 1024, backups: int = 3, queue_size: int = 10000):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._queue: "queue.Queue[Dict]" = queue.Queue(maxsize=queue_size)
+        self.stats = {"written": 0, "dropped": 0, "rotations": 0}
+        self._failing = False
+        threading.Thread(target=self._run, name="trace-sink", daemon=True).start()
+
+    def write(self, record: Dict) -> None:
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    def flush(self) -> None:
+        self._queue.join()
+
+    def _open(self):
+        try:
+            handle = open(self.path, "a", encoding="utf-8")
+        except OSError as e:
+            if not self._failing:
+                print(f"⚠️  Trace sink cannot open {self.path}, dropping traces: {e}")
+            self._failing = True
+            return None
+        self._failing = False
+        return handle
+
+    def _run(self) -> None:
+        # Never dies: records that cannot be written are dropped, so flush() always returns
+        handle = self._open()
+        while True:
+            batch = [self._queue.get()]
+            # Drain whatever else is waiting before flushing once
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if handle is None:
+                    handle = self._open()
+                if handle is None:
+                    self.stats["dropped"] += len(batch)
+                    continue
+                for record in batch:
+                    handle.write(json.dumps(record, separators=(",", ":"), default=str) + "\n")
+                handle.flush()
+                self.stats["written"] += len(batch)
+                if handle.tell() >= self.max_bytes:
+                    handle.close()
+                    handle = None
+                    self._rotate()
+                    handle = self._open()
+            except Exception as e:
+                print(f"⚠️  Trace sink write failed: {e}")
+                self.stats["dropped"] += len(batch)
+                if handle is not None:
+                    try:
+                        handle.close()
+                    except OSError:
+                        pass
+                # Reopened for the next batch
+                handle = None
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _rotate(self) -> None:
+        for index in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{index}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+        self.stats["rotations"] += 1
+
+
+class Tracer:
+    """Head-sampled tracing: the sampling decision is made once, when a trace starts"""
+
+    def __init__(self, sink: Optional[TraceSink], sample_rate: float = 0.1):
+        self.sink = sink
+        self.sample_rate = sample_rate
+        self.stats = {"started": 0, "sampled": 0}
+
+    def start(self, name: str, force: bool = False, **attributes: Any) -> Optional[Span]:
+        """Root span of a new trace, or None if this request isn't sampled"""
+        self.stats["started"] += 1
+        if self.sink is None or not (force or random.random() < self.sample_rate):
+            return None
+        self.stats["sampled"] += 1
+        return Trace(name, attributes).root
+
+    def finish(self, root: Optional[Span]) -> None:
+        if root is None:
+            return
+        root.end()
+        self.sink.write(root.trace.to_dict())
+
+    @contextmanager
+    def trace(self, name: str, force: bool = False, **attributes: Any) -> Iterator[Optional[Span]]:
+        """Start a trace, make it current for the block and write it out afterwards"""
+        root = self.start(name, force, **attributes)
+        if root is None:
+            yield None
+            return
+        with self.activate(root):
+            try:
+                yield root
+            except Exception as e:
+                root.error = repr(e)
+                raise
+            finally:
+                self.finish(root)
+
+    @contextmanager
+    def activate(self, span: Optional[Span]) -> Iterator[Optional[Span]]:
+        """Make span the parent of spans opened in this block (e.g. in a callback thread)"""
+        token = _current.set(span)
+        try:
+            yield span
+        finally:
+            _current.reset(token)
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "sample_rate": self.sample_rate,
+                "sink": {"path": self.sink.path, **self.sink.stats} if self.sink else None}
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Child of the current span; a no-op outside a sampled trace"""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.trace.add(name, parent.span_id, attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except Exception as e:
+        child.error = repr(e)
+        raise
+    finally:
+        child.end()
+        _current.reset(token)
+
+
+def record_span(name: str, duration: float, end: Optional[float] = None, **attributes: Any) -> None:
+    """Add an already-measured span (e.g. timed by the client) under the current span"""
+    parent = _current.get()
+    if parent is None:
+        return
+    child = parent.trace.add(name, parent.span_id, attributes)
+    child.duration = duration
+    child.start = (end if end is not None else time.time()) - duration
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Typo Correction
+BK-tree over known executables, builtins and frequent history commands
+"""
+
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+
+# Builtins implemented by mini-bash (builtin.c) and the backend itself
+BUILTINS = ["cd", "pwd", "echo", "exit", "history", "jobs", "fg", "bg",
+            "mkdir", "rmdir", "touch", "rm", "cp", "mv"]
+
+# POSIX and bash builtins and keywords; they are not on PATH but the system shell runs them
+SHELL_BUILTINS = [".", ":", "[", "[[", "!", "{", "alias", "bind", "break", "builtin", "caller",
+                  "case", "command", "compgen", "complete", "compopt", "continue", "coproc",
+                  "declare", "dirs", "disown", "do", "done", "elif", "else", "enable", "esac",
+                  "eval", "exec", "export", "false", "fc", "fi", "for", "function", "getopts",
+                  "hash", "help", "if", "kill", "let", "local", "logout", "mapfile", "popd",
+                  "printf", "pushd", "read", "readarray", "readonly", "return", "select", "set",
+                  "shift", "shopt", "source", "suspend", "test", "then", "time", "times", "trap",
+                  "true", "type", "typeset", "ulimit", "umask", "unalias", "unset", "until",
+                  "wait", "while"]
+
+# Aliases most distributions ship; names from the user's rc files are added at index time
+COMMON_ALIASES = ["l", "la", "ll"]
+ALIAS_FILES = ["~/.bashrc", "~/.bash_aliases", "~/.zshrc", "~/.aliases"]
+ALIAS_PATTERN = re.compile(r"^\s*alias\s+(?:-\S+\s+)*([^\s=]+)=", re.MULTILINE)
+
+# Pipes, redirections, lists, substitutions and globs only appear in shell input
+SHELL_SYNTAX = re.compile(r"[|<>;&$`*?]")
+
+# Everyday commands, used to break ties between equally close candidates
+COMMON_COMMANDS = {"ls", "cd", "cat", "git", "grep", "find", "less", "head", "tail", "ps",
+                   "top", "df", "du", "make", "python3", "pip", "npm", "node", "vim", "nano",
+                   "code", "ssh", "curl", "open", "clear", "man", "which", "kill", "tar"}
+
+# Never auto-correct into these; a wrong guess could destroy data
+DESTRUCTIVE_COMMANDS = {"rm", "rmdir", "mv", "cp", "dd", "kill", "killall", "pkill",
+                        "shred", "truncate", "chmod", "chown", "mkfs", "shutdown", "reboot"}
+
+# Words that mark an input as natural language rather than a mistyped command
+NATURAL_LANGUAGE_WORDS = {
+    "a", "an", "the", "me", "my", "all", "to", "in", "of", "for", "on", "and",
+    "please", "show", "what", "how", "which", "where", "is", "are", "can", "you",
+    "open", "go", "list", "find", "with", "from", "into", "this", "that"
+}
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Optimal string alignment distance (Levenshtein plus adjacent transpositions)"""
+    if a == b:
+        return 0
+    if not a:
+        return len(b)
+    if not b:
+        return len(a)
+
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def shell_aliases() -> List[str]:
+    """Alias names defined in the user's shell rc files"""
+    names = []
+    for path in ALIAS_FILES:
+        try:
+            with open(os.path.expanduser(path), errors="replace") as f:
+                names.extend(ALIAS_PATTERN.findall(f.read()))
+        except OSError:
+            continue
+    return names
+
+
+class BKTree:
+    """Burkhard-Keller tree for nearest-neighbour lookups under edit distance"""
+
+    def __init__(self):
+        self.root: Optional[Tuple[str, Dict[int, tuple]]] = None
+        self.size = 0
+
+    def add(self, word: str) -> None:
+        if self.root is None:
+            self.root = (word, {})
+            self.size = 1
+            return
+        node = self.root
+        while True:
+            distance = edit_distance(word, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (word, {})
+                self.size += 1
+                return
+            node = child
+
+    def search(self, word: str, max_distance: int) -> List[Tuple[int, str]]:
+        """All words within max_distance, closest first"""
+        if self.root is None:
+            return []
+        results = []
+        stack = [self.root]
+        while stack:
+            candidate, children = stack.pop()
+            distance = edit_distance(word, candidate)
+            if distance <= max_distance:
+                results.append((distance, candidate))
+            low, high = distance - max_distance, distance + max_distance
+            for child_distance, child in children.items():
+                if low <= child_distance <= high:
+                    stack.append(child)
+        results.sort()
+        return results
+
+    def __len__(self) -> int:
+        return self.size
+
+
+class TypoCorrector:
+    """Recognises mistyped direct commands before they reach Gemini or the executors"""
+
+    def __init__(self, history_min_count: int = 2):
+        self.history_min_count = history_min_count
+        self.known_words = set(BUILTINS) | set(SHELL_BUILTINS) | set(COMMON_ALIASES)
+        self.word_tree = BKTree()
+        self.history_tree = BKTree()
+        self.history_counts: Counter = Counter()
+        self._path = None
+        self._lock = threading.Lock()
+        self.stats = {"corrected": 0, "suggested": 0, "passed_through": 0}
+
+    def _refresh_executables(self) -> None:
+        """Rebuild the executable index when PATH changes"""
+        path = os.environ.get("PATH", "")
+        if path == self._path:
+            return
+
+        words = set(BUILTINS) | set(SHELL_BUILTINS) | set(COMMON_ALIASES) | set(shell_aliases())
+        for directory in path.split(os.pathsep):
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.is_file() and os.access(entry.path, os.X_OK):
+                            words.add(entry.name)
+            except OSError:
+                continue
+
+        tree = BKTree()
+        for word in sorted(words):
+            if any(c.isalnum() for c in word):
+                tree.add(word)
+        for command in self.history_counts:
+            tree.add(command.split()[0])
+        self.known_words = words | {c.split()[0] for c in self.history_counts}
+        self.word_tree = tree
+        self._path = path
+
+    def warm(self) -> None:
+        """Build the executable index ahead of the first lookup"""
+        with self._lock:
+            self._refresh_executables()
+
+    def learn(self, command: str) -> None:
+        """Count a successfully executed command; frequent ones become correction targets"""
+        command = " ".join(command.split())
+        if not command:
+            return
+        with self._lock:
+            self.history_counts[command] += 1
+            if self.history_counts[command] == self.history_min_count:
+                self.history_tree.add(command)
+                first = command.split()[0]
+                if first not in self.known_words:
+                    self.known_words.add(first)
+                    self.word_tree.add(first)
+
+    def looks_like_command(self, words: List[str]) -> bool:
+        if not words or len(words) > 4:
+            return False
+        return not any(w.lower() in NATURAL_LANGUAGE_WORDS for w in words)
+
+    def clearly_command(self, text: str, words: List[str]) -> bool:
+        """Flags, paths or shell syntax mark input that is meant for the shell, not for translation"""
+        return bool(SHELL_SYNTAX.search(text)) or any(
+            w.startswith("-") or w.startswith("~") or "/" in w for w in words[1:])
+
+    def check(self, text: str) -> Optional[Dict]:
+        """Return a correction or suggestions for a mistyped command, or None to pass through
+
+        Only an unknown executable is corrected, and only when the input is clearly a command
+        or the correction is already in history; anything else, including what the system
+        shell would run as typed, at most gets suggestions.
+        """
+        words = text.split()
+        if not self.looks_like_command(words):
+            return None
+        if "/" in words[0] or "=" in words[0]:
+            return None
+
+        with self._lock:
+            self._refresh_executables()
+            first = words[0]
+
+            if first in self.known_words:
+                # Executable is fine; the subcommand may still be a typo of a frequent command
+                normalized = " ".join(words)
+                if normalized in self.history_counts or len(self.history_tree) == 0:
+                    self.stats["passed_through"] += 1
+                    return None
+                # Only subcommand-like words are corrected, never file arguments
+                if first in DESTRUCTIVE_COMMANDS or not all(
+                        w.isalpha() and not os.path.exists(w) for w in words[1:]):
+                    self.stats["passed_through"] += 1
+                    return None
+                matches = [m for m in self.history_tree.search(normalized, 2)
+                           if m[1].split()[0] == first and len(m[1].split()) == len(words)]
+                if not matches:
+                    self.stats["passed_through"] += 1
+                    return None
+                # The shell accepts the executable, so the input runs as typed
+                self.stats["suggested"] += 1
+                return {"command": None, "original": text, "suggestions": [m[1] for m in matches[:5]]}
+
+            if len(first) < 2:
+                return None
+            max_distance = 1 if len(first) <= 4 else 2
+            matches = self.word_tree.search(first, max_distance)
+            if not matches:
+                self.stats["passed_through"] += 1
+                return None
+
+        best_distance = matches[0][0]
+        best = [word for distance, word in matches if distance == best_distance]
+        suggestions = [" ".join([word] + words[1:]) for _, word in matches[:5]]
+
+        # Break ties: swapped letters first, then commands the user runs, then everyday commands
+        tie_breakers = [
+            lambda word: sorted(word) == sorted(first),
+            lambda word: any(c.split()[0] == word for c in self.history_counts),
+            lambda word: word in COMMON_COMMANDS or word in BUILTINS,
+        ]
+        for prefer in tie_breakers:
+            if len(best) == 1:
+                break
+            best = [word for word in best if prefer(word)] or best
+
+        command = " ".join([best[0]] + words[1:])
+        # Plain words ('hello', 'clean up') are more likely English than a typo; leave those to translation
+        if len(best) == 1 and best[0] not in DESTRUCTIVE_COMMANDS and (
+                self.clearly_command(text, words) or command in self.history_counts):
+            self.stats["corrected"] += 1
+            return {"command": command, "original": text,
+                    "suggestions": [command] + [c for c in suggestions if c != command][:4]}
+
+        self.stats["suggested"] += 1
+        return {"command": None, "original": text, "suggestions": suggestions}
+
+    def get_stats(self) -> Dict:
+        return {**self.stats, "known_words": len(self.word_tree), "history_commands": len(self.history_tree)}
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Wire Format
+Fast JSON, optional MessagePack and negotiated gzip/zstd for REST and Socket.IO
+"""
+
+import gzip
+import json
+from datetime import date, datetime
+from typing import Any, Optional
+
+from flask import Flask, Response, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+MSGPACK_MIMETYPE = "application/msgpack"
+
+COMPRESSIBLE = {"application/json", MSGPACK_MIMETYPE, "text/plain", "text/html", "text/css",
+                "application/javascript"}
+
+
+def _default(value: Any) -> Any:
+    """Fallback for types neither encoder handles natively"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+
+def dumps(value: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(value, default=_default, separators=(",", ":"))
+
+
+def loads(data: Any) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider using orjson, answering with MessagePack when the client asks for it"""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return dumps(obj)
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        if msgpack is not None and wants_msgpack():
+            body = msgpack.packb(obj, default=_default, use_bin_type=True)
+            return self._app.response_class(body, mimetype=MSGPACK_MIMETYPE)
+        return self._app.response_class(f"{self.dumps(obj)}\n", mimetype=self.mimetype)
+
+
+def wants_msgpack() -> bool:
+    """True if the request's Accept header prefers MessagePack over JSON"""
+    accept = request.accept_mimetypes
+    return accept[MSGPACK_MIMETYPE] > 0 and accept[MSGPACK_MIMETYPE] >= accept["application/json"]
+
+
+class SocketIOJSON:
+    """json-module stand-in for python-socketio packets"""
+
+    @staticmethod
+    def dumps(obj: Any, *args: Any, **kwargs: Any) -> str:
+        return dumps(obj)
+
+    @staticmethod
+    def loads(s: Any, *args: Any, **kwargs: Any) -> Any:
+        return loads(s)
+
+
+def _choose_encoding(accept_encoding) -> Optional[str]:
+    """Best of zstd/gzip the client accepts (q > 0), zstd winning ties"""
+    options = []
+    if zstandard is not None and accept_encoding["zstd"] > 0:
+        options.append((accept_encoding["zstd"], 1, "zstd"))
+    if accept_encoding["gzip"] > 0:
+        options.append((accept_encoding["gzip"], 0, "gzip"))
+    return max(options)[2] if options else None
+
+
+class Compressor:
+    """after_request hook compressing responses of at least min_size bytes"""
+
+    def __init__(self, min_size: int = 1024, gzip_level: int = 5, zstd_level: int = 3):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self._zstd = zstandard.ZstdCompressor(level=zstd_level) if zstandard is not None else None
+        self.stats = {"compressed": 0, "bytes_in": 0, "bytes_out": 0}
+
+    def __call__(self, response: Response) -> Response:
+        if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+                or response.status_code in (204, 304) or "Content-Encoding" in response.headers
+                or response.mimetype not in COMPRESSIBLE):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = _choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+        if encoding == "zstd":
+            compressed = self._zstd.compress(body)
+        else:
+            compressed = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        self.stats["compressed"] += 1
+        self.stats["bytes_in"] += len(body)
+        self.stats["bytes_out"] += len(compressed)
+        return response
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        if stats["bytes_in"]:
+            stats["ratio"] = round(stats["bytes_out"] / stats["bytes_in"], 3)
+        return {**stats, "json": "orjson" if orjson else "json",
+                "msgpack": msgpack is not None, "zstd": zstandard is not None}
+
+
+def install(app: Flask, min_size: int = 1024) -> Compressor:
+    """Switch app to the fast JSON provider and register response compression"""
+    app.json = FastJSONProvider(app)
+    compressor = Compressor(min_size=min_size)
+    app.after_request(compressor)
+    return compressor
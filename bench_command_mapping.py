@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Command Mapping Benchmark
+Times VoiceCommandProcessor.map_command against generated mapping tables of
+50 to 50k phrases with mixed Hindi/English inputs (exact, noisy, embedded in
+a sentence, code-mixed, late table entries and misses), checks accuracy, and
+fails when latency or accuracy regresses against a stored baseline.
+
+    python bench_command_mapping.py --output mapping-baseline.json
+    python bench_command_mapping.py --baseline mapping-baseline.json   # exits 1 on regressions
+    python bench_command_mapping.py --sizes 50 500 --budget-ms 5
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sys
+import time
+from typing import Dict, List, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT_DIR)
+
+from bench_stats import distribution, latency_regressions
+from shell_bridge import VoiceCommandProcessor
+
+# Vocabulary for synthetic phrases, kept apart from the words in the real table
+ENGLISH_WORDS = [
+    "archive", "backup", "branch", "buffer", "cache", "certificate", "cluster", "config", "container",
+    "cron", "daemon", "database", "deploy", "device", "docker", "driver", "export", "firewall", "font",
+    "gateway", "image", "index", "kernel", "key", "library", "locale", "log", "mailbox", "mirror",
+    "module", "monitor", "mount", "package", "partition", "patch", "port", "printer", "profile",
+    "proxy", "queue", "release", "remote", "repo", "route", "schedule", "secret", "server", "service",
+    "session", "snapshot", "socket", "swap", "tag", "task", "theme", "timer", "token", "user",
+    "volume", "wallpaper",
+]
+ENGLISH_VERBS = ["open", "check", "restart", "update", "describe", "stop", "start", "clean", "sync", "inspect"]
+HINDI_WORDS = [
+    "बैकअप", "ब्रांच", "कैश", "सर्वर", "सेवा", "पैकेज", "लॉग", "डेटाबेस", "पोर्ट", "प्रिंटर", "प्रोफाइल",
+    "कतार", "रिलीज", "रिमोट", "रिपो", "रास्ता", "शेड्यूल", "सत्र", "स्नैपशॉट", "सॉकेट", "टैग", "काम",
+    "थीम", "टाइमर", "टोकन", "उपयोगकर्ता", "वॉल्यूम", "डिवाइस", "ड्राइवर", "फ़ायरवॉल", "गेटवे", "चित्र",
+    "सूची", "कर्नेल", "चाबी", "लाइब्रेरी", "मेलबॉक्स", "मॉड्यूल", "मॉनिटर", "पैच",
+]
+HINDI_VERBS = ["चलाओ", "रोको", "भेजो", "बदलो", "खोजो", "मिटाओ", "सहेजो", "लाओ", "जोड़ो", "गिनो",
+               "छापो", "पढ़ो", "लिखो", "बांटो", "समेटो", "सजाओ", "घुमाओ", "तोलो", "परखो", "सुधारो"]
+LANGUAGES = ("hindi", "english")
+
+# Code-mixed (Hinglish) requests the recogniser produces, with the command they mean
+CODE_MIXED = [
+    ("गिट स्टेटस please", "git status"),
+    ("please फोल्डर खोलो", "ls"),
+    ("मेमोरी दिखाओ now", "free -h"),
+    ("ऊपर जाओ please", "cd .."),
+    ("सिस्टम जानकारी दो", "uname -a"),
+    ("git स्टेटस", "git status"),
+]
+
+
+def clean(text: str) -> str:
+    """The normalisation map_command applies, for expected values of misses"""
+    return re.sub(r'[!.?।]', '', text).strip().lower()
+
+
+def base_tables() -> Dict[str, Dict[str, str]]:
+    return VoiceCommandProcessor(None).command_mappings
+
+
+def synthetic_phrases(language: str, count: int, rng: random.Random) -> List[str]:
+    """count distinct 'verb noun noun' phrases"""
+    words, verbs = (HINDI_WORDS, HINDI_VERBS) if language == "hindi" else (ENGLISH_WORDS, ENGLISH_VERBS)
+    space = len(verbs) * len(words) * len(words)
+    if count > space:
+        raise ValueError(f"only {space} distinct synthetic {language} phrases")
+    phrases = []
+    for index in rng.sample(range(space), count):
+        verb, rest = divmod(index, len(words) * len(words))
+        first, second = divmod(rest, len(words))
+        if language == "hindi":
+            phrases.append(f"{words[first]} {words[second]} {verbs[verb]}")
+        else:
+            phrases.append(f"{verbs[verb]} {words[first]} {words[second]}")
+    return phrases
+
+
+def build_tables(size: int, rng: random.Random) -> Dict[str, Dict[str, str]]:
+    """size phrases split across both languages: the real table first, then synthetic entries"""
+    tables = {}
+    for position, language in enumerate(LANGUAGES):
+        share = size // 2 + (size % 2 if position == 0 else 0)
+        real = list(base_tables()[language].items())[:share]
+        table = dict(real)
+        for index, phrase in enumerate(synthetic_phrases(language, share - len(table), rng)):
+            table[phrase] = f"task-{language[:2]}-{index}"
+        tables[language] = table
+    return tables
+
+
+def build_inputs(tables: Dict[str, Dict[str, str]], per_category: int,
+                 rng: random.Random) -> Dict[str, List[Tuple[str, str]]]:
+    """Inputs by category as (text, expected command); the language is detected like the voice loop does"""
+    base = base_tables()
+    real = {lang: [(p, c) for p, c in base[lang].items() if tables[lang].get(p) == c] for lang in LANGUAGES}
+    synthetic = {lang: [(p, c) for p, c in tables[lang].items() if p not in base[lang]] for lang in LANGUAGES}
+
+    def pick(pool: List, count: int) -> List:
+        return [rng.choice(pool) for _ in range(count)] if pool else []
+
+    half = max(1, per_category // 2)
+    inputs: Dict[str, List[Tuple[str, str]]] = {"exact": [], "noisy": [], "embedded": [], "late_entry": [],
+                                                 "code_mixed": [], "miss": []}
+    for lang in LANGUAGES:
+        inputs["exact"] += pick(real[lang], half)
+        suffix = "।" if lang == "hindi" else "!"
+        inputs["noisy"] += [(p.capitalize() + suffix, c) for p, c in pick(real[lang], half)]
+        template = "कृपया {} अभी" if lang == "hindi" else "please {} now"
+        inputs["embedded"] += [(template.format(p), c) for p, c in pick(real[lang], half)]
+        # Entries at the end of the table are the last ones the linear passes reach
+        inputs["late_entry"] += list(synthetic[lang][-half:]) if synthetic[lang] else []
+    inputs["code_mixed"] = [(text, command) for text, command in CODE_MIXED
+                            if any(command in t.values() for t in tables.values())][:per_category]
+    misses = ["zebra crossing signal", "ज़ेबरा क्रॉसिंग सिग्नल", "orbit satellite uplink", "बादल बारिश मौसम",
+              "violin sonata tempo", "नदी किनारा पुल"]
+    inputs["miss"] = [(text, clean(text)) for text in (misses * per_category)[:per_category]]
+    return {category: pairs for category, pairs in inputs.items() if pairs}
+
+
+# ----------------------------------------------------------------------
+# Measurement and reporting
+# ----------------------------------------------------------------------
+
+def measure(size: int, per_category: int, rounds: int, seed: int) -> Dict:
+    rng = random.Random(seed + size)
+    processor = VoiceCommandProcessor(None)
+    processor.command_mappings = build_tables(size, rng)
+    inputs = build_inputs(processor.command_mappings, per_category, rng)
+
+    categories = {}
+    everything: List[float] = []
+    correct = total = 0
+    wrong: List[Dict] = []
+    for category, pairs in inputs.items():
+        samples: List[float] = []
+        hits = 0
+        for text, expected in pairs:
+            language = processor.detect_language(text)
+            for round_index in range(rounds):
+                start = time.perf_counter()
+                mapped = processor.map_command(text, language)
+                samples.append(time.perf_counter() - start)
+            if mapped == expected:
+                hits += 1
+            elif len(wrong) < 10 and not any(w["input"] == text for w in wrong):
+                wrong.append({"category": category, "input": text, "expected": expected, "mapped": mapped})
+        correct += hits
+        total += len(pairs)
+        everything += samples
+        categories[category] = {**distribution(samples), "accuracy": round(hits / len(pairs), 4)}
+    return {"size": size, "phrases": {lang: len(t) for lang, t in processor.command_mappings.items()},
+            "overall": {**distribution(everything), "accuracy": round(correct / total, 4)},
+            "categories": categories, "wrong": wrong}
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float, floor_ms: float, accuracy_drop: float) -> List[str]:
+    """Human-readable regressions: lower accuracy or slower percentiles at the same table size"""
+    regressions = []
+    before_by_size = {str(r["size"]): r for r in baseline.get("results", [])}
+    for result in report["results"]:
+        before = before_by_size.get(str(result["size"]))
+        if not before:
+            continue
+        rows = [("overall", result["overall"], before["overall"])]
+        rows += [(name, stats, before["categories"].get(name)) for name, stats in result["categories"].items()]
+        for name, current, old in rows:
+            if not old:
+                continue
+            label = f"{result['size']} phrases {name}"
+            if current["accuracy"] < old["accuracy"] - accuracy_drop:
+                regressions.append(f"{label} accuracy {old['accuracy']:.1%} → {current['accuracy']:.1%}")
+            regressions += latency_regressions(label, current, old, tolerance, floor_ms)
+    return regressions
+
+
+def growth_exponent(results: List[Dict]) -> float:
+    """Least-squares slope of log mean latency against log table size; 1.0 means linear in the table"""
+    points = [(math.log(r["size"]), math.log(r["overall"]["mean"])) for r in results if r["overall"]["mean"] > 0]
+    if len(points) < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    return round(sum((x - mean_x) * (y - mean_y) for x, y in points) / spread, 3) if spread else 0.0
+
+
+def print_report(report: Dict) -> None:
+    print("\n" + "="*78)
+    print(f"🗺️  map_command: {report['config']['rounds']} rounds per input, "
+          f"growth exponent {report['growth_exponent']} (1.0 = linear in table size)")
+    print("="*78)
+    print(f"{'phrases':>8}  {'category':<12}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}{'acc':>9}")
+    for result in report["results"]:
+        rows = [("overall", result["overall"])] + list(result["categories"].items())
+        for name, stats in rows:
+            print(f"{result['size']:>8}  {name:<12}{stats['count']:>7}{stats['p50']:>10.3f}{stats['p95']:>10.3f}"
+                  f"{stats['p99']:>10.3f}{stats['max']:>10.3f}{stats['accuracy']:>9.1%}")
+        for miss in result["wrong"]:
+            print(f"{'':>10}❌ {miss['category']}: {miss['input']!r} → {miss['mapped']!r} "
+                  f"(expected {miss['expected']!r})")
+        print("-"*78)
+    print("(ms)\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark command mapping latency and accuracy as the table grows")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000, 50000],
+                        help="total phrases per table, split between Hindi and English")
+    parser.add_argument("--per-category", type=int, default=20, help="inputs per category")
+    parser.add_argument("--rounds", type=int, default=5, help="timed calls per input")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write the report as JSON")
+    parser.add_argument("--baseline", help="compare against a report saved with --output")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--floor-ms", type=float, default=0.05, help="ignore latency changes smaller than this")
+    parser.add_argument("--accuracy-drop", type=float, default=0.0, help="allowed accuracy loss (0.01 = 1 point)")
+    parser.add_argument("--budget-ms", type=float, help="fail if any table size has an overall p99 above this")
+    args = parser.parse_args()
+
+    results = []
+    for size in sorted(args.sizes):
+        started = time.perf_counter()
+        results.append(measure(size, args.per_category, args.rounds, args.seed))
+        print(f"⏱️  {size} phrases measured in {time.perf_counter() - started:.1f}s")
+    report = {"results": results, "growth_exponent": growth_exponent(results),
+              "config": {"per_category": args.per_category, "rounds": args.rounds, "seed": args.seed}}
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 Report written to {args.output}")
+
+    failures = []
+    if args.budget_ms is not None:
+        failures += [f"{r['size']} phrases p99 {r['overall']['p99']:.3f} ms over the {args.budget_ms} ms budget"
+                     for r in results if r["overall"]["p99"] > args.budget_ms]
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        differing = [k for k, v in report["config"].items()
+                     if k != "rounds" and baseline.get("config", {}).get(k) != v]
+        if differing:
+            print(f"⚠️  Baseline was recorded with different settings: {', '.join(differing)}")
+        failures += compare(report, baseline, args.tolerance, args.floor_ms, args.accuracy_drop)
+    if failures:
+        print("❌ Regressions:")
+        for line in failures:
+            print(f"   {line}")
+        sys.exit(1)
+    if args.baseline or args.budget_ms is not None:
+        print("✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Mini-Bash Benchmark
+Drives the compiled mini-bash with scripted workloads: startup, builtins,
+external commands, N-stage pipelines, redirections and a history at
+capacity. Reports p50/p95/p99 per workload and pipeline throughput, and
+compares against a stored baseline to catch regressions from C changes.
+
+    python bench_minibash.py --iterations 300 --output baseline.json
+    python bench_minibash.py --baseline baseline.json          # exits 1 on regressions
+    python bench_minibash.py --only pipeline --stages 2 8 32
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import select
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from bench_stats import distribution, latency_regressions, rate_regression
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BINARY = os.path.join(ROOT_DIR, "mini-bash")
+
+
+def shell_limit(name: str, default: int) -> int:
+    """A #define from headers/shell.h, so the benchmark follows the C limits"""
+    try:
+        with open(os.path.join(ROOT_DIR, "headers", "shell.h")) as f:
+            match = re.search(rf"#define\s+{name}\s+(\d+)", f.read())
+        return int(match.group(1)) if match else default
+    except OSError:
+        return default
+
+
+MAX_HISTORY = shell_limit("MAX_HISTORY", 1000)
+MAX_CMD_LEN = shell_limit("MAX_CMD_LEN", 1024)
+MAX_ARGS = shell_limit("MAX_ARGS", 64)  # split_pipeline() also caps the number of stages
+
+
+class MiniBashError(Exception):
+    """mini-bash exited, hung or answered something other than expected"""
+
+
+# ----------------------------------------------------------------------
+# Driving the binary
+# ----------------------------------------------------------------------
+
+class Session:
+    """One long-lived mini-bash; a command is done when the next prompt is printed"""
+
+    def __init__(self, binary: str, cwd: str, timeout: float = 30.0):
+        self.timeout = timeout
+        # mini-bash prints its cwd in the prompt; realpath matches what getcwd() returns
+        self.prompt = f"mini-bash:{os.path.realpath(cwd)}$ ".encode()
+        self.proc = subprocess.Popen([binary], cwd=cwd, stdin=subprocess.PIPE,
+                                     stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        self.read_until_prompt()  # banner and first prompt
+
+    def read_until_prompt(self) -> bytes:
+        fd = self.proc.stdout.fileno()
+        deadline = time.monotonic() + self.timeout
+        chunks = []
+        tail = b""
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise MiniBashError(f"no prompt within {self.timeout}s")
+            ready, _, _ = select.select([fd], [], [], remaining)
+            if not ready:
+                continue
+            data = os.read(fd, 65536)
+            if not data:
+                raise MiniBashError(f"mini-bash exited with {self.proc.wait()}")
+            chunks.append(data)
+            tail = (tail + data)[-len(self.prompt):]
+            if tail == self.prompt:
+                return b"".join(chunks)[:-len(self.prompt)]
+
+    def run(self, command: str) -> bytes:
+        self.proc.stdin.write(command.encode() + b"\n")
+        self.proc.stdin.flush()
+        return self.read_until_prompt()
+
+    def close(self) -> None:
+        try:
+            self.proc.stdin.write(b"exit\n")
+            self.proc.stdin.close()
+            self.proc.wait(timeout=self.timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            self.proc.kill()
+            self.proc.wait()
+
+
+def run_once(binary: str, cwd: str, command: Optional[str], timeout: float = 30.0) -> bytes:
+    """A fresh mini-bash per command, the way the backend runs it"""
+    script = (f"{command}\n" if command else "") + "exit\n"
+    proc = subprocess.run([binary], cwd=cwd, input=script.encode(), stdout=subprocess.PIPE,
+                          stderr=subprocess.STDOUT, timeout=timeout)
+    if proc.returncode != 0:
+        raise MiniBashError(f"mini-bash exited with {proc.returncode}")
+    return proc.stdout
+
+
+def seed_history(cwd: str, entries: int) -> None:
+    with open(os.path.join(cwd, ".history"), "w") as f:
+        for index in range(entries):
+            f.write(f"echo seeded history entry {index}\n")
+
+
+# ----------------------------------------------------------------------
+# Workloads
+# ----------------------------------------------------------------------
+
+class Workload:
+    """Commands cycled through either one session or a fresh process per command"""
+
+    def __init__(self, name: str, commands: List[str], mode: str = "session", expect: Optional[str] = None,
+                 history: int = 0, files: Optional[Dict[str, bytes]] = None,
+                 check: Optional[Callable[[str], bool]] = None):
+        self.name = name
+        self.commands = commands
+        self.mode = mode
+        self.expect = expect
+        self.history = history
+        self.files = files or {}
+        self.check = check
+
+    def prepare(self, workdir: str) -> str:
+        cwd = os.path.join(workdir, self.name)
+        os.makedirs(cwd, exist_ok=True)
+        for name, content in self.files.items():
+            with open(os.path.join(cwd, name), "wb") as f:
+                f.write(content)
+        seed_history(cwd, self.history)
+        return cwd
+
+    def verify(self, output: bytes) -> None:
+        text = output.decode(errors="replace")
+        if self.expect is not None and self.expect not in text:
+            raise MiniBashError(f"{self.name}: expected {self.expect!r}, got {text[-200:]!r}")
+        if self.check is not None and not self.check(text):
+            raise MiniBashError(f"{self.name}: unexpected output {text[-200:]!r}")
+
+    def measure(self, binary: str, workdir: str, iterations: int, warmup: int) -> List[float]:
+        cwd = self.prepare(workdir)
+        samples = []
+        if self.mode == "process":
+            for index in range(warmup + iterations):
+                if self.history:
+                    seed_history(cwd, self.history)  # the previous run rewrote it at exit
+                command = self.commands[index % len(self.commands)] if self.commands else None
+                start = time.perf_counter()
+                output = run_once(binary, cwd, command)
+                elapsed = time.perf_counter() - start
+                if index == 0:
+                    self.verify(output)
+                if index >= warmup:
+                    samples.append(elapsed)
+            return samples
+
+        session = Session(binary, cwd)
+        try:
+            for index in range(warmup + iterations):
+                command = self.commands[index % len(self.commands)]
+                start = time.perf_counter()
+                output = session.run(command)
+                elapsed = time.perf_counter() - start
+                if index == 0:
+                    self.verify(output)
+                if index >= warmup:
+                    samples.append(elapsed)
+        finally:
+            session.close()
+        return samples
+
+
+def pipeline_command(stages: int, source: str) -> str:
+    """`cat source | cat | … | wc -c` with the given number of stages (at least two)"""
+    middle = ["cat"] * (stages - 2)
+    command = " | ".join([f"cat {source}"] + middle + ["wc -c"])
+    if len(command) >= MAX_CMD_LEN:
+        raise ValueError(f"a {stages}-stage pipeline exceeds MAX_CMD_LEN ({MAX_CMD_LEN})")
+    return command
+
+
+def build_workloads(stages: List[int]) -> List[Workload]:
+    small = b"".join(f"line {i}\n".encode() for i in range(100))
+    history_commands = [f"echo command {i}" for i in range(50)]  # distinct, so each one is recorded
+    workloads = [
+        Workload("startup", [], mode="process", expect="Advanced Mini Bash Shell"),
+        Workload("startup_full_history", [], mode="process", history=MAX_HISTORY,
+                 expect="Advanced Mini Bash Shell"),
+        Workload("per_process_ls", ["ls"], mode="process", files={"small.txt": small}, expect="small.txt"),
+        Workload("builtin", ["pwd", "echo hello", "cd ."], check=lambda out: "/" in out or "hello" in out),
+        Workload("external", ["true", "/bin/echo hello", "ls"], files={"small.txt": small}),
+        Workload("redirect_out", ["ls > out.txt"], files={"small.txt": small}),
+        Workload("redirect_in", ["cat < small.txt"], files={"small.txt": small}, expect="line 99"),
+        Workload("redirect_append", ["cat small.txt >> log.txt"], files={"small.txt": small}),
+        Workload("history_at_capacity", history_commands, history=MAX_HISTORY, expect="command 0"),
+        Workload("history_list", ["history"], history=MAX_HISTORY,
+                 check=lambda out: out.count("\n") >= MAX_HISTORY),
+    ]
+    for count in stages:
+        workloads.append(Workload(f"pipeline_{count}", [pipeline_command(count, "small.txt")],
+                                  files={"small.txt": small}, expect=str(len(small))))
+    return workloads
+
+
+def pipeline_throughput(binary: str, workdir: str, stages: List[int], megabytes: int, runs: int) -> Dict[str, float]:
+    """MB/s pushed through each pipeline length; the data never reaches Python, only wc's count"""
+    cwd = os.path.join(workdir, "throughput")
+    os.makedirs(cwd, exist_ok=True)
+    size = megabytes * 2**20
+    with open(os.path.join(cwd, "big.bin"), "wb") as f:
+        f.write(b"0123456789abcdef" * (size // 16))
+    results = {}
+    session = Session(binary, cwd, timeout=300)
+    try:
+        for count in stages:
+            command = pipeline_command(count, "big.bin")
+            best = math.inf
+            for run in range(runs + 1):
+                start = time.perf_counter()
+                output = session.run(command)
+                elapsed = time.perf_counter() - start
+                if str(size) not in output.decode(errors="replace"):
+                    raise MiniBashError(f"pipeline_{count}: expected {size} bytes, got {output[-200:]!r}")
+                if run:  # the first run warms the page cache
+                    best = min(best, elapsed)
+            results[f"pipeline_{count}"] = round(megabytes / best, 1)
+    finally:
+        session.close()
+    return results
+
+
+# ----------------------------------------------------------------------
+# Reporting
+# ----------------------------------------------------------------------
+
+def compare(report: Dict, baseline: Dict, tolerance: float, floor_ms: float) -> List[str]:
+    """Human-readable regressions: slower percentiles or lower pipeline throughput beyond tolerance"""
+    regressions = []
+    for name, current in report["latency"].items():
+        regressions += latency_regressions(name, current, baseline.get("latency", {}).get(name), tolerance, floor_ms)
+    for name, rate in report.get("throughput", {}).items():
+        dropped = rate_regression(name, rate, baseline.get("throughput", {}).get(name), tolerance, "MB/s")
+        if dropped:
+            regressions.append(dropped)
+    return regressions
+
+
+def print_report(report: Dict) -> None:
+    config = report["config"]
+    print("\n" + "="*72)
+    print(f"🐚 mini-bash: {config['iterations']} iterations per workload, history capacity {MAX_HISTORY}")
+    print("="*72)
+    print(f"{'workload':<24}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)")
+    for name, stats in report["latency"].items():
+        if stats.get("count"):
+            print(f"{name:<24}{stats['count']:>7}{stats['p50']:>10.3f}{stats['p95']:>10.3f}"
+                  f"{stats['p99']:>10.3f}{stats['max']:>10.3f}")
+    if report.get("throughput"):
+        print(f"\n{'throughput':<24}{config['throughput_mb']:>7} MB through cat stages")
+        for name, rate in report["throughput"].items():
+            print(f"{name:<24}{rate:>10.1f} MB/s")
+    print("="*72 + "\n")
+
+
+def build(binary: str) -> None:
+    """Rebuild with make so the numbers always reflect the current C sources"""
+    if binary != DEFAULT_BINARY:
+        if not os.path.exists(binary):
+            sys.exit(f"❌ {binary} does not exist")
+        return
+    proc = subprocess.run(["make", "--no-print-directory"], cwd=ROOT_DIR, capture_output=True, text=True)
+    if proc.returncode != 0:
+        sys.exit(f"❌ make failed:\n{proc.stdout}{proc.stderr}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark mini-bash startup, commands, pipelines and history")
+    parser.add_argument("--binary", default=DEFAULT_BINARY,
+                        help="mini-bash to measure (default: ./mini-bash, rebuilt with make first)")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--stages", type=int, nargs="+", default=[2, 4, 8, 16, 32],
+                        help="pipeline lengths to measure")
+    parser.add_argument("--throughput-mb", type=int, default=32, help="data pushed through each pipeline; 0 skips")
+    parser.add_argument("--throughput-runs", type=int, default=3)
+    parser.add_argument("--only", help="regex selecting workloads by name")
+    parser.add_argument("--output", help="write the report as JSON")
+    parser.add_argument("--baseline", help="compare against a report saved with --output")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative slowdown")
+    parser.add_argument("--floor-ms", type=float, default=0.2, help="ignore latency changes smaller than this")
+    args = parser.parse_args()
+
+    if any(not 2 <= count <= MAX_ARGS for count in args.stages):
+        parser.error(f"pipelines need between 2 and {MAX_ARGS} stages")
+    build(args.binary)
+    binary = os.path.abspath(args.binary)
+
+    workloads = [w for w in build_workloads(args.stages) if not args.only or re.search(args.only, w.name)]
+    report = {"latency": {}, "throughput": {}}
+    with tempfile.TemporaryDirectory(prefix="mini-bash-bench-") as workdir:
+        for workload in workloads:
+            print(f"⏱️  {workload.name} ({workload.mode})")
+            try:
+                samples = workload.measure(binary, workdir, args.iterations, args.warmup)
+            except (MiniBashError, subprocess.TimeoutExpired) as e:
+                print(f"❌ {workload.name} failed: {e}")
+                continue
+            report["latency"][workload.name] = distribution(samples)
+        if args.throughput_mb > 0 and (not args.only or re.search(args.only, "pipeline")):
+            print(f"⏱️  pipeline throughput ({args.throughput_mb} MB)")
+            try:
+                report["throughput"] = pipeline_throughput(binary, workdir, args.stages,
+                                                           args.throughput_mb, args.throughput_runs)
+            except MiniBashError as e:
+                print(f"❌ pipeline throughput failed: {e}")
+
+    report["config"] = {"iterations": args.iterations, "warmup": args.warmup, "stages": args.stages,
+                        "throughput_mb": args.throughput_mb, "max_history": MAX_HISTORY}
+    print_report(report)
+    failed = [w.name for w in workloads if w.name not in report["latency"]]
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        differing = [k for k, v in report["config"].items()
+                     if k != "iterations" and baseline.get("config", {}).get(k) != v]
+        if differing:
+            print(f"⚠️  Baseline was recorded with different settings: {', '.join(differing)}")
+        regressions = compare(report, baseline, args.tolerance, args.floor_ms)
+        if regressions:
+            print("❌ Regressions against baseline:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print("✅ No regressions against baseline")
+
+    if failed:
+        sys.exit(f"❌ Workloads failed: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Benchmark Stats
+Percentiles, latency distributions and baseline checks shared by the
+bench_*.py scripts, so every report computes and compares them the same way
+"""
+
+import math
+from typing import Dict, List, Optional
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def distribution(samples: List[float], scale: float = 1000.0) -> Dict[str, float]:
+    """count, mean, p50/p95/p99 and max in milliseconds; scale converts the samples (1000 for seconds)"""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0}
+    return {"count": len(ordered), "mean": round(scale * sum(ordered) / len(ordered), 4),
+            "p50": round(scale * percentile(ordered, 50), 4), "p95": round(scale * percentile(ordered, 95), 4),
+            "p99": round(scale * percentile(ordered, 99), 4), "max": round(scale * ordered[-1], 4)}
+
+
+def latency_regressions(name: str, current: Dict, before: Optional[Dict], tolerance: float,
+                        floor_ms: float) -> List[str]:
+    """Percentiles slower than before by more than tolerance (a fraction) and floor_ms"""
+    if not before or not current.get("count") or not before.get("count"):
+        return []
+    regressions = []
+    for key in ("p50", "p95", "p99"):
+        if current[key] > before[key] * (1 + tolerance) and current[key] - before[key] > floor_ms:
+            regressions.append(f"{name} {key} {before[key]:.3f} → {current[key]:.3f} ms")
+    return regressions
+
+
+def rate_regression(name: str, current: float, before: Optional[float], tolerance: float,
+                    unit: str) -> Optional[str]:
+    """A throughput that fell below before by more than tolerance, or None"""
+    if before and current < before * (1 - tolerance):
+        return f"{name} throughput {before} → {current} {unit}"
+    return None
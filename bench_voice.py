@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Voice Pipeline Benchmark
+Replays WAV fixtures through EnhancedVoiceShell with local stand-ins for the
+Speech-to-Text, Translation and Text-to-Speech clients (configurable latency),
+so the voice loop can be measured without a microphone or network. Reports
+end-to-end and per-stage latency and how many utterances mapped to the
+expected command.
+
+    python bench_voice.py --rounds 5
+    python bench_voice.py --stt-ms 400 --translate-ms 120 --tts-ms 250 --executor stub
+    python bench_voice.py --write-fixtures fixtures/   # then swap in real recordings
+    python bench_voice.py --fixtures fixtures/ --output voice.json
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import math
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+import wave
+from types import SimpleNamespace
+from typing import Dict, List
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT_DIR)
+
+from bench_stats import distribution
+from shell_bridge import ShellBridge, VoiceCommandProcessor
+from voice_enhanced import EnhancedVoiceShell
+
+CONFIG_FILE = os.path.join(ROOT_DIR, "voice_config.json")
+SAMPLE_RATE = 16000
+STAGES = ["speech_to_text", "translate", "execute", "audio_to_command", "feedback", "total"]
+
+# Leave out phrases that quit the loop or need the network
+SKIPPED_COMMANDS = {"exit", "check internet", "बाहर निकलो", "इंटरनेट जांचो"}
+
+
+def simulated_delay(ms: float, jitter: float) -> None:
+    """Sleep for a lognormally distributed time with median ms, like a remote API call"""
+    if ms <= 0:
+        return
+    seconds = ms / 1000
+    time.sleep(random.lognormvariate(math.log(seconds), jitter) if jitter else seconds)
+
+
+# ----------------------------------------------------------------------
+# Local stand-ins for the Google Cloud clients
+# ----------------------------------------------------------------------
+
+class StandInSpeechClient:
+    """Recognises fixtures by their audio bytes; latency grows with the audio length"""
+
+    def __init__(self, fixtures: List[Dict], base_ms: float, ms_per_second: float, jitter: float):
+        self.by_digest = {f["digest"]: f for f in fixtures}
+        self.base_ms = base_ms
+        self.ms_per_second = ms_per_second
+        self.jitter = jitter
+
+    def recognize(self, config, audio):
+        content = audio["content"] if isinstance(audio, dict) else audio.content
+        fixture = self.by_digest.get(hashlib.sha1(content).hexdigest())
+        seconds = fixture["seconds"] if fixture else 0.0
+        simulated_delay(self.base_ms + self.ms_per_second * seconds, self.jitter)
+        if fixture is None:
+            return SimpleNamespace(results=[])
+        alternative = SimpleNamespace(transcript=fixture["transcript"], confidence=fixture.get("confidence", 0.95))
+        return SimpleNamespace(results=[SimpleNamespace(alternatives=[alternative],
+                                                        language_code=fixture["language"])])
+
+
+class StandInTranslateClient:
+    def __init__(self, table: Dict[str, str], latency_ms: float, jitter: float):
+        self.table = table
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+
+    def translate(self, text, source_language=None, target_language=None):
+        simulated_delay(self.latency_ms, self.jitter)
+        return {"translatedText": self.table.get(text, text), "detectedSourceLanguage": source_language}
+
+
+class StandInTTSClient:
+    """Returns MP3-sized silence after the configured delay"""
+
+    def __init__(self, latency_ms: float, jitter: float):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+
+    def synthesize_speech(self, input, voice, audio_config):
+        simulated_delay(self.latency_ms, self.jitter)
+        text = input["text"] if isinstance(input, dict) else input.text
+        return SimpleNamespace(audio_content=b"\xff\xfb\x90\x00" * (200 * len(text)))
+
+
+class StandInBridge:
+    """Takes the place of ShellBridge when only the voice stages should be measured"""
+
+    def __init__(self, latency_ms: float, jitter: float):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.is_running = False
+
+    def start_shell(self) -> bool:
+        self.is_running = True
+        return True
+
+    def stop_shell(self) -> None:
+        self.is_running = False
+
+    def execute_command(self, command: str) -> Dict[str, str]:
+        simulated_delay(self.latency_ms, self.jitter)
+        return {"command": command, "output": "", "error": "", "success": True}
+
+
+# ----------------------------------------------------------------------
+# Fixtures
+# ----------------------------------------------------------------------
+
+def default_phrases() -> List[Dict]:
+    """Supported phrases from voice_config.json, with the expected command from the mapping table"""
+    with open(CONFIG_FILE, encoding="utf-8") as f:
+        supported = json.load(f)["supported_commands"]
+    mappings = VoiceCommandProcessor(None)  # only its table is used
+    phrases = []
+    # The Hindi and English lists are parallel, which gives the stand-in translations
+    for hindi, english in zip(supported["hindi"], supported["english"]):
+        if hindi in SKIPPED_COMMANDS or english in SKIPPED_COMMANDS:
+            continue
+        phrases.append({"transcript": hindi, "language": "hi-IN", "translation": english,
+                        "expected_command": mappings.command_mappings["hindi"].get(hindi)})
+        phrases.append({"transcript": english, "language": "en-US",
+                        "expected_command": mappings.command_mappings["english"].get(english)})
+    return phrases
+
+
+def write_wav(path: str, seconds: float, seed: int) -> None:
+    """Mono 16-bit 16 kHz, the format record_audio produces; a tone plus noise unique to the seed"""
+    rng = random.Random(seed)
+    frequency = 180 + 20 * (seed % 25)
+    frames = bytearray()
+    for i in range(int(seconds * SAMPLE_RATE)):
+        sample = 6000 * math.sin(2 * math.pi * frequency * i / SAMPLE_RATE) + rng.gauss(0, 300)
+        frames += struct.pack("<h", max(-32768, min(32767, int(sample))))
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(bytes(frames))
+
+
+def write_fixtures(directory: str, seconds: float) -> None:
+    os.makedirs(directory, exist_ok=True)
+    entries = []
+    for index, phrase in enumerate(default_phrases()):
+        name = f"{index:02d}_{phrase['language']}.wav"
+        write_wav(os.path.join(directory, name), seconds, index)
+        entries.append({"file": name, **phrase})
+    with open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"fixtures": entries}, f, indent=2, ensure_ascii=False)
+
+
+def load_fixtures(directory: str) -> List[Dict]:
+    """manifest.json lists file, transcript, language and optionally translation, expected_command, confidence"""
+    with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+        entries = json.load(f)["fixtures"]
+    fixtures = []
+    for entry in entries:
+        path = os.path.join(directory, entry["file"])
+        with open(path, "rb") as f:
+            content = f.read()
+        with wave.open(path, "rb") as wf:
+            seconds = wf.getnframes() / wf.getframerate()
+        fixtures.append({**entry, "path": path, "digest": hashlib.sha1(content).hexdigest(), "seconds": seconds})
+    return fixtures
+
+
+# ----------------------------------------------------------------------
+# Replay and reporting
+# ----------------------------------------------------------------------
+
+def replay(shell: EnhancedVoiceShell, fixtures: List[Dict], rounds: int, warmup: int, verbose: bool) -> Dict:
+    stages: Dict[str, List[float]] = {name: [] for name in STAGES}
+    by_language: Dict[str, List[float]] = {}
+    mismatches: Dict[str, Dict] = {}
+    unrecognised = checked = correct = 0
+    for round_index in range(warmup + rounds):
+        measured = round_index >= warmup
+        for fixture in fixtures:
+            output = io.StringIO()
+            with contextlib.redirect_stdout(sys.stdout if verbose else output):
+                outcome = shell.handle_audio(fixture["path"])
+            if not measured:
+                continue
+            if outcome is None or outcome["exit"]:
+                unrecognised += 1
+                continue
+            for name, value in outcome["timings"].items():
+                stages[name].append(value)
+            by_language.setdefault(outcome["language"], []).append(outcome["timings"]["audio_to_command"])
+            if fixture.get("expected_command") is not None:
+                checked += 1
+                if outcome["mapped_command"] == fixture["expected_command"]:
+                    correct += 1
+                else:
+                    mismatches[fixture["transcript"]] = {"expected": fixture["expected_command"],
+                                                         "mapped": outcome["mapped_command"]}
+    return {
+        "stages": {name: distribution(samples, scale=1) for name, samples in stages.items()},
+        "audio_to_command_by_language": {lang: distribution(samples, scale=1) for lang, samples in by_language.items()},
+        "utterances": rounds * len(fixtures),
+        "unrecognised": unrecognised,
+        "accuracy": round(correct / checked, 4) if checked else None,
+        "mismatches": mismatches
+    }
+
+
+def print_report(report: Dict) -> None:
+    config = report["config"]
+    print("\n" + "="*72)
+    print(f"🎤 Voice replay: {report['utterances']} utterances, executor {config['executor']}, "
+          f"stt {config['stt_ms']}+{config['stt_ms_per_second']}/s ms, translate {config['translate_ms']} ms, "
+          f"tts {config['tts_ms']} ms")
+    print("="*72)
+    print(f"{'stage':<26}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)")
+    rows = list(report["stages"].items())
+    rows += [(f"audio_to_command[{lang}]", stats) for lang, stats in report["audio_to_command_by_language"].items()]
+    for name, stats in rows:
+        if stats.get("count"):
+            print(f"{name:<26}{stats['count']:>7}{stats['p50']:>10.1f}{stats['p95']:>10.1f}"
+                  f"{stats['p99']:>10.1f}{stats['max']:>10.1f}")
+    accuracy = "n/a" if report["accuracy"] is None else f"{report['accuracy']:.1%}"
+    print(f"\nmapping accuracy {accuracy}   unrecognised {report['unrecognised']}")
+    for transcript, mismatch in report["mismatches"].items():
+        print(f"   ❌ {transcript!r}: expected {mismatch['expected']!r}, mapped {mismatch['mapped']!r}")
+    print("="*72 + "\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay WAV fixtures through the voice loop with stand-in clients")
+    parser.add_argument("--fixtures", help="directory with manifest.json and WAV files (default: generated)")
+    parser.add_argument("--write-fixtures", metavar="DIR", help="write generated fixtures and a manifest, then exit")
+    parser.add_argument("--audio-seconds", type=float, default=3.0, help="length of generated fixtures")
+    parser.add_argument("--rounds", type=int, default=3, help="passes over every fixture")
+    parser.add_argument("--warmup", type=int, default=1, help="unmeasured passes first")
+    parser.add_argument("--stt-ms", type=float, default=300.0, help="stand-in recognition latency")
+    parser.add_argument("--stt-ms-per-second", type=float, default=60.0, help="extra recognition ms per second of audio")
+    parser.add_argument("--translate-ms", type=float, default=100.0)
+    parser.add_argument("--tts-ms", type=float, default=200.0)
+    parser.add_argument("--playback-ms", type=float, default=0.0, help="simulated feedback playback")
+    parser.add_argument("--jitter", type=float, default=0.2, help="lognormal sigma of every stand-in latency")
+    parser.add_argument("--executor", choices=["real", "stub"], default="real",
+                        help="run mapped commands through ShellBridge in a scratch directory, or a stub")
+    parser.add_argument("--exec-ms", type=float, default=5.0, help="stub executor latency")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="show the voice shell's own output")
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args()
+
+    if args.write_fixtures:
+        write_fixtures(args.write_fixtures, args.audio_seconds)
+        print(f"💾 Fixtures written to {args.write_fixtures}; replace the WAVs with recordings and edit manifest.json")
+        return
+
+    random.seed(args.seed)
+    with tempfile.TemporaryDirectory(prefix="voice-bench-") as workdir:
+        fixture_dir = args.fixtures
+        if not fixture_dir:
+            fixture_dir = os.path.join(workdir, "fixtures")
+            write_fixtures(fixture_dir, args.audio_seconds)
+        fixtures = load_fixtures(os.path.abspath(fixture_dir))
+        translations = {f["transcript"]: f["translation"] for f in fixtures if f.get("translation")}
+
+        if args.executor == "real":
+            mini_bash = os.path.join(ROOT_DIR, "mini-bash")
+            if not os.path.exists(mini_bash):
+                sys.exit("❌ mini-bash executable not found; run 'make' first")
+            bridge = ShellBridge(mini_bash)
+        else:
+            bridge = StandInBridge(args.exec_ms, args.jitter)
+
+        # Commands run, and feedback files are written, in the scratch directory
+        scratch = os.path.join(workdir, "cwd")
+        os.makedirs(scratch)
+        previous_cwd = os.getcwd()
+        os.chdir(scratch)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                shell = EnhancedVoiceShell(
+                    config_file=CONFIG_FILE,
+                    speech_client=StandInSpeechClient(fixtures, args.stt_ms, args.stt_ms_per_second, args.jitter),
+                    translate_client=StandInTranslateClient(translations, args.translate_ms, args.jitter),
+                    tts_client=StandInTTSClient(args.tts_ms, args.jitter),
+                    shell_bridge=bridge
+                )
+                shell.play_audio = lambda audio_file: simulated_delay(args.playback_ms, args.jitter)
+                if not shell.start_shell():
+                    sys.exit("❌ Failed to start the shell")
+            try:
+                report = replay(shell, fixtures, args.rounds, args.warmup, args.verbose)
+            finally:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    shell.stop_shell()
+        finally:
+            os.chdir(previous_cwd)
+
+    report["config"] = {k: getattr(args, k) for k in ("fixtures", "audio_seconds", "rounds", "stt_ms",
+                                                        "stt_ms_per_second", "translate_ms", "tts_ms",
+                                                        "playback_ms", "jitter", "executor", "exec_ms")}
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
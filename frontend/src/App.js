@@ -4,9 +4,15 @@ import Terminal from './components/Terminal';
 import InputBar from './components/InputBar';
 import Header from './components/Header';
 import StatusBar from './components/StatusBar';
-import { connectWebSocket, sendCommand, onCommandResult, onConnected } from './services/websocket';
+import {
+  connectWebSocket, sendCommand, onCommandResult, onConnected,
+  followFile, unfollowFile, onFollowStarted, onFollowData, onFollowError
+} from './services/websocket';
 import { executeCommand } from './services/api';
 
+// A followed file keeps only this much of its output on screen
+const MAX_FOLLOW_CHARS = 200000;
+
 function App() {
   const [currentDirectory, setCurrentDirectory] = useState('~');
   const [commandHistory, setCommandHistory] = useState([]);
@@ -18,6 +24,25 @@ function App() {
     gemini_available: false,
     mini_bash_available: false
   });
+  // Path of the file a `tail -f` is streaming into the last output entry
+  const followingRef = useRef(null);
+
+  const updateFollowEntry = (path, update) => {
+    setCommandHistory(prev => prev.map(entry => (
+      entry.followPath === path ? { ...entry, content: update(entry.content || '').slice(-MAX_FOLLOW_CHARS) } : entry
+    )));
+  };
+
+  // Like Ctrl-C on tail -f: the next command, or leaving the page, ends the stream
+  const stopFollowing = () => {
+    const path = followingRef.current;
+    if (!path) return;
+    unfollowFile(path);
+    followingRef.current = null;
+    setCommandHistory(prev => prev.map(entry => (
+      entry.followPath === path ? { ...entry, followPath: null } : entry
+    )));
+  };
 
   useEffect(() => {
     // Connect to WebSocket
@@ -35,11 +60,31 @@ function App() {
       addToHistory(data);
     });
 
+    // The backlog at subscription time replaces the HTTP snapshot, so no bytes fall in between
+    onFollowStarted((data) => {
+      if (data.path === followingRef.current) {
+        updateFollowEntry(data.path, () => data.data || '');
+      }
+    });
+
+    onFollowData((data) => {
+      if (data.path === followingRef.current) {
+        updateFollowEntry(data.path, (content) => content + data.data);
+      }
+    });
+
+    onFollowError((data) => {
+      if (data.path && data.path === followingRef.current) {
+        followingRef.current = null;
+        addToHistory({ type: 'error', content: data.error, success: false });
+      }
+    });
+
     // Fetch initial status
     fetchSystemStatus();
 
     return () => {
-      // Cleanup
+      stopFollowing();
     };
   }, []);
 
@@ -65,11 +110,12 @@ function App() {
     }]);
   };
 
-  const handleCommandSubmit = async (command, isVoice = false, preferredExecutor = 'mini-bash') => {
+  const handleCommandSubmit = async (command, isVoice = false, preferredExecutor = 'mini-bash', voiceTiming = null) => {
     if (!command.trim()) return;
 
     setIsProcessing(true);
     setInputValue(''); // Clear input after submit
+    stopFollowing();
     
     // Add user input to history immediately
     addToHistory({
@@ -81,7 +127,7 @@ function App() {
     });
 
     try {
-      const result = await executeCommand(command, isVoice, preferredExecutor);
+      const result = await executeCommand(command, isVoice, preferredExecutor, voiceTiming);
       
       // Update current directory if changed
       if (result.current_directory) {
@@ -96,9 +142,16 @@ function App() {
         command: result.command,
         aiInterpretation: result.ai_interpretation,
         executor: result.executor,
-        directory: result.current_directory
+        directory: result.current_directory,
+        followPath: result.follow ? result.follow.path : null
       });
 
+      // tail -f comes back as a follow hand-off; stream appended lines into that entry
+      if (result.follow) {
+        followingRef.current = result.follow.path;
+        followFile(result.follow.path);
+      }
+
     } catch (error) {
       addToHistory({
         type: 'error',
@@ -1,11 +1,15 @@
 import React, { useState, useRef, useEffect } from 'react';
 import './InputBar.css';
+import { getCompletions } from '../services/api';
 
 function InputBar({ onCommandSubmit, isProcessing, currentDirectory, inputValue, setInputValue, focusInput }) {
   const [isRecording, setIsRecording] = useState(false);
   const [recognition, setRecognition] = useState(null);
   const [executor, setExecutor] = useState('mini-bash'); // 'mini-bash' or 'system-terminal'
+  const [completions, setCompletions] = useState([]);
   const inputRef = useRef(null);
+  const latestQuery = useRef('');
+  const recognitionStartedAt = useRef(null);
 
   // Focus input when focusInput prop changes
   useEffect(() => {
@@ -26,9 +30,11 @@ function InputBar({ onCommandSubmit, isProcessing, currentDirectory, inputValue,
         const transcript = event.results[0][0].transcript;
         setInputValue(transcript);
         setIsRecording(false);
+        // Reported with the command so the backend trace covers the whole voice round trip
+        const recognitionMs = recognitionStartedAt.current ? Date.now() - recognitionStartedAt.current : null;
         // Auto-submit after voice input
         setTimeout(() => {
-          handleSubmit(transcript, true);
+          handleSubmit(transcript, true, recognitionMs);
         }, 500);
       };
 
@@ -45,10 +51,10 @@ function InputBar({ onCommandSubmit, isProcessing, currentDirectory, inputValue,
     }
   }, []);
 
-  const handleSubmit = (commandText = null, isVoice = false) => {
+  const handleSubmit = (commandText = null, isVoice = false, recognitionMs = null) => {
     const command = commandText || inputValue;
     if (command.trim() && !isProcessing) {
-      onCommandSubmit(command, isVoice, executor);
+      onCommandSubmit(command, isVoice, executor, recognitionMs !== null ? { recognition_ms: recognitionMs } : null);
     }
   };
 
@@ -70,10 +76,25 @@ function InputBar({ onCommandSubmit, isProcessing, currentDirectory, inputValue,
       setIsRecording(false);
     } else {
       setIsRecording(true);
+      recognitionStartedAt.current = Date.now();
       recognition.start();
     }
   };
 
+  const handleInputChange = async (value) => {
+    setInputValue(value);
+    latestQuery.current = value;
+    if (!value.trim()) {
+      setCompletions([]);
+      return;
+    }
+    const results = await getCompletions(value);
+    // Ignore responses that arrive after the user has typed further
+    if (latestQuery.current === value) {
+      setCompletions(results);
+    }
+  };
+
   const handleClear = () => {
     setInputValue('');
     inputRef.current?.focus();
@@ -93,10 +114,17 @@ function InputBar({ onCommandSubmit, isProcessing, currentDirectory, inputValue,
           className="command-input"
           placeholder="Type a command in natural language... (e.g., 'show all python files')"
           value={inputValue}
-          onChange={(e) => setInputValue(e.target.value)}
+          onChange={(e) => handleInputChange(e.target.value)}
           onKeyPress={handleKeyPress}
           disabled={isProcessing || isRecording}
+          list="command-completions"
+          autoComplete="off"
         />
+        <datalist id="command-completions">
+          {completions.map((completion) => (
+            <option key={completion.text} value={completion.text} />
+          ))}
+        </datalist>
         
         {inputValue && (
           <button
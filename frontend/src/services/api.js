@@ -1,4 +1,5 @@
 import axios from 'axios';
+import { getSessionId } from './websocket';
 
 const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:5002';
 
@@ -10,12 +11,14 @@ const api = axios.create({
   },
 });
 
-export const executeCommand = async (command, isVoice = false, preferredExecutor = 'mini-bash') => {
+export const executeCommand = async (command, isVoice = false, preferredExecutor = 'mini-bash', voiceTiming = null) => {
   try {
     const response = await api.post('/api/execute', {
       command,
       is_voice: isVoice,
       preferred_executor: preferredExecutor,
+      session_id: getSessionId(),
+      voice_timing: voiceTiming,
     });
     return response.data;
   } catch (error) {
@@ -34,10 +37,10 @@ export const getCurrentDirectory = async () => {
   }
 };
 
-export const getCommandHistory = async (limit = 50) => {
+export const getCommandHistory = async (limit = 50, before = undefined) => {
   try {
     const response = await api.get('/api/history', {
-      params: { limit },
+      params: { limit, before },
     });
     return response.data;
   } catch (error) {
@@ -46,6 +49,28 @@ export const getCommandHistory = async (limit = 50) => {
   }
 };
 
+export const searchHistory = async (q, { limit = 50, before } = {}) => {
+  try {
+    const response = await api.get('/api/history/search', {
+      params: { q, limit, before },
+    });
+    return response.data;
+  } catch (error) {
+    console.error('Error searching history:', error);
+    throw error;
+  }
+};
+
+export const getHistoryEntry = async (id) => {
+  try {
+    const response = await api.get(`/api/history/${id}`);
+    return response.data;
+  } catch (error) {
+    console.error('Error getting history entry:', error);
+    throw error;
+  }
+};
+
 export const getFeedbackLog = async () => {
   try {
     const response = await api.get('/api/feedback');
@@ -56,6 +81,18 @@ export const getFeedbackLog = async () => {
   }
 };
 
+export const getCompletions = async (query, limit = 8) => {
+  try {
+    const response = await api.get('/api/complete', {
+      params: { q: query, limit },
+    });
+    return response.data.completions;
+  } catch (error) {
+    console.error('Error getting completions:', error);
+    return [];
+  }
+};
+
 export const searchFiles = async (filename, startDir) => {
   try {
     const response = await api.post('/api/search', {
@@ -5,6 +5,16 @@ const WS_URL = process.env.REACT_APP_WS_URL || 'http://localhost:5002';
 let socket = null;
 let isConnected = false;
 
+// One id per browser tab; the backend sends this session's command events to its room only
+export const getSessionId = () => {
+  let sessionId = sessionStorage.getItem('nlshell-session-id');
+  if (!sessionId) {
+    sessionId = `s-${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 10)}`;
+    sessionStorage.setItem('nlshell-session-id', sessionId);
+  }
+  return sessionId;
+};
+
 export const connectWebSocket = () => {
   if (socket && isConnected) {
     return socket;
@@ -15,6 +25,7 @@ export const connectWebSocket = () => {
     reconnection: true,
     reconnectionDelay: 1000,
     reconnectionAttempts: 5,
+    query: { session_id: getSessionId() },
   });
 
   socket.on('connect', () => {
@@ -42,11 +53,14 @@ export const disconnectWebSocket = () => {
   }
 };
 
-export const sendCommand = (command, isVoice = false) => {
+// Output streams back as command_output chunks tagged with requestId, then a final command_result
+export const sendCommand = (command, isVoice = false, requestId = null, preferredExecutor = 'mini-bash') => {
   if (socket && isConnected) {
     socket.emit('execute_command', {
       command,
       is_voice: isVoice,
+      request_id: requestId,
+      preferred_executor: preferredExecutor,
     });
   } else {
     console.error('WebSocket not connected');
@@ -65,12 +79,86 @@ export const onCommandResult = (callback) => {
   }
 };
 
+// { request_id, stream: 'stdout' | 'stderr', data }
+export const onCommandOutput = (callback) => {
+  if (socket) {
+    socket.on('command_output', callback);
+  }
+};
+
+// Batches of compact summaries: { events: [{ id, command, status, summary, ... }] }
 export const onCommandExecuted = (callback) => {
   if (socket) {
     socket.on('command_executed', callback);
   }
 };
 
+export const subscribeHistory = () => {
+  if (socket && isConnected) {
+    socket.emit('subscribe_history');
+  }
+};
+
+export const searchFiles = (filename, { startDir, mode = 'auto', limit = 10 } = {}) => {
+  const searchId = `search-${Date.now()}-${Math.random().toString(36).slice(2, 8)}`;
+  if (socket && isConnected) {
+    socket.emit('search_files', {
+      filename,
+      start_dir: startDir,
+      mode,
+      limit,
+      search_id: searchId,
+    });
+  } else {
+    console.error('WebSocket not connected');
+  }
+  return searchId;
+};
+
+export const onSearchMatch = (callback) => {
+  if (socket) {
+    socket.on('search_match', callback);
+  }
+};
+
+export const onSearchComplete = (callback) => {
+  if (socket) {
+    socket.on('search_complete', callback);
+  }
+};
+
+export const followFile = (path, { backlog = 4096 } = {}) => {
+  if (socket && isConnected) {
+    socket.emit('follow', { path, backlog });
+  } else {
+    console.error('WebSocket not connected');
+  }
+};
+
+export const unfollowFile = (path) => {
+  if (socket && isConnected) {
+    socket.emit('unfollow', { path });
+  }
+};
+
+export const onFollowStarted = (callback) => {
+  if (socket) {
+    socket.on('follow_started', callback);
+  }
+};
+
+export const onFollowData = (callback) => {
+  if (socket) {
+    socket.on('follow_data', callback);
+  }
+};
+
+export const onFollowError = (callback) => {
+  if (socket) {
+    socket.on('follow_error', callback);
+  }
+};
+
 export const getConnectionStatus = () => {
   return isConnected;
 };
@@ -81,7 +169,18 @@ export default {
   sendCommand,
   onConnected,
   onCommandResult,
+  onCommandOutput,
   onCommandExecuted,
+  subscribeHistory,
+  getSessionId,
+  searchFiles,
+  onSearchMatch,
+  onSearchComplete,
+  followFile,
+  unfollowFile,
+  onFollowStarted,
+  onFollowData,
+  onFollowError,
   getConnectionStatus,
 };
 
@@ -13,25 +13,34 @@ processor = VoiceCommandProcessor(shell_bridge)
 print("🧪 Testing Command Mapping")
 print("=" * 60)
 
-# Test cases
+# Test cases: (voice text, language, expected command)
 test_cases = [
-    ("लिस्ट फाइल्स!", "hindi"),
-    ("List files!", "english"),
-    ("होल्डर खोलो!", "hindi"),
-    ("फोल्डर खोलो", "hindi"),
-    ("current directory", "english"),
-    ("वर्तमान फोल्डर", "hindi"),
-    ("list files", "english"),
-    ("show files", "english"),
+    ("लिस्ट फाइल्स!", "hindi", "ls"),
+    ("List files!", "english", "ls"),
+    ("होल्डर खोलो!", "hindi", "ls"),
+    ("फोल्डर खोलो", "hindi", "ls"),
+    ("current directory", "english", "pwd"),
+    ("वर्तमान फोल्डर", "hindi", "pwd"),
+    ("list files", "english", "ls"),
+    ("show files", "english", "ls"),
 ]
 
-for voice_text, language in test_cases:
+failures = 0
+for voice_text, language, expected in test_cases:
     mapped = processor.map_command(voice_text, language)
-    print(f"📝 '{voice_text}' ({language}) → '{mapped}'")
-    
+    if mapped == expected:
+        print(f"📝 '{voice_text}' ({language}) → '{mapped}'")
+    else:
+        failures += 1
+        print(f"❌ '{voice_text}' ({language}) → '{mapped}', expected '{expected}'")
+
 print("\n" + "=" * 60)
-print("✅ Command mapping test complete!")
 
 # Close shell bridge
 shell_bridge.stop_shell()
 
+if failures:
+    print(f"❌ {failures} of {len(test_cases)} mappings wrong")
+    print("   Latency and larger tables: python bench_command_mapping.py")
+    sys.exit(1)
+print("✅ Command mapping test complete!")
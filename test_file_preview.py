@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Test file preview ranges: byte paging, line ranges and rejected arguments"""
+
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from file_preview import FilePreview, FilePreviewError
+
+directory = tempfile.mkdtemp()
+with open(os.path.join(directory, "notes.txt"), "w") as f:
+    f.write("one\ntwo\nthree")  # no trailing newline
+
+preview = FilePreview()
+
+print("🧪 Testing File Preview")
+print("=" * 60)
+
+failures = 0
+
+
+def check(label, ok, detail=""):
+    global failures
+    if ok:
+        print(f"📝 {label}")
+    else:
+        failures += 1
+        print(f"❌ {label} {detail}")
+
+
+page = preview.read("notes.txt", directory, offset=4, length=4)
+check("offset 4, length 4 → 'two\\n'", page["content"] == "two\n" and page["next_offset"] == 8, page)
+
+page = preview.read("notes.txt", directory, start_line=1, num_lines=5)
+check("lines from 1 → 2 lines", page["lines"] == 2 and page["content"] == "two\nthree", page)
+
+page = preview.read("notes.txt", directory, start_line=10)
+check("lines past the end → 0 lines", page["lines"] == 0 and page["content"] == "", page)
+
+# Bad ranges fail with 400 instead of paging backwards or returning everything
+for label, kwargs in [("negative length", {"length": -5}), ("zero length", {"length": 0}),
+                      ("negative offset", {"offset": -1})]:
+    try:
+        page = preview.read("notes.txt", directory, **kwargs)
+        check(f"{label} rejected", False, page)
+    except FilePreviewError as e:
+        check(f"{label} rejected ({e.status})", e.status == 400)
+
+print("\n" + "=" * 60)
+
+if failures:
+    print(f"❌ {failures} preview checks wrong")
+    sys.exit(1)
+print("✅ File preview test complete!")
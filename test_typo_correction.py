@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Test typo correction: plain English goes to translation, only clear commands are corrected"""
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from typo_correction import TypoCorrector
+
+corrector = TypoCorrector()
+corrector.warm()
+
+print("🧪 Testing Typo Correction")
+print("=" * 60)
+
+failures = 0
+
+
+def expect(text, command):
+    """command: the corrected command, None for suggestions only, False for a pass-through"""
+    global failures
+    result = corrector.check(text)
+    if command is False:
+        ok = result is None
+    else:
+        ok = result is not None and result["command"] == command
+    if ok:
+        print(f"📝 '{text}' → {(result['command'] or 'suggestions') if result else 'pass-through'}")
+    else:
+        failures += 1
+        print(f"❌ '{text}' → {result}, expected {command!r}")
+
+
+# Natural language must never run as a "correction"; at most it carries suggestions
+for text in ["hello", "restart server", "compress photos", "clean up", "print hello"]:
+    result = corrector.check(text)
+    if result is not None and result["command"] is not None:
+        failures += 1
+        print(f"❌ '{text}' was corrected to '{result['command']}'")
+    else:
+        print(f"📝 '{text}' → translation")
+
+# Builtins, keywords and paths run as typed
+for text in ["export FOO=1", "set -x", "unset FOO", "umask", "read x", "ulimit -n", "./run.sh", "FOO=1 ls"]:
+    expect(text, False)
+
+# Flags, paths and shell syntax make a typo clearly a command
+expect("sl -la", "ls -la")
+expect("gerp foo | head", "grep foo | head")
+expect("cta ~/notes.txt", "cat ~/notes.txt")
+
+# Without them, a correction needs the command in history
+expect("gti status", None)
+corrector.learn("git status")
+expect("gti status", "git status")
+
+print("\n" + "=" * 60)
+
+if failures:
+    print(f"❌ {failures} typo checks wrong")
+    sys.exit(1)
+print("✅ Typo correction test complete!")
@@ -8,47 +8,52 @@ Enhanced with better shell integration and command processing
 import os
 import sys
 import json
+import subprocess
 import threading
 import time
+import wave
 from typing import Optional, Dict, List
 
-# Google Cloud imports
+# Google Cloud imports; only needed for the clients that aren't passed in
 try:
     from google.cloud import speech
     from google.cloud import translate_v2 as translate
     from google.cloud import texttospeech
 except ImportError:
-    print("❌ Google Cloud libraries not installed!")
-    print("Run: pip install google-cloud-speech google-cloud-translate google-cloud-texttospeech")
-    sys.exit(1)
+    speech = translate = texttospeech = None
 
-# Audio recording imports
+# Audio recording imports; only needed for the microphone
 try:
     import pyaudio
-    import wave
 except ImportError:
-    print("❌ Audio libraries not installed!")
-    print("Run: pip install pyaudio wave")
-    sys.exit(1)
+    pyaudio = None
 
 # Import our shell bridge
 from shell_bridge import ShellBridge, VoiceCommandProcessor
 
 class EnhancedVoiceShell:
-    def __init__(self, config_file: str = "voice_config.json"):
-        """Initialize the enhanced voice-controlled shell"""
+    def __init__(self, config_file: str = "voice_config.json", speech_client=None, translate_client=None,
+                 tts_client=None, shell_bridge: Optional[ShellBridge] = None):
+        """Initialize the enhanced voice-controlled shell.
+
+        Any client passed in replaces the Google Cloud one, e.g. a local stand-in for offline replay.
+        """
         self.config = self.load_config(config_file)
-        self.speech_client = speech.SpeechClient()
-        self.translate_client = translate.Client()
-        self.tts_client = texttospeech.TextToSpeechClient()
+        if None in (speech_client, translate_client, tts_client) and speech is None:
+            print("❌ Google Cloud libraries not installed!")
+            print("Run: pip install google-cloud-speech google-cloud-translate google-cloud-texttospeech")
+            sys.exit(1)
+        self.speech_client = speech_client or speech.SpeechClient()
+        self.translate_client = translate_client or translate.Client()
+        self.tts_client = tts_client or texttospeech.TextToSpeechClient()
         
         # Initialize shell bridge
-        self.shell_bridge = ShellBridge()
+        self.shell_bridge = shell_bridge or ShellBridge()
         self.command_processor = None
         
         # Audio settings
         self.CHUNK = 1024
-        self.FORMAT = pyaudio.paInt16
+        self.FORMAT = pyaudio.paInt16 if pyaudio else None
         self.CHANNELS = 1
         self.RATE = 16000
         self.RECORD_SECONDS = 5
@@ -100,6 +105,11 @@ class EnhancedVoiceShell:
 
     def record_audio(self) -> Optional[str]:
         """Record audio from microphone with enhanced error handling"""
+        if pyaudio is None:
+            print("❌ Audio libraries not installed!")
+            print("Run: pip install pyaudio")
+            return None
+
         try:
             audio = pyaudio.PyAudio()
             
@@ -153,9 +163,8 @@ class EnhancedVoiceShell:
             with open(audio_file, 'rb') as audio_file_content:
                 content = audio_file_content.read()
             
-            audio = speech.RecognitionAudio(content=content)
-            config = speech.RecognitionConfig(
-                encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+            config = dict(
+                encoding="LINEAR16",
                 sample_rate_hertz=self.RATE,
                 language_code="hi-IN",  # Start with Hindi
                 alternative_language_codes=["en-US"],
@@ -164,6 +173,13 @@ class EnhancedVoiceShell:
                 model="latest_long",
                 use_enhanced=True
             )
+            if speech is None:
+                # Stand-in client without the SDK installed: same fields as plain dicts
+                audio = {"content": content}
+            else:
+                audio = speech.RecognitionAudio(content=content)
+                config["encoding"] = speech.RecognitionConfig.AudioEncoding.LINEAR16
+                config = speech.RecognitionConfig(**config)
             
             response = self.speech_client.recognize(config=config, audio=audio)
             
@@ -216,25 +232,29 @@ class EnhancedVoiceShell:
             return
             
         try:
-            synthesis_input = texttospeech.SynthesisInput(text=text)
+            synthesis_input = {"text": text}
             
             # Select appropriate voice based on language
             if language.startswith("hi"):
-                voice = texttospeech.VoiceSelectionParams(
+                voice = dict(
                     language_code="hi-IN",
                     name="hi-IN-Wavenet-A",  # Hindi voice
-                    ssml_gender=texttospeech.SsmlVoiceGender.FEMALE
+                    ssml_gender="FEMALE"
                 )
             else:
-                voice = texttospeech.VoiceSelectionParams(
+                voice = dict(
                     language_code="en-US",
                     name="en-US-Wavenet-D",  # English voice
-                    ssml_gender=texttospeech.SsmlVoiceGender.MALE
+                    ssml_gender="MALE"
                 )
             
-            audio_config = texttospeech.AudioConfig(
-                audio_encoding=texttospeech.AudioEncoding.MP3
-            )
+            audio_config = {"audio_encoding": "MP3"}
+            
+            if texttospeech is not None:
+                synthesis_input = texttospeech.SynthesisInput(**synthesis_input)
+                voice["ssml_gender"] = texttospeech.SsmlVoiceGender[voice["ssml_gender"]]
+                voice = texttospeech.VoiceSelectionParams(**voice)
+                audio_config = texttospeech.AudioConfig(audio_encoding=texttospeech.AudioEncoding.MP3)
             
             response = self.tts_client.synthesize_speech(
                 input=synthesis_input,
@@ -268,6 +288,85 @@ class EnhancedVoiceShell:
         except:
             pass  # Silently fail if audio player not available
 
+    def handle_audio(self, audio_file: str) -> Optional[Dict]:
+        """Run one recorded utterance through recognition, translation, execution and feedback.
+
+        Returns None when nothing usable was recognised; otherwise the command result
+        plus "transcript", "language", "exit" and per-stage "timings" in milliseconds.
+        """
+        timings = {}
+        started = time.perf_counter()
+
+        # Convert speech to text
+        transcript, detected_lang = self.speech_to_text(audio_file)
+        timings["speech_to_text"] = (time.perf_counter() - started) * 1000
+        if not transcript:
+            print("❌ No speech detected or low confidence")
+            return None
+
+        # Check for exit commands
+        exit_commands = ["exit", "quit", "stop", "बाहर निकलो", "रुको", "बंद करो"]
+        if any(exit_cmd in transcript.lower() for exit_cmd in exit_commands):
+            print("👋 Goodbye!")
+            self.text_to_speech("Goodbye! See you later!", "en")
+            return {"transcript": transcript, "exit": True, "timings": timings}
+
+        # Process command
+        self.is_processing = True
+        print("🔄 Processing command...")
+
+        # Determine language
+        if detected_lang and detected_lang.startswith("hi"):
+            language = "hindi"
+            # Translate if needed
+            step = time.perf_counter()
+            english_text = self.translate_text(transcript, "hi", "en")
+            timings["translate"] = (time.perf_counter() - step) * 1000
+            print(f"📝 Original (Hindi): {transcript}")
+            print(f"🌐 Translated (English): {english_text}")
+        else:
+            language = "english"
+            english_text = transcript
+            print(f"📝 Command (English): {english_text}")
+
+        # Execute command using shell bridge
+        print(f"🎯 Language detected: {language}")
+        step = time.perf_counter()
+        result = self.command_processor.process_voice_command(transcript, language)
+        timings["execute"] = (time.perf_counter() - step) * 1000
+        timings["audio_to_command"] = (time.perf_counter() - started) * 1000
+        print(f"🔧 Mapped command: {result.get('mapped_command', 'N/A')}")
+
+        # Display results
+        step = time.perf_counter()
+        if result.get("success", False):
+            print("✅ Command executed successfully!")
+            if result.get("output"):
+                print("📤 Output:")
+                print(result["output"])
+
+            # Voice feedback
+            if language == "hindi":
+                self.text_to_speech("कमांड सफलतापूर्वक चलाया गया", "hi")
+            else:
+                self.text_to_speech("Command executed successfully", "en")
+        else:
+            print("❌ Command failed!")
+            if result.get("error"):
+                print("⚠️  Error:")
+                print(result["error"])
+
+            # Voice feedback
+            if language == "hindi":
+                self.text_to_speech("कमांड असफल", "hi")
+            else:
+                self.text_to_speech("Command failed", "en")
+        timings["feedback"] = (time.perf_counter() - step) * 1000
+        timings["total"] = (time.perf_counter() - started) * 1000
+
+        self.is_processing = False
+        return {**result, "transcript": transcript, "language": language, "exit": False, "timings": timings}
+
     def process_voice_command(self) -> None:
         """Main voice command processing loop with enhanced features"""
         print("🎤 Voice control ready! Start speaking...")
@@ -279,69 +378,17 @@ class EnhancedVoiceShell:
                 if not audio_file:
                     continue
                 
-                # Convert speech to text
-                transcript, detected_lang = self.speech_to_text(audio_file)
-                if not transcript:
-                    print("❌ No speech detected or low confidence")
-                    continue
-                
-                # Clean up audio file
-                os.remove(audio_file)
+                try:
+                    outcome = self.handle_audio(audio_file)
+                finally:
+                    # Clean up audio file
+                    os.remove(audio_file)
                 
-                # Check for exit commands
-                exit_commands = ["exit", "quit", "stop", "बाहर निकलो", "रुको", "बंद करो"]
-                if any(exit_cmd in transcript.lower() for exit_cmd in exit_commands):
-                    print("👋 Goodbye!")
-                    self.text_to_speech("Goodbye! See you later!", "en")
+                if outcome is None:
+                    continue
+                if outcome["exit"]:
                     break
                 
-                # Process command
-                self.is_processing = True
-                print("🔄 Processing command...")
-                
-                # Determine language
-                if detected_lang and detected_lang.startswith("hi"):
-                    language = "hindi"
-                    # Translate if needed
-                    english_text = self.translate_text(transcript, "hi", "en")
-                    print(f"📝 Original (Hindi): {transcript}")
-                    print(f"🌐 Translated (English): {english_text}")
-                else:
-                    language = "english"
-                    english_text = transcript
-                    print(f"📝 Command (English): {english_text}")
-                
-                # Execute command using shell bridge
-                print(f"🎯 Language detected: {language}")
-                result = self.command_processor.process_voice_command(transcript, language)
-                print(f"🔧 Mapped command: {result.get('mapped_command', 'N/A')}")
-                
-                # Display results
-                if result.get("success", False):
-                    print("✅ Command executed successfully!")
-                    if result.get("output"):
-                        print("📤 Output:")
-                        print(result["output"])
-                    
-                    # Voice feedback
-                    if language == "hindi":
-                        self.text_to_speech("कमांड सफलतापूर्वक चलाया गया", "hi")
-                    else:
-                        self.text_to_speech("Command executed successfully", "en")
-                else:
-                    print("❌ Command failed!")
-                    if result.get("error"):
-                        print("⚠️  Error:")
-                        print(result["error"])
-                    
-                    # Voice feedback
-                    if language == "hindi":
-                        self.text_to_speech("कमांड असफल", "hi")
-                    else:
-                        self.text_to_speech("Command failed", "en")
-                
-                self.is_processing = False
-                
                 print("\n" + "="*60)
                 print("🎤 Ready for next command...")
                 